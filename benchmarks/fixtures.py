@@ -0,0 +1,272 @@
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from golemio import columnar
+from golemio.client import GolemioClient
+
+# Fixture files and the API paths they are served at
+FIXTURES = {
+    'stops.json': '/gtfs/stops',
+    'vehiclepositions.json': '/vehiclepositions',
+    'departureboards.json': '/pid/departureboards',
+    'vehicle_positions.pb': '/vehiclepositions/gtfsrt/vehicle_positions.pb',
+    'trip_updates.pb': '/vehiclepositions/gtfsrt/trip_updates.pb',
+}
+
+# Prague's bounding box
+MIN_LAT, MAX_LAT = 49.94, 50.18
+MIN_LON, MAX_LON = 14.22, 14.71
+
+VEHICLE_TYPES = [(0, 'tramvaj', 'tram', 'L%d' % i, str(i)) for i in range(1, 27)] + \
+                [(3, 'autobus', 'bus', 'L%d' % i, str(i)) for i in range(100, 250)]
+
+
+def _stop(i, rng):
+    node, platform = 1 + i // 4, 1 + i % 4
+    return {
+        'geometry': {'coordinates': [round(rng.uniform(MIN_LON, MAX_LON), 6),
+                                     round(rng.uniform(MIN_LAT, MAX_LAT), 6)], 'type': 'Point'},
+        'properties': {
+            'asw_id': {'node': node, 'stop': platform},
+            'location_type': 0,
+            'parent_station': None,
+            'platform_code': chr(ord('A') + platform - 1),
+            'stop_id': 'U%dZ%dP' % (node, platform),
+            'stop_name': 'Zastávka %d' % node,
+            'wheelchair_boarding': rng.choice([0, 1, 2]),
+            'zone_id': rng.choice(['P', '0', 'B', '1']),
+            'level_id': None,
+        },
+        'type': 'Feature',
+    }
+
+
+def _vehicle(i, stops, rng):
+    route_type, description_cs, description_en, route_id, short_name = rng.choice(VEHICLE_TYPES)
+    last_stop, next_stop = rng.sample(stops, 2)
+    lon, lat = last_stop['geometry']['coordinates']
+    return {
+        'geometry': {'coordinates': [lon + rng.uniform(-0.002, 0.002), lat + rng.uniform(-0.002, 0.002)],
+                     'type': 'Point'},
+        'properties': {
+            'last_position': {
+                'bearing': rng.randrange(360),
+                'delay': {'actual': rng.randrange(-60, 600), 'last_stop_arrival': rng.randrange(600),
+                          'last_stop_departure': rng.randrange(600)},
+                'is_canceled': False,
+                'last_stop': {'arrival_time': '2024-05-01T12:00:00+02:00', 'departure_time': '2024-05-01T12:00:30+02:00',
+                              'id': last_stop['properties']['stop_id'], 'sequence': rng.randrange(1, 30)},
+                'next_stop': {'arrival_time': '2024-05-01T12:02:00+02:00', 'departure_time': '2024-05-01T12:02:30+02:00',
+                              'id': next_stop['properties']['stop_id'], 'sequence': rng.randrange(2, 31)},
+                'origin_timestamp': '2024-05-01T12:01:%02d+02:00' % rng.randrange(60),
+                'shape_dist_traveled': '%.3f' % rng.uniform(0, 20),
+                'speed': rng.randrange(60),
+                'state_position': 'on_track',
+                'tracking': True,
+            },
+            'trip': {
+                'agency_name': {'real': 'DP PRAHA', 'scheduled': 'DP PRAHA'},
+                'cis': {'line_id': '100%s' % short_name, 'trip_number': 1000 + i},
+                'gtfs': {'route_id': route_id, 'route_short_name': short_name, 'route_type': route_type,
+                         'trip_headsign': next_stop['properties']['stop_name'],
+                         'trip_id': '%s_%d_240501' % (short_name, i), 'trip_short_name': None},
+                'origin_route_name': short_name,
+                'sequence_id': rng.randrange(1, 50),
+                'start_timestamp': '2024-05-01T11:40:00+02:00',
+                'vehicle_registration_number': 3000 + i,
+                'vehicle_type': {'description_cs': description_cs, 'description_en': description_en,
+                                 'id': route_type},
+                'wheelchair_accessible': rng.random() < 0.8,
+                'air_conditioned': rng.random() < 0.5,
+            },
+        },
+        'type': 'Feature',
+    }
+
+
+def _departure(stop, i, rng):
+    route_type, _, _, route_id, short_name = rng.choice(VEHICLE_TYPES)
+    hour, minute = divmod(12 * 60 + 5 + i * 3, 60)
+    scheduled = '2024-05-01T%02d:%02d:00+02:00' % (hour, minute)
+    return {
+        'arrival_timestamp': {'predicted': scheduled, 'scheduled': scheduled},
+        'delay': {'is_available': True, 'minutes': rng.randrange(5), 'seconds': rng.randrange(300)},
+        'departure_timestamp': {'predicted': scheduled, 'scheduled': scheduled, 'minutes': str(5 + i * 3)},
+        'last_stop': {'id': stop['properties']['stop_id'], 'name': stop['properties']['stop_name']},
+        'route': {'short_name': short_name, 'type': route_type, 'is_night': False,
+                  'is_regional': False, 'is_substitute_transport': False},
+        'stop': {'id': stop['properties']['stop_id'], 'platform_code': stop['properties']['platform_code']},
+        'trip': {'direction': None, 'headsign': 'Konečná %s' % short_name, 'id': '%s_%d_240501' % (short_name, i),
+                 'is_at_stop': False, 'is_canceled': False, 'is_wheelchair_accessible': True,
+                 'is_air_conditioned': False, 'short_name': None},
+    }
+
+
+def _feeds(vehicles, rng):
+    """
+    Build the GTFS Realtime vehicle positions and trip updates feeds matching the GeoJSON positions.
+    """
+    positions = columnar.gtfs_realtime_pb2.FeedMessage()
+    updates = columnar.gtfs_realtime_pb2.FeedMessage()
+    for feed in (positions, updates):
+        feed.header.gtfs_realtime_version = '2.0'
+        feed.header.timestamp = 1714557660
+    for i, vehicle in enumerate(vehicles):
+        gtfs = vehicle['properties']['trip']['gtfs']
+        lon, lat = vehicle['geometry']['coordinates']
+        entity = positions.entity.add(id=str(i))
+        entity.vehicle.trip.trip_id = gtfs['trip_id']
+        entity.vehicle.trip.route_id = gtfs['route_id']
+        entity.vehicle.vehicle.id = 'service-%d-%d' % (gtfs['route_type'], i)
+        entity.vehicle.position.latitude = lat
+        entity.vehicle.position.longitude = lon
+        entity.vehicle.position.bearing = vehicle['properties']['last_position']['bearing']
+        entity.vehicle.position.speed = vehicle['properties']['last_position']['speed']
+        entity.vehicle.timestamp = 1714557600 + rng.randrange(60)
+        entity = updates.entity.add(id=str(i))
+        entity.trip_update.trip.trip_id = gtfs['trip_id']
+        entity.trip_update.trip.route_id = gtfs['route_id']
+        for sequence in range(1, 21):
+            stop_time = entity.trip_update.stop_time_update.add(stop_sequence=sequence,
+                                                                stop_id='U%dZ1P' % rng.randrange(1, 2500))
+            stop_time.arrival.delay = rng.randrange(-30, 300)
+            stop_time.departure.delay = stop_time.arrival.delay + rng.randrange(30)
+    return positions.SerializeToString(), updates.SerializeToString()
+
+
+def generate(directory, stops=10000, vehicles=1500, departures=20, seed=1):
+    """
+    Generate deterministic fixtures shaped like the real API responses.
+
+    The GTFS Realtime feeds are only written when gtfs-realtime-bindings is installed.
+
+    Args:
+        directory (str): The target directory, created if missing.
+        stops (int): The number of stops (optional, default is 10000).
+        vehicles (int): The number of vehicle positions (optional, default is 1500).
+        departures (int): The number of departures per stop on the departure boards (optional, default is 20).
+        seed (int): The random seed (optional, default is 1).
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    stop_features = [_stop(i, rng) for i in range(stops)]
+    vehicle_features = [_vehicle(i, stop_features, rng) for i in range(vehicles)]
+    boards = {stop['properties']['stop_id']: [_departure(stop, i, rng) for i in range(departures)]
+              for stop in stop_features[:500]}
+    payloads = {
+        'stops.json': {'type': 'FeatureCollection', 'features': stop_features},
+        'vehiclepositions.json': {'type': 'FeatureCollection', 'features': vehicle_features},
+        'departureboards.json': {'stops': [stop['properties'] for stop in stop_features[:500]],
+                                 'departures': boards},
+    }
+    for name, payload in payloads.items():
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+    if columnar.gtfs_realtime_pb2 is not None:
+        positions, updates = _feeds(vehicle_features, rng)
+        for name, body in (('vehicle_positions.pb', positions), ('trip_updates.pb', updates)):
+            with open(os.path.join(directory, name), 'wb') as f:
+                f.write(body)
+
+
+def record(directory, api_key):
+    """
+    Record fixtures from the live API instead of generating them.
+
+    Departure boards are recorded for the first 500 stops, in the layout written by generate().
+
+    Args:
+        directory (str): The target directory, created if missing.
+        api_key (str): The API key.
+    """
+    os.makedirs(directory, exist_ok=True)
+    client = GolemioClient(api_key=api_key)
+    stops = client.getGTFSAllStops(limit=10000)
+    payloads = {
+        'stops.json': stops,
+        'vehiclepositions.json': client.getAllVehiclePositions(limit=10000),
+        'departureboards.json': {'stops': [], 'departures': {}},
+    }
+    stop_ids = [feature['properties']['stop_id'] for feature in stops['features'][:500]]
+    for i in range(0, len(stop_ids), 50):
+        board = client.getDepartureBoards(ids=stop_ids[i:i + 50], limit=1000)
+        payloads['departureboards.json']['stops'].extend(board.get('stops', []))
+        for departure in board.get('departures', []):
+            stop_id = departure['stop']['id']
+            payloads['departureboards.json']['departures'].setdefault(stop_id, []).append(departure)
+    for name, payload in payloads.items():
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+    for name, body in (('vehicle_positions.pb', client.getVehiclePositionsProtobuf()),
+                       ('trip_updates.pb', client.getTripUpdatesProtobuf())):
+        with open(os.path.join(directory, name), 'wb') as f:
+            f.write(body)
+
+
+def _static(body):
+    """
+    Build a stub route serving a recorded JSON body whatever the query parameters.
+    """
+    def route(path, query):
+        return 200, body, {'Content-Type': 'application/json'}
+    return route
+
+
+def _departureBoards(boards):
+    """
+    Build a stub route answering departure board requests for any subset of the recorded stops.
+    """
+    stops = {stop['stop_id']: stop for stop in boards['stops']}
+
+    def route(path, query):
+        ids = [stop_id for value in query.get('ids', []) for stop_id in value.split(',')]
+        limit = int(query.get('limit', ['20'])[0])
+        departures = sorted((departure for stop_id in ids for departure in boards['departures'].get(stop_id, [])),
+                            key=lambda departure: departure['departure_timestamp']['scheduled'])
+        body = {'stops': [stops[stop_id] for stop_id in ids if stop_id in stops], 'departures': departures[:limit]}
+        return 200, json.dumps(body).encode(), {'Content-Type': 'application/json'}
+    return route
+
+
+def load(directory):
+    """
+    Load fixtures as StubGolemioServer routes.
+
+    Args:
+        directory (str): The directory written by generate() or record().
+
+    Returns:
+        dict: The routes by API path.
+    """
+    routes = {}
+    for name, path in FIXTURES.items():
+        filename = os.path.join(directory, name)
+        if not os.path.exists(filename):
+            continue
+        with open(filename, 'rb') as f:
+            body = f.read()
+        if name == 'departureboards.json':
+            routes[path] = _departureBoards(json.loads(body))
+        elif name.endswith('.json'):
+            routes[path] = _static(body)
+        else:
+            routes[path] = body
+    return routes
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate or record benchmark fixtures.')
+    parser.add_argument('directory', nargs='?', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                     'fixtures'))
+    parser.add_argument('--record', metavar='API_KEY', help='record the live API instead of generating fixtures')
+    parser.add_argument('--seed', type=int, default=1, help='random seed of the generated fixtures')
+    options = parser.parse_args()
+    if options.record:
+        record(options.directory, options.record)
+    else:
+        generate(options.directory, seed=options.seed)
@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+from stub import StubGolemioServer
+
+# Modules that `import golemio` must not load; they belong to the features that need them
+HEAVY_MODULES = ('requests', 'urllib3', 'httpx', 'aiohttp', 'asyncio', 'numpy', 'google.protobuf', 'orjson', 'sqlite3')
+
+# Run in a fresh interpreter per measurement, so nothing is imported yet
+COLD_START = '''
+import json, sys, time
+started = time.perf_counter()
+import golemio
+imported = time.perf_counter()
+loaded = [name for name in json.loads(sys.argv[2]) if name in sys.modules]
+client = golemio.GolemioClient()
+client.base_url, client.protocol = sys.argv[1], 'http'
+client.getGTFSRoutes()
+called = time.perf_counter()
+print(json.dumps({'import': imported - started, 'first_call': called - started, 'loaded': loaded}))
+'''
+
+
+def measure(address, runs=10):
+    """
+    Measure the cold start of `import golemio` and of the first GolemioClient call in fresh interpreters.
+
+    Returns:
+        dict: Per measurement (import, first_call) the seconds of every run, plus the heavy modules
+            loaded by `import golemio` alone.
+    """
+    samples = {'import': [], 'first_call': []}
+    loaded = set()
+    # The first run compiles the bytecode cache and is not measured
+    for run in range(runs + 1):
+        output = subprocess.run([sys.executable, '-c', COLD_START, address, json.dumps(HEAVY_MODULES)], cwd=ROOT,
+                                capture_output=True, text=True, check=True, timeout=60).stdout
+        result = json.loads(output)
+        if run:
+            samples['import'].append(result['import'])
+            samples['first_call'].append(result['first_call'])
+        loaded.update(result['loaded'])
+    return samples, sorted(loaded)
+
+
+def _summary(seconds):
+    return {
+        'runs': len(seconds),
+        'median': statistics.median(seconds),
+        'min': min(seconds),
+        'max': max(seconds),
+    }
+
+
+def run(options):
+    """
+    Run the cold start measurements against a stub server.
+
+    Returns:
+        dict: The machine-readable results.
+    """
+    server = StubGolemioServer({'/gtfs/routes': [{'route_id': 'L22'}]}).start()
+    try:
+        samples, loaded = measure(server.address, options.runs)
+    finally:
+        server.stop()
+    results = {name: _summary(seconds) for name, seconds in samples.items()}
+    for name, result in results.items():
+        print(f'{name}: {result["median"] * 1000:.1f} ms median of {result["runs"]}', file=sys.stderr)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'runs': options.runs,
+        },
+        'results': results,
+        'eager_modules': loaded,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline run.
+
+    Returns:
+        list: (measurement, baseline median, median, relative change) of the regressed measurements.
+    """
+    regressions = []
+    for name, result in results['results'].items():
+        previous = baseline['results'].get(name)
+        if not previous or not previous['median']:
+            continue
+        change = result['median'] / previous['median'] - 1
+        print(f'{name}: {previous["median"] * 1000:.1f} -> {result["median"] * 1000:.1f} ms ({change:+.1%})',
+              file=sys.stderr)
+        if change > threshold:
+            regressions.append((name, previous['median'], result['median'], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the cold start of import golemio and the first call.')
+    parser.add_argument('--runs', type=int, default=10, help='measured interpreter starts')
+    parser.add_argument('--output', help='write the JSON results to this file instead of stdout')
+    parser.add_argument('--compare', help='baseline JSON results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='relative slowdown of the median reported as a regression')
+    options = parser.parse_args(argv)
+    results = run(options)
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    status = 0
+    if results['eager_modules']:
+        print('import golemio loaded ' + ', '.join(results['eager_modules']), file=sys.stderr)
+        status = 1
+    if options.compare:
+        with open(options.compare) as f:
+            regressions = compare(results, json.load(f), options.threshold)
+        if regressions:
+            print(f'{len(regressions)} measurement(s) regressed by more than {options.threshold:.0%}', file=sys.stderr)
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
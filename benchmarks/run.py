@@ -0,0 +1,348 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCHMARKS), 'tests'))
+
+import fixtures
+from golemio import columnar
+from golemio.async_client import AsyncGolemioClient, aiohttp
+from golemio.cache import ResponseCache
+from golemio.client import GolemioClient
+from golemio.coalesce import DepartureBoardBatcher
+from golemio.records import Stop, VehiclePosition, loadJson, toRecords
+from golemio.transport import HTTPX_AVAILABLE, HttpxTransport
+from stub import StubGolemioServer
+
+SCENARIOS = {}
+
+
+def scenario(name, requires=None):
+    """
+    Register a benchmark scenario.
+
+    The decorated function takes (server, options) and returns (operation, is_async, close):
+    operation is called (or awaited) once per measured request.
+    """
+    def register(setup):
+        SCENARIOS[name] = (setup, requires)
+        return setup
+    return register
+
+
+def _client(server, options, **kwargs):
+    return server.attach(GolemioClient(pool_size=max(10, options.concurrency), **kwargs))
+
+
+def _boardStops(options, count):
+    with open(os.path.join(options.fixtures, 'departureboards.json'), encoding='utf-8') as f:
+        stop_ids = [stop['stop_id'] for stop in json.load(f)['stops']][:count]
+    rng = random.Random(options.seed)
+    return lambda: rng.choice(stop_ids)
+
+
+@scenario('stops')
+def _stops(server, options):
+    client = _client(server, options)
+    return client.getGTFSAllStops, False, client.close
+
+
+@scenario('vehiclepositions')
+def _vehiclePositions(server, options):
+    client = _client(server, options)
+    return client.getAllVehiclePositions, False, client.close
+
+
+@scenario('stops_httpx', requires=lambda: HTTPX_AVAILABLE)
+def _stopsHttpx(server, options):
+    client = _client(server, options, transport=HttpxTransport(max_connections=max(10, options.concurrency)))
+    return client.getGTFSAllStops, False, client.close
+
+
+@scenario('stops_stream')
+def _stopsStream(server, options):
+    client = _client(server, options)
+    return lambda: sum(1 for _ in client.getGTFSAllStops(stream=True)), False, client.close
+
+
+@scenario('vehiclepositions_stream')
+def _vehiclePositionsStream(server, options):
+    client = _client(server, options)
+    return lambda: sum(1 for _ in client.getAllVehiclePositions(stream=True)), False, client.close
+
+
+@scenario('stops_typed')
+def _stopsTyped(server, options):
+    client = _client(server, options, typed=True)
+    return client.getGTFSAllStops, False, client.close
+
+
+@scenario('vehiclepositions_typed')
+def _vehiclePositionsTyped(server, options):
+    client = _client(server, options, typed=True)
+    return client.getAllVehiclePositions, False, client.close
+
+
+def _fixtureBody(options, name):
+    with open(os.path.join(options.fixtures, f'{name}.json'), 'rb') as f:
+        return f.read()
+
+
+# The decode scenarios make no request: they compare the plain standard library decoding of a fixture body
+# with the decoding of a typed client, so that typed mode can be checked against the json.loads baseline
+
+@scenario('stops_decode')
+def _stopsDecode(server, options):
+    body = _fixtureBody(options, 'stops')
+    return lambda: json.loads(body), False, lambda: None
+
+
+@scenario('stops_decode_typed')
+def _stopsDecodeTyped(server, options):
+    body = _fixtureBody(options, 'stops')
+    return lambda: toRecords(Stop, loadJson(body)), False, lambda: None
+
+
+@scenario('vehiclepositions_decode')
+def _vehiclePositionsDecode(server, options):
+    body = _fixtureBody(options, 'vehiclepositions')
+    return lambda: json.loads(body), False, lambda: None
+
+
+@scenario('vehiclepositions_decode_typed')
+def _vehiclePositionsDecodeTyped(server, options):
+    body = _fixtureBody(options, 'vehiclepositions')
+    return lambda: toRecords(VehiclePosition, loadJson(body)), False, lambda: None
+
+
+@scenario('vehicle_positions_pb')
+def _vehiclePositionsProtobuf(server, options):
+    client = _client(server, options)
+    return client.getVehiclePositionsProtobuf, False, client.close
+
+
+@scenario('trip_updates_pb')
+def _tripUpdatesProtobuf(server, options):
+    client = _client(server, options)
+    return client.getTripUpdatesProtobuf, False, client.close
+
+
+@scenario('vehicle_positions_columnar', requires=lambda: columnar.np is not None and
+          columnar.gtfs_realtime_pb2 is not None)
+def _vehiclePositionsColumnar(server, options):
+    client = _client(server, options)
+    interner = columnar.Interner()
+    return (lambda: columnar.decodeVehiclePositions(client.getVehiclePositionsProtobuf(), interner), False,
+            client.close)
+
+
+@scenario('departureboards')
+def _departureBoards(server, options):
+    client = _client(server, options)
+    stop = _boardStops(options, 500)
+    return lambda: client.getDepartureBoards(ids=stop(), limit=20), False, client.close
+
+
+@scenario('departureboards_cached')
+def _departureBoardsCached(server, options):
+    client = _client(server, options, cache=ResponseCache())
+    stop = _boardStops(options, 50)
+    return lambda: client.getDepartureBoards(ids=stop(), limit=20), False, client.close
+
+
+@scenario('departureboards_batched')
+def _departureBoardsBatched(server, options):
+    client = _client(server, options)
+    batcher = DepartureBoardBatcher(client, window=0.01)
+    stop = _boardStops(options, 500)
+    return lambda: batcher.getDepartureBoards(ids=stop(), limit=20), False, client.close
+
+
+@scenario('departureboards_async', requires=lambda: aiohttp is not None)
+def _departureBoardsAsync(server, options):
+    client = server.attach(AsyncGolemioClient(max_connections=options.concurrency))
+    stop = _boardStops(options, 500)
+    return lambda: client.getDepartureBoards(ids=stop(), limit=20), True, client.close
+
+
+def _summary(latencies, errors, seconds, upstream):
+    latencies = sorted(latencies)
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else None
+
+    return {
+        'ops': len(latencies),
+        'errors': errors,
+        'seconds': seconds,
+        'throughput': len(latencies) / seconds if seconds else 0.0,
+        'upstream_requests': upstream,
+        'latency': {
+            'mean': sum(latencies) / len(latencies) if latencies else None,
+            'p50': percentile(0.5),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': latencies[-1] if latencies else None,
+        },
+    }
+
+
+def _runThreads(operation, options, reset):
+    latencies, errors = [], 0
+    # Warm up connections and caches outside of the measurement
+    for _ in range(options.warmup):
+        operation()
+    reset()
+
+    def timed():
+        started = time.perf_counter()
+        operation()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(options.concurrency) as executor:
+        for future in [executor.submit(timed) for _ in range(options.requests)]:
+            try:
+                latencies.append(future.result())
+            except Exception:
+                errors += 1
+    return latencies, errors, time.perf_counter() - started
+
+
+async def _runTasks(operation, options, reset, close):
+    semaphore = asyncio.Semaphore(options.concurrency)
+    for _ in range(options.warmup):
+        await operation()
+    reset()
+
+    async def timed():
+        async with semaphore:
+            started = time.perf_counter()
+            await operation()
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(timed() for _ in range(options.requests)), return_exceptions=True)
+    seconds = time.perf_counter() - started
+    await close()
+    latencies = [result for result in results if not isinstance(result, BaseException)]
+    return latencies, len(results) - len(latencies), seconds
+
+
+def run(options):
+    """
+    Run the selected scenarios against a stub server serving the fixtures.
+
+    Returns:
+        dict: The machine-readable results.
+    """
+    routes = fixtures.load(options.fixtures)
+    server = StubGolemioServer(routes, latency=options.latency).start()
+    results = {}
+    try:
+        for name in options.scenarios or SCENARIOS:
+            setup, requires = SCENARIOS[name]
+            if requires is not None and not requires():
+                print(f'{name}: skipped, optional dependencies are missing', file=sys.stderr)
+                continue
+            operation, is_async, close = setup(server, options)
+            reset = server.requests.clear
+            if is_async:
+                measured = asyncio.run(_runTasks(operation, options, reset, close))
+            else:
+                measured = _runThreads(operation, options, reset)
+                close()
+            results[name] = _summary(*measured, upstream=len(server.requests))
+            print(f'{name}: {results[name]["throughput"]:.1f} ops/s, {results[name]["errors"]} errors',
+                  file=sys.stderr)
+    finally:
+        server.stop()
+    return {'meta': _meta(options), 'results': results}
+
+
+def _meta(options):
+    try:
+        revision = subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=BENCHMARKS, capture_output=True,
+                                  text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    return {
+        'revision': revision,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'requests': options.requests,
+        'concurrency': options.concurrency,
+        'latency': options.latency,
+        'seed': options.seed,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline run.
+
+    Returns:
+        list: (scenario, baseline throughput, throughput, relative change) of the regressed scenarios.
+    """
+    regressions = []
+    for name, result in results['results'].items():
+        previous = baseline['results'].get(name)
+        if not previous or not previous['throughput']:
+            continue
+        change = result['throughput'] / previous['throughput'] - 1
+        print(f'{name}: {previous["throughput"]:.1f} -> {result["throughput"]:.1f} ops/s ({change:+.1%})',
+              file=sys.stderr)
+        if change < -threshold:
+            regressions.append((name, previous['throughput'], result['throughput'], change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark GolemioClient against a local stub server.')
+    parser.add_argument('scenarios', nargs='*', metavar='scenario', help='scenarios to run (default: all): ' + ', '.join(SCENARIOS))
+    parser.add_argument('--fixtures', default=os.path.join(BENCHMARKS, 'fixtures'),
+                        help='fixture directory, generated if missing')
+    parser.add_argument('--requests', type=int, default=200, help='measured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent threads or tasks')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds of latency injected by the server')
+    parser.add_argument('--warmup', type=int, default=2, help='unmeasured requests per scenario')
+    parser.add_argument('--seed', type=int, default=1, help='random seed for fixtures and stop choice')
+    parser.add_argument('--output', help='write the JSON results to this file instead of stdout')
+    parser.add_argument('--compare', help='baseline JSON results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative throughput drop reported as a regression')
+    options = parser.parse_args(argv)
+    unknown = set(options.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error('unknown scenario: ' + ', '.join(sorted(unknown)))
+    if not os.path.exists(os.path.join(options.fixtures, 'stops.json')):
+        print(f'Generating fixtures in {options.fixtures}', file=sys.stderr)
+        fixtures.generate(options.fixtures, seed=options.seed)
+    results = run(options)
+    if options.output:
+        with open(options.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    if options.compare:
+        with open(options.compare) as f:
+            regressions = compare(results, json.load(f), options.threshold)
+        if regressions:
+            print(f'{len(regressions)} scenario(s) regressed by more than {options.threshold:.0%}', file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
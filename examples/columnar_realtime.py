@@ -0,0 +1,16 @@
+from golemio.client import GolemioClient
+# pip install numpy gtfs-realtime-bindings
+from golemio.columnar import decodeVehiclePositions
+
+# Create a GolemioClient instance
+client = GolemioClient(api_key='YOUR_API_KEY', debug=True)
+
+# Decode the vehicle positions feed into NumPy columns
+vehicles = decodeVehiclePositions(client.getVehiclePositionsProtobuf())
+
+# Filter without Python loops
+tram_22 = vehicles.byRoute('L22')
+centre = vehicles.inBoundingBox(50.07, 14.40, 50.10, 14.44)
+print(f'{len(tram_22)} vehicles on route 22, {len(centre)} in the city centre')
+for trip_id, lat, lon in zip(tram_22.strings('trip_id'), tram_22.lat, tram_22.lon):
+    print(f'Trip ID {trip_id} at {lat:.5f}, {lon:.5f}')
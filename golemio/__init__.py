@@ -1 +1,56 @@
-from .client import *
+import importlib
+
+# The public names of the package and the submodule defining each of them. Submodules are only
+# imported when one of their names is first used, so `import golemio` does not load requests,
+# aiohttp, NumPy or protobuf; `from golemio.client import GolemioClient` imports just what it needs.
+_ATTRIBUTES = {}
+for _module, _names in (
+    ('errors', ('GolemioClientError', 'UnauthorizedError', 'NotFoundError', 'RateLimitedError', 'ServerError')),
+    ('transport', ('ACCEPT_ENCODING', 'HTTPX_AVAILABLE', 'RequestsTransport', 'HttpxTransport')),
+    ('client', ('BulkResult', 'GolemioClient')),
+    ('async_client', ('AsyncGolemioClient',)),
+    ('cache', ('CacheEntry', 'MemoryCache', 'DiskCache', 'ResponseCache')),
+    ('ratelimit', ('parseRetryAfter', 'TokenBucket', 'RetryPolicy')),
+    ('store', ('GTFSStore',)),
+    ('coalesce', ('SingleFlight', 'DepartureBoardBatcher')),
+    ('columnar', ('Interner', 'Columns', 'VehiclePositionColumns', 'TripUpdateColumns', 'decodeVehiclePositions',
+                  'decodeTripUpdates')),
+    ('tracker', ('VehiclePositionTracker',)),
+    ('spatial', ('EARTH_RADIUS', 'PROJECTION_MARGIN', 'haversine', 'StopIndex')),
+    ('shapes', ('ShapeStore',)),
+    ('metrics', ('ENDPOINT_TEMPLATES', 'DEFAULT_BUCKETS', 'endpointFor', 'Histogram', 'EndpointMetrics',
+                 'NULL_OBSERVATION', 'RequestObservation', 'Metrics')),
+    ('streaming', ('JsonRecordDecoder', 'iterJsonRecords')),
+    ('records', ('loadJson', 'dumpJson', 'Stop', 'StopTime', 'Trip', 'VehiclePosition', 'toRecords')),
+    ('hub', ('FEEDS', 'FeedUpdate', 'Subscription', 'RealtimeHub')),
+    ('timetable', ('TIMEZONE', 'Departure', 'parseTime', 'formatTime', 'TimetableIndex')),
+    ('departures', ('PredictedDeparture', 'serviceDayStart', 'PredictionColumns', 'RealtimeDepartures')),
+    ('scheduler', ('ENDPOINTS', 'headerTimestamp', 'ChangeScheduler')),
+    ('archive', ('SnapshotArchive', 'ReplayClient')),
+    ('pool', ('GolemioClientPool',)),
+    ('vehicles', ('INDEXES', 'vehicleKey', 'VehicleSnapshot', 'LiveVehicles')),
+):
+    _ATTRIBUTES.update(dict.fromkeys(_names, _module))
+_MODULES = frozenset(_ATTRIBUTES.values())
+del _module, _names
+
+__all__ = list(_ATTRIBUTES)
+
+
+def __getattr__(name):
+    """
+    Import the submodule defining a public name on first use.
+    """
+    if name in _MODULES:
+        return importlib.import_module('.' + name, __name__)
+    module = _ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    # Later lookups find the name directly and skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_ATTRIBUTES) | _MODULES)
@@ -0,0 +1,499 @@
+import bisect
+import json
+import lzma
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+from .errors import *
+
+try:
+    # pip install zstandard
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Index entry: timestamp, offset in the segment, segment number, compressed size, size, CRC-32 of the compressed data
+_ENTRY = struct.Struct('<qQIIII')
+
+_FEED_NAME = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def _codec(name, level):
+    if name == 'zlib':
+        return (lambda data: zlib.compress(data, 6 if level is None else level)), zlib.decompress
+    if name == 'lzma':
+        return (lambda data: lzma.compress(data, preset=6 if level is None else level)), lzma.decompress
+    if name == 'zstd':
+        if zstandard is None:
+            raise ImportError('The zstd codec requires zstandard (pip install zstandard).')
+        compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        decompressor = zstandard.ZstdDecompressor()
+        return compressor.compress, decompressor.decompress
+    raise ValueError(f'Unknown codec {name!r}, expected zlib, lzma or zstd.')
+
+
+class _Timestamps(object):
+    """
+    Sequence view of the timestamps of a memory-mapped index, for bisect.
+    """
+
+    def __init__(self, index, count):
+        self.index = index
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return _ENTRY.unpack_from(self.index, i * _ENTRY.size)[0]
+
+
+class _Feed(object):
+    """
+    The segments and the index of one archived feed, opened for writing or read-only.
+
+    Only a writable feed repairs the files: a read-only one never creates, truncates or writes
+    anything, ignores a partially written tail and picks up the snapshots appended by the writer.
+    """
+
+    def __init__(self, directory, segment_size, writable=True):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.writable = writable
+        if writable:
+            os.makedirs(directory, exist_ok=True)
+        self.index_path = os.path.join(directory, 'index.bin')
+        self._index_file = open(self.index_path, 'a+b' if writable else 'rb')
+        self._map = None
+        self._mapped = 0
+        self._size = 0
+        self._readers = {}
+        self.count = self._recover()
+        last = self.entry(self.count - 1) if self.count else None
+        self.segment = last[2] if last else 0
+        self.position = last[1] + last[3] if last else 0
+        self.last_timestamp = last[0] if last else None
+        self._writer = None
+        if writable:
+            self._writer = open(self._segmentPath(self.segment), 'a+b')
+            # Drop data written after the last indexed snapshot, e.g. by an interrupted append
+            self._writer.truncate(self.position)
+            self._writer.seek(self.position)
+
+    def _segmentPath(self, segment):
+        return os.path.join(self.directory, f'{segment:06d}.seg')
+
+    def _recover(self):
+        size = self._size = os.fstat(self._index_file.fileno()).st_size
+        count = size // _ENTRY.size
+        self._remap(count)
+        # Keep only the entries whose data was completely written
+        while count:
+            _, offset, segment, compressed, _, _ = self.entry(count - 1)
+            path = self._segmentPath(segment)
+            if os.path.exists(path) and os.path.getsize(path) >= offset + compressed:
+                break
+            count -= 1
+        if self.writable and count * _ENTRY.size != size:
+            self._closeMap()
+            self._index_file.truncate(count * _ENTRY.size)
+            self._size = count * _ENTRY.size
+            self._remap(count)
+        return count
+
+    def refresh(self):
+        # A reader picks up the snapshots the writer appended since it last looked
+        if not self.writable and os.fstat(self._index_file.fileno()).st_size != self._size:
+            self.count = self._recover()
+
+    def _closeMap(self):
+        if self._map is not None:
+            self._map.close()
+        self._map, self._mapped = None, 0
+
+    def _remap(self, count):
+        self._closeMap()
+        if count:
+            self._map = mmap.mmap(self._index_file.fileno(), count * _ENTRY.size, access=mmap.ACCESS_READ)
+            self._mapped = count
+
+    def entry(self, i):
+        if i >= self._mapped:
+            self._remap(self.count)
+        return _ENTRY.unpack_from(self._map, i * _ENTRY.size)
+
+    def timestamps(self):
+        if self.count > self._mapped:
+            self._remap(self.count)
+        return _Timestamps(self._map, self._mapped)
+
+    def append(self, timestamp, compressed, size):
+        if self.position and self.position + len(compressed) > self.segment_size:
+            self._writer.close()
+            self.segment += 1
+            self.position = 0
+            # A segment left over by an interrupted rollover holds no indexed data
+            self._writer = open(self._segmentPath(self.segment), 'w+b')
+        self._writer.write(compressed)
+        self._writer.flush()
+        # The index entry is written after its data, so a crash never leaves an entry without data
+        self._index_file.write(_ENTRY.pack(timestamp, self.position, self.segment, len(compressed), size,
+                                           zlib.crc32(compressed)))
+        self._index_file.flush()
+        self.position += len(compressed)
+        self.last_timestamp = timestamp
+        self.count += 1
+
+    def read(self, entry):
+        _, offset, segment, compressed, _, crc = entry
+        reader = self._readers.get(segment)
+        if reader is None:
+            reader = self._readers[segment] = open(self._segmentPath(segment), 'rb')
+        reader.seek(offset)
+        data = reader.read(compressed)
+        if len(data) != compressed or zlib.crc32(data) != crc:
+            raise ValueError(f'Corrupted snapshot in {self._segmentPath(segment)} at offset {offset}.')
+        return data
+
+    def close(self):
+        self._closeMap()
+        if self._writer is not None:
+            self._writer.close()
+        self._index_file.close()
+        for reader in self._readers.values():
+            reader.close()
+        self._readers = {}
+
+
+class SnapshotArchive(object):
+    """
+    Append-only archive of raw feed snapshots, e.g. of getVehiclePositionsProtobuf.
+
+    Every feed is stored in its own directory as numbered segment files of individually compressed
+    snapshots, plus a fixed-size index of (timestamp, segment, offset) entries that is memory-mapped
+    for reading. Looking up a timestamp is a binary search over the index and reading a snapshot
+    decompresses only that snapshot, so random access and range scans never touch the rest of the
+    archive. Timestamps of a feed must not decrease.
+
+    The archive is meant for one writing process. Feeds are only opened for writing by append(),
+    which also discards an interrupted append; reads never modify the files, so other processes
+    can read a live archive with readonly=True.
+    """
+
+    def __init__(self, directory, codec='zlib', level=None, segment_size=64 * 1024 * 1024, readonly=False):
+        """
+        Initialize a new instance of SnapshotArchive, creating the directory or opening an existing archive.
+
+        Args:
+            directory (str): The directory of the archive.
+            codec (str): The compression of new archives, 'zlib', 'lzma' or 'zstd' (optional, default is 'zlib').
+            level (int): The compression level (optional, default is the codec's default).
+            segment_size (int): The size in bytes after which a new segment file is started
+                (optional, default is 64 MiB).
+            readonly (bool): Flag indicating whether to open an existing archive for reading only
+                (optional, default is False).
+
+        Raises:
+            ValueError: If the codec is unknown.
+            ImportError: If the codec is 'zstd' and zstandard is not installed.
+            FileNotFoundError: If readonly is set and the directory holds no archive.
+        """
+        self.directory = directory
+        self.segment_size = segment_size
+        self.readonly = readonly
+        meta_path = os.path.join(directory, 'archive.json')
+        exists = os.path.exists(meta_path)
+        if readonly and not exists:
+            raise FileNotFoundError(f'No snapshot archive in {directory!r}.')
+        if not readonly:
+            os.makedirs(directory, exist_ok=True)
+        if exists:
+            # An existing archive keeps its codec
+            with open(meta_path) as f:
+                codec = json.load(f)['codec']
+        self.codec = codec
+        self._compress, self._decompress = _codec(codec, level)
+        if not exists:
+            with open(meta_path, 'w') as f:
+                json.dump({'codec': codec, 'version': 1}, f)
+        self._feeds = {}
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """
+        Close all segment and index files.
+        """
+        with self._lock:
+            for feed in self._feeds.values():
+                feed.close()
+            self._feeds = {}
+
+    def _feed(self, name, write=False):
+        """
+        Get an open feed; for reading, None if the feed was never written.
+        """
+        feed = self._feeds.get(name)
+        if feed is not None and (feed.writable or not write):
+            feed.refresh()
+            return feed
+        if not _FEED_NAME.match(name):
+            raise ValueError(f'Invalid feed name {name!r}.')
+        directory = os.path.join(self.directory, name)
+        if write:
+            if self.readonly:
+                raise ValueError(f'Cannot append to {name!r}, the archive is open read-only.')
+            if feed is not None:
+                feed.close()
+            feed = self._feeds[name] = _Feed(directory, self.segment_size)
+        elif os.path.exists(os.path.join(directory, 'index.bin')):
+            feed = self._feeds[name] = _Feed(directory, self.segment_size, writable=False)
+        return feed
+
+    def feeds(self):
+        """
+        Get the names of the archived feeds.
+
+        Returns:
+            list: The feed names.
+        """
+        return sorted(name for name in os.listdir(self.directory)
+                      if os.path.exists(os.path.join(self.directory, name, 'index.bin')))
+
+    def count(self, feed):
+        """
+        Get the number of snapshots of a feed.
+
+        Args:
+            feed (str): The feed name.
+
+        Returns:
+            int: The number of snapshots, 0 for an unknown feed.
+        """
+        with self._lock:
+            archived = self._feed(feed)
+            return archived.count if archived is not None else 0
+
+    def append(self, feed, data, timestamp=None):
+        """
+        Append a snapshot.
+
+        Args:
+            feed (str): The feed name, e.g. 'vehicle_positions'.
+            data (bytes): The raw snapshot.
+            timestamp (int): The POSIX time of the snapshot, e.g. the feed header timestamp
+                (optional, default is the current time).
+
+        Returns:
+            int: The timestamp of the snapshot.
+
+        Raises:
+            ValueError: If the timestamp is older than the last snapshot of the feed, or the archive is read-only.
+        """
+        timestamp = int(time.time()) if timestamp is None else int(timestamp)
+        compressed = self._compress(data)
+        with self._lock:
+            archived = self._feed(feed, write=True)
+            if archived.last_timestamp is not None and timestamp < archived.last_timestamp:
+                raise ValueError(f'Timestamp {timestamp} is older than the last snapshot of {feed!r} '
+                                 f'({archived.last_timestamp}).')
+            archived.append(timestamp, compressed, len(data))
+        return timestamp
+
+    def get(self, feed, timestamp):
+        """
+        Get the snapshot that was current at a time: the last one at or before the timestamp.
+
+        Args:
+            feed (str): The feed name.
+            timestamp (int): The POSIX time.
+
+        Returns:
+            tuple: (timestamp, bytes) of the snapshot, or None if there is none that old or the feed is unknown.
+        """
+        with self._lock:
+            archived = self._feed(feed)
+            if archived is None:
+                return None
+            i = bisect.bisect_right(archived.timestamps(), timestamp) - 1
+            if i < 0:
+                return None
+            entry = archived.entry(i)
+            data = archived.read(entry)
+        return entry[0], self._decompress(data)
+
+    def range(self, feed, start=None, end=None):
+        """
+        Iterate over the snapshots of a time range.
+
+        Args:
+            feed (str): The feed name.
+            start (int): The first POSIX time, inclusive (optional, default is the first snapshot).
+            end (int): The last POSIX time, exclusive (optional, default is after the last snapshot).
+
+        Yields:
+            tuple: (timestamp, bytes) of every snapshot, oldest first; none for an unknown feed.
+        """
+        with self._lock:
+            archived = self._feed(feed)
+            if archived is None:
+                return
+            i = 0 if start is None else bisect.bisect_left(archived.timestamps(), start)
+            stop = archived.count if end is None else bisect.bisect_left(archived.timestamps(), end)
+        while i < stop:
+            with self._lock:
+                entry = archived.entry(i)
+                data = archived.read(entry)
+            yield entry[0], self._decompress(data)
+            i += 1
+
+    def replay(self, feed, start=None, end=None, speed=1.0, sleep=time.sleep):
+        """
+        Iterate over the snapshots of a time range, paced like they were recorded.
+
+        Args:
+            feed (str): The feed name.
+            start (int): The first POSIX time, inclusive (optional, default is the first snapshot).
+            end (int): The last POSIX time, exclusive (optional, default is after the last snapshot).
+            speed (float): The playback speed, e.g. 60 replays an hour in a minute; None does not
+                wait at all (optional, default is 1.0).
+            sleep (callable): The function used to wait (optional, default is time.sleep).
+
+        Yields:
+            tuple: (timestamp, bytes) of every snapshot, oldest first.
+        """
+        origin = None
+        for timestamp, data in self.range(feed, start, end):
+            if speed:
+                now = time.monotonic()
+                if origin is None:
+                    origin = (timestamp, now)
+                delay = (timestamp - origin[0]) / speed - (now - origin[1])
+                if delay > 0:
+                    sleep(delay)
+            yield timestamp, data
+
+    def stats(self, feed):
+        """
+        Get the storage statistics of a feed.
+
+        Args:
+            feed (str): The feed name.
+
+        Returns:
+            dict: snapshots, first and last timestamp, segments, bytes before and after compression.
+        """
+        with self._lock:
+            archived = self._feed(feed)
+            count = archived.count if archived is not None else 0
+            size = compressed = 0
+            for i in range(count):
+                entry = archived.entry(i)
+                compressed += entry[3]
+                size += entry[4]
+            last = archived.entry(count - 1) if count else None
+            return {
+                'snapshots': count,
+                'first': archived.entry(0)[0] if count else None,
+                'last': last[0] if last else None,
+                'segments': last[2] + 1 if last else 0,
+                'bytes': size,
+                'compressed_bytes': compressed,
+            }
+
+
+class ReplayClient(object):
+    """
+    Serves archived feed snapshots through the protobuf methods of GolemioClient, so consumers of
+    the live feeds (RealtimeHub, RealtimeDepartures, ChangeScheduler, ...) can run on recorded data.
+
+    A replay clock starts at `start` when the client is created and runs at `speed`; every call
+    returns the snapshot that was current at the replay time.
+    """
+
+    def __init__(self, archive, start, speed=1.0):
+        """
+        Initialize a new instance of ReplayClient.
+
+        Args:
+            archive (SnapshotArchive): The archive holding the snapshots, under the feed names
+                'vehicle_positions', 'trip_updates', 'alerts' and 'pid_feed'.
+            start (int): The POSIX time the replay starts at.
+            speed (float): The playback speed (optional, default is 1.0).
+        """
+        self.archive = archive
+        self.start = start
+        self.speed = speed
+        self._started = time.monotonic()
+
+    def now(self):
+        """
+        Get the replay time.
+
+        Returns:
+            float: The POSIX time being replayed.
+        """
+        return self.start + (time.monotonic() - self._started) * self.speed
+
+    def _snapshot(self, feed):
+        snapshot = self.archive.get(feed, self.now())
+        if snapshot is None:
+            raise NotFoundError(f'No archived snapshot of {feed} at {self.now():.0f}.')
+        return snapshot[1]
+
+    def getVehiclePositionsProtobuf(self):
+        """
+        Retrieve the archived vehicle positions protobuf file current at the replay time.
+
+        Returns:
+            bytes: The vehicle positions protobuf file.
+
+        Raises:
+            NotFoundError: If the archive holds no snapshot that old.
+        """
+        return self._snapshot('vehicle_positions')
+
+    def getTripUpdatesProtobuf(self):
+        """
+        Retrieve the archived trip updates protobuf file current at the replay time.
+
+        Returns:
+            bytes: The trip updates protobuf file.
+
+        Raises:
+            NotFoundError: If the archive holds no snapshot that old.
+        """
+        return self._snapshot('trip_updates')
+
+    def getAlertsProtobuf(self):
+        """
+        Retrieve the archived alerts protobuf file current at the replay time.
+
+        Returns:
+            bytes: The alerts protobuf file.
+
+        Raises:
+            NotFoundError: If the archive holds no snapshot that old.
+        """
+        return self._snapshot('alerts')
+
+    def getPidFeedProtobuf(self):
+        """
+        Retrieve the archived PID feed protobuf file current at the replay time.
+
+        Returns:
+            bytes: The PID feed protobuf file.
+
+        Raises:
+            NotFoundError: If the archive holds no snapshot that old.
+        """
+        return self._snapshot('pid_feed')
@@ -0,0 +1,353 @@
+import asyncio
+import time
+from .client import BulkResult, GolemioClient
+from .errors import *
+from .metrics import NULL_OBSERVATION
+from .ratelimit import parseRetryAfter
+from .streaming import JsonRecordDecoder
+
+try:
+    # pip install aiohttp
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncGolemioClient(GolemioClient):
+    """
+    Asyncio wrapper for the Golemio API.
+
+    Exposes the same methods as GolemioClient, but every method returns an awaitable. All requests
+    share one pooled aiohttp session with keep-alive connections, so many calls can be fanned out
+    on a single event loop, e.g. with asyncio.gather.
+    """
+
+    def __init__(self, api_key='', api_version='v2', ssl=True, debug=False, cache=None, rate_limiter=None,
+                 retry=None, metrics=None, typed=False, max_connections=100, max_connections_per_host=0,
+                 max_concurrency=None, keepalive_timeout=30, timeout=30):
+        """
+        Initialize a new instance of AsyncGolemioClient.
+
+        Args:
+            api_key (str): The API key (optional, default is an empty string).
+            api_version (str): The API version to use (optional, default is 'v2').
+            ssl (bool): Flag indicating whether to use SSL (optional, default is True).
+            debug (bool): Flag indicating whether to use the debug mode (optional, default is False).
+            cache (ResponseCache): The response cache to use, None disables caching (optional, default is None).
+            rate_limiter (TokenBucket): The rate limiter, may be shared with other clients (optional, default is None).
+            retry (RetryPolicy): The retry policy for 429, 5xx and connection errors, None disables retries
+                (optional, default is None).
+            metrics (Metrics): The per-endpoint instrumentation, may be shared with other clients
+                (optional, default is None).
+            typed (bool): Flag indicating whether stops, stop times, trips and vehicle positions are returned as
+                compact Stop, StopTime, Trip and VehiclePosition records instead of dicts; GTFSStore, StopIndex and
+                VehiclePositionTracker need an untyped client (optional, default is False).
+            max_connections (int): The size of the connection pool (optional, default is 100).
+            max_connections_per_host (int): The maximum number of connections to one host, 0 means no
+                limit (optional, default is 0).
+            max_concurrency (int): The maximum number of requests in flight at once, None means
+                max_connections (optional, default is None).
+            keepalive_timeout (float): Seconds an idle connection is kept open for reuse (optional, default is 30).
+            timeout (float): Total timeout of a single request in seconds (optional, default is 30).
+
+        Raises:
+            ImportError: If aiohttp is not installed.
+        """
+        if aiohttp is None:
+            raise ImportError('AsyncGolemioClient requires aiohttp (pip install aiohttp).')
+        self.session = None
+        self.headers = {}
+        self.api_key = api_key
+        self.api_version = api_version
+        self.base_url = 'rabin.golemio.cz' if debug else 'api.golemio.cz'
+        self.protocol = 'https' if ssl else 'http'
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry = retry
+        self.metrics = metrics
+        self.typed = typed
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.max_concurrency = max_concurrency or max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self._semaphore = None
+        self.updateApiKey(api_key)
+
+    def __del__(self):
+        """
+        The aiohttp session can only be closed from a coroutine, use close() or `async with` instead.
+        """
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """
+        Close the pooled session and all of its keep-alive connections.
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+            self._semaphore = None
+
+    def _getSession(self):
+        """
+        Return the pooled session, creating it on first use inside the running event loop.
+
+        Returns:
+            aiohttp.ClientSession: The shared session.
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections,
+                                             limit_per_host=self.max_connections_per_host,
+                                             keepalive_timeout=self.keepalive_timeout)
+            self.session = aiohttp.ClientSession(connector=connector, headers=self.headers,
+                                                 timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.session
+
+    async def _callApi(self, path, proto=False, params={}, record=None):
+        """
+        Make the API request and handle common error responses.
+
+        Args:
+            path (str): The API path.
+            proto (bool): Flag indicating whether to retrieve the response as a binary protobuf (optional, default is False).
+            params (dict): Query parameters (optional, default is an empty dictionary).
+            record (type): The record class the response is converted to when the client is typed (optional,
+                default is None).
+
+        Returns:
+            dict or bytes: The response data, either as JSON or binary protobuf.
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing (HTTP status code 401).
+            NotFoundError: If the requested resource was not found (HTTP status code 404).
+            RateLimitedError: If the request was throttled (HTTP status code 429) and not retried.
+            ServerError: If the server failed (HTTP status code 5xx) and the request was not retried.
+        """
+        url = self._getUrl(path, params)
+        observation = self.metrics.observe(path, url) if self.metrics is not None else NULL_OBSERVATION
+        try:
+            ttl = self.cache.ttlFor(path) if self.cache is not None else 0
+            entry, headers = None, {}
+            if ttl:
+                entry, fresh = self.cache.lookup(url)
+                if fresh:
+                    observation.cached('hit')
+                    return self._decode(entry.body, proto, observation, record)
+                observation.cached('miss')
+                if entry is not None:
+                    headers = entry.validators()
+            status, response_headers, body = await self._send(url, headers)
+            observation.responded(status, len(body))
+            if status == 304 and entry is not None:
+                observation.cached('revalidated')
+                self.cache.revalidated(entry, ttl)
+                return self._decode(entry.body, proto, observation, record)
+            self._raiseForStatus(status, response_headers)
+            if ttl and status == 200:
+                self.cache.store(url, body, response_headers, ttl)
+            return self._decode(body, proto, observation, record)
+        except Exception as e:
+            observation.failed(e)
+            raise
+        finally:
+            observation.finish()
+
+    async def _streamApi(self, path, params={}, key='features', chunk_size=65536, record=None):
+        """
+        Make the API request and decode the records of the response while it is being downloaded.
+
+        The response cache is bypassed; the rate limiter, retry policy and metrics apply as in _callApi.
+
+        Args:
+            path (str): The API path.
+            params (dict): Query parameters (optional, default is an empty dictionary).
+            key (str): The member of a top-level object holding the records (optional, default is 'features').
+            chunk_size (int): The number of bytes read at a time (optional, default is 65536).
+            record (type): The record class the records are converted to when the client is typed (optional,
+                default is None).
+
+        Yields:
+            dict: The records; the elements of a top-level array or of its `key` member.
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing (HTTP status code 401).
+            NotFoundError: If the requested resource was not found (HTTP status code 404).
+            RateLimitedError: If the request was throttled (HTTP status code 429) and not retried.
+            ServerError: If the server failed (HTTP status code 5xx) and the request was not retried.
+        """
+        url = self._getUrl(path, params)
+        observation = self.metrics.observe(path, url) if self.metrics is not None else NULL_OBSERVATION
+        response = None
+        try:
+            status, response_headers, response = await self._send(url, stream=True)
+            observation.responded(status, 0)
+            self._raiseForStatus(status, response_headers)
+            decoder = JsonRecordDecoder(key)
+            convert = record.fromJsonList if record is not None and self.typed else None
+            size, decode_time = 0, 0.0
+            async for chunk in response.content.iter_chunked(chunk_size):
+                size += len(chunk)
+                started = time.perf_counter()
+                records = decoder.feed(chunk)
+                if convert is not None:
+                    records = convert(records)
+                decode_time += time.perf_counter() - started
+                for record in records:
+                    yield record
+            observation.received(size)
+            started = time.perf_counter()
+            records = decoder.close()
+            if convert is not None:
+                records = convert(records)
+            observation.decoded(decode_time + time.perf_counter() - started)
+            for record in records:
+                yield record
+        except Exception as e:
+            observation.failed(e)
+            raise
+        finally:
+            if response is not None:
+                response.release()
+            observation.finish()
+
+    async def _send(self, url, headers={}, stream=False):
+        """
+        Send a GET request through the rate limiter, retrying according to the retry policy.
+
+        Args:
+            url (str): The request URL.
+            headers (dict): Extra request headers (optional, default is an empty dictionary).
+            stream (bool): Flag indicating whether to return the unread response instead of its body; the caller
+                has to release it (optional, default is False).
+
+        Returns:
+            tuple: The status code, headers and body (or unread aiohttp.ClientResponse) of the last response received.
+        """
+        session = self._getSession()
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquireAsync()
+            try:
+                async with self._semaphore:
+                    response = await session.get(url, headers=headers)
+                    status, response_headers = response.status, response.headers
+                    if not stream:
+                        try:
+                            body = await response.read()
+                        finally:
+                            response.release()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if self.retry is None or not self.retry.canRetry(attempt):
+                    raise
+                await asyncio.sleep(self.retry.delay(attempt))
+                attempt += 1
+                continue
+            retry_after = parseRetryAfter(response_headers.get('Retry-After'))
+            if status == 429 and retry_after and self.rate_limiter is not None:
+                self.rate_limiter.pause(retry_after)
+            if self.retry is None or not self.retry.shouldRetry(status, attempt):
+                return status, response_headers, response if stream else body
+            response.release()
+            await asyncio.sleep(self.retry.delay(attempt, retry_after))
+            attempt += 1
+
+    async def _iterPages(self, getter, page_size, offset=0, **kwargs):
+        """
+        Iterate over the records of a paginated endpoint, fetching page N+1 in a background task
+        while page N is being consumed.
+
+        Args:
+            getter (callable): The get* method of the endpoint, called with limit, offset and kwargs.
+            page_size (int): The number of records requested per page.
+            offset (int): The offset of the first record (optional, default is 0).
+            **kwargs: Filters passed through to the getter.
+
+        Yields:
+            dict: The records of all pages; for GeoJSON responses the elements of 'features'.
+        """
+        task = asyncio.ensure_future(getter(limit=page_size, offset=offset, **kwargs))
+        try:
+            while task is not None:
+                page = await task
+                records = page.get('features', []) if isinstance(page, dict) else page
+                offset += len(records)
+                task = None
+                if len(records) >= page_size:
+                    task = asyncio.ensure_future(getter(limit=page_size, offset=offset, **kwargs))
+                for record in records:
+                    yield record
+        finally:
+            if task is not None:
+                task.cancel()
+
+    async def _iterMany(self, getter, ids, max_workers=None):
+        """
+        Fetch records by ID concurrently, yielding them as they complete.
+
+        Args:
+            getter (callable): The get* method fetching one record by ID.
+            ids (iterable): The IDs; duplicates are fetched once.
+            max_workers (int): The number of concurrent requests (optional, default is max_concurrency).
+
+        Yields:
+            tuple: (id, record, error) where error is the exception raised for that ID, or None.
+        """
+        semaphore = asyncio.Semaphore(max_workers) if max_workers else None
+
+        async def fetch(record_id):
+            try:
+                if semaphore is None:
+                    return record_id, await getter(record_id), None
+                async with semaphore:
+                    return record_id, await getter(record_id), None
+            except (GolemioClientError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                return record_id, None, e
+        tasks = [asyncio.ensure_future(fetch(record_id)) for record_id in dict.fromkeys(ids)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _getMany(self, getter, ids, max_workers=None):
+        """
+        Fetch records by ID concurrently and collect them.
+
+        Returns:
+            BulkResult: The records by ID, in the order of the IDs, and the errors of the failed IDs.
+        """
+        ids = list(dict.fromkeys(ids))
+        records = {}
+        result = BulkResult()
+        async for record_id, record, error in self._iterMany(getter, ids, max_workers):
+            if error is None:
+                records[record_id] = record
+            else:
+                result.errors[record_id] = error
+        result.update((record_id, records[record_id]) for record_id in ids if record_id in records)
+        return result
+
+    def updateApiKey(self, api_key):
+        """
+        Update the API key used for requests.
+
+        Args:
+            api_key (str): The new API key.
+        """
+        if api_key is None:
+            self.headers.pop('X-Access-Token', None)
+        else:
+            self.headers['X-Access-Token'] = api_key
+        if self.session is not None:
+            self.session.headers.pop('X-Access-Token', None)
+            self.session.headers.update(self.headers)
@@ -0,0 +1,380 @@
+import fnmatch
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheEntry(object):
+    """
+    A cached response body together with its expiry time and HTTP validators.
+    """
+
+    def __init__(self, key, body, expires, etag=None, last_modified=None):
+        """
+        Initialize a new instance of CacheEntry.
+
+        Args:
+            key (str): The cache key (the request URL).
+            body (bytes): The raw response body.
+            expires (float): The time.time() after which the entry is stale.
+            etag (str): The ETag response header (optional, default is None).
+            last_modified (str): The Last-Modified response header (optional, default is None).
+        """
+        self.key = key
+        self.body = body
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def size(self):
+        return len(self.body)
+
+    def isFresh(self):
+        """
+        Check whether the entry can be served without contacting the server.
+
+        Returns:
+            bool: True if the entry has not expired yet.
+        """
+        return time.time() < self.expires
+
+    def validators(self):
+        """
+        Build the conditional request headers for revalidating a stale entry.
+
+        Returns:
+            dict: If-None-Match and/or If-Modified-Since headers, empty if the server sent no validators.
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class MemoryCache(object):
+    """
+    In-memory LRU cache backend bounded by the total size of the cached bodies.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        Initialize a new instance of MemoryCache.
+
+        Args:
+            max_bytes (int): The maximum total size of cached bodies in bytes (optional, default is 64 MiB).
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Retrieve an entry and mark it as most recently used.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            CacheEntry: The entry, or None if it is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        """
+        Store an entry, evicting the least recently used entries if the cache grows over max_bytes.
+
+        Args:
+            key (str): The cache key.
+            entry (CacheEntry): The entry to store.
+        """
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old.size
+            self._entries[key] = entry
+            self.size += entry.size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+                self.evictions += 1
+
+    def delete(self, key):
+        """
+        Remove an entry if it is cached.
+
+        Args:
+            key (str): The cache key.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.size -= entry.size
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class DiskCache(object):
+    """
+    On-disk LRU cache backend storing one pickled CacheEntry per file.
+
+    The LRU order and size accounting are kept in memory and rebuilt from file modification
+    times when the cache is reopened.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024):
+        """
+        Initialize a new instance of DiskCache.
+
+        Args:
+            directory (str): The directory holding the cache files, created if missing.
+            max_bytes (int): The maximum total size of the cache files in bytes (optional, default is 512 MiB).
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evictions = 0
+        self._sizes = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        files = [f for f in os.listdir(directory) if f.endswith('.cache')]
+        files.sort(key=lambda f: os.path.getmtime(os.path.join(directory, f)))
+        for name in files:
+            size = os.path.getsize(os.path.join(directory, name))
+            self._sizes[name[:-len('.cache')]] = size
+            self.size += size
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest + '.cache')
+
+    def _digest(self, key):
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Retrieve an entry and mark it as most recently used.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            CacheEntry: The entry, or None if it is not cached.
+        """
+        digest = self._digest(key)
+        with self._lock:
+            if digest not in self._sizes:
+                return None
+            self._sizes.move_to_end(digest)
+            try:
+                with open(self._path(digest), 'rb') as f:
+                    entry = pickle.load(f)
+                os.utime(self._path(digest))
+            except (OSError, pickle.UnpicklingError, EOFError):
+                self.size -= self._sizes.pop(digest)
+                return None
+        return entry if entry.key == key else None
+
+    def set(self, key, entry):
+        """
+        Store an entry, evicting the least recently used entries if the cache grows over max_bytes.
+
+        Args:
+            key (str): The cache key.
+            entry (CacheEntry): The entry to store.
+        """
+        digest = self._digest(key)
+        data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            path = self._path(digest)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(path + '.tmp', path)
+            self.size += len(data) - self._sizes.pop(digest, 0)
+            self._sizes[digest] = len(data)
+            while self.size > self.max_bytes:
+                evicted, size = self._sizes.popitem(last=False)
+                self.size -= size
+                self.evictions += 1
+                try:
+                    os.remove(self._path(evicted))
+                except OSError:
+                    pass
+
+    def delete(self, key):
+        """
+        Remove an entry if it is cached.
+
+        Args:
+            key (str): The cache key.
+        """
+        digest = self._digest(key)
+        with self._lock:
+            if digest in self._sizes:
+                self.size -= self._sizes.pop(digest)
+                try:
+                    os.remove(self._path(digest))
+                except OSError:
+                    pass
+
+    def clear(self):
+        """
+        Remove all entries.
+        """
+        with self._lock:
+            for digest in self._sizes:
+                try:
+                    os.remove(self._path(digest))
+                except OSError:
+                    pass
+            self._sizes.clear()
+            self.size = 0
+
+
+class ResponseCache(object):
+    """
+    Response cache used by GolemioClient._callApi.
+
+    Decides per endpoint family how long a response may be served from the backend, revalidates
+    stale entries with ETag/Last-Modified when the server provided them and counts hits and misses.
+    """
+
+    DEFAULT_TTLS = (
+        ('/gtfs/*', 24 * 60 * 60),
+        ('/pid/departureboards*', 10),
+        ('*.pb', 0),
+    )
+
+    def __init__(self, backend=None, ttls=DEFAULT_TTLS, default_ttl=0):
+        """
+        Initialize a new instance of ResponseCache.
+
+        Args:
+            backend (MemoryCache or DiskCache): The storage backend (optional, default is a new MemoryCache).
+            ttls (iterable): (glob pattern, seconds) pairs matched in order against the API path; the first
+                match wins (optional, default is DEFAULT_TTLS).
+            default_ttl (float): The TTL of paths matching no pattern, 0 disables caching
+                (optional, default is 0).
+        """
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttls = list(ttls)
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._lock = threading.Lock()
+
+    def ttlFor(self, path):
+        """
+        Look up the TTL of an API path.
+
+        Args:
+            path (str): The API path, e.g. '/gtfs/routes'.
+
+        Returns:
+            float: The TTL in seconds, 0 if responses of this path are not cached.
+        """
+        for pattern, ttl in self.ttls:
+            if fnmatch.fnmatchcase(path, pattern):
+                return ttl
+        return self.default_ttl
+
+    def lookup(self, key):
+        """
+        Look up a request in the cache and count a hit if it can be served locally.
+
+        Args:
+            key (str): The request URL.
+
+        Returns:
+            tuple: (entry, fresh) where entry is the cached CacheEntry or None and fresh tells
+            whether it can be returned without contacting the server.
+        """
+        entry = self.backend.get(key)
+        fresh = entry is not None and entry.isFresh()
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry, fresh
+
+    def store(self, key, body, headers, ttl):
+        """
+        Store a 200 response.
+
+        Args:
+            key (str): The request URL.
+            body (bytes): The raw response body.
+            headers (Mapping): The response headers.
+            ttl (float): The TTL in seconds.
+
+        Returns:
+            CacheEntry: The stored entry.
+        """
+        entry = CacheEntry(key, body, time.time() + ttl, headers.get('ETag'), headers.get('Last-Modified'))
+        self.backend.set(key, entry)
+        return entry
+
+    def revalidated(self, entry, ttl):
+        """
+        Extend the lifetime of an entry after the server answered 304 Not Modified.
+
+        Args:
+            entry (CacheEntry): The revalidated entry.
+            ttl (float): The TTL in seconds.
+        """
+        entry.expires = time.time() + ttl
+        self.backend.set(entry.key, entry)
+        with self._lock:
+            self.revalidations += 1
+
+    def stats(self):
+        """
+        Snapshot of the cache counters.
+
+        Returns:
+            dict: hits, misses, revalidations, evictions, entries, bytes and hit_rate.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidations': self.revalidations,
+            'evictions': self.backend.evictions,
+            'entries': len(self.backend),
+            'bytes': self.backend.size,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        """
+        Remove all entries from the backend.
+        """
+        self.backend.clear()
@@ -1,6 +1,23 @@
 import requests
+import time
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .errors import *
+from .metrics import NULL_OBSERVATION
+from .ratelimit import parseRetryAfter
+from .records import Stop, StopTime, Trip, VehiclePosition, loadJson, toRecords
+from .streaming import JsonRecordDecoder
+from .transport import RequestsTransport
+
+
+class BulkResult(dict):
+    """
+    Result of a bulk fetch: a dict of the fetched records by ID, plus the errors of the IDs that failed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.errors = {}
 
 
 class GolemioClient(object):
@@ -8,7 +25,8 @@ class GolemioClient(object):
     Python wrapper for the Golemio API.
     """
 
-    def __init__(self, api_key='', api_version='v2', ssl=True, debug=False):
+    def __init__(self, api_key='', api_version='v2', ssl=True, debug=False, cache=None, rate_limiter=None,
+                 retry=None, pool_size=10, metrics=None, typed=False, transport=None):
         """
         Initialize a new instance of GolemioClient.
 
@@ -17,19 +35,47 @@ class GolemioClient(object):
             api_version (str): The API version to use (optional, default is 'v2').
             ssl (bool): Flag indicating whether to use SSL (optional, default is True).
             debug (bool): Flag indicating whether to use the debug mode (optional, default is False).
-        """
-        self.session = requests.Session()
+            cache (ResponseCache): The response cache to use, None disables caching (optional, default is None).
+            rate_limiter (TokenBucket): The rate limiter, may be shared with other clients (optional, default is None).
+            retry (RetryPolicy): The retry policy for 429, 5xx and connection errors, None disables retries
+                (optional, default is None).
+            pool_size (int): The number of keep-alive connections kept per host, also the default number of
+                threads of the bulk fetch methods (optional, default is 10).
+            metrics (Metrics): The per-endpoint instrumentation, may be shared with other clients
+                (optional, default is None).
+            typed (bool): Flag indicating whether stops, stop times, trips and vehicle positions are returned as
+                compact Stop, StopTime, Trip and VehiclePosition records instead of dicts; GTFSStore, StopIndex and
+                VehiclePositionTracker need an untyped client (optional, default is False).
+            transport (RequestsTransport or HttpxTransport): The transport sending the requests, e.g. an
+                HttpxTransport multiplexing them over one HTTP/2 connection (optional, default is a
+                RequestsTransport with `pool_size` connections).
+        """
+        self.transport = transport if transport is not None else RequestsTransport(pool_size)
+        # The requests.Session of the default transport, None with other transports
+        self.session = getattr(self.transport, 'session', None)
+        self.pool_size = pool_size
         self.api_key = api_key
         self.api_version = api_version
         self.base_url = 'rabin.golemio.cz' if debug else 'api.golemio.cz'
         self.protocol = 'https' if ssl else 'http'
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.retry = retry
+        self.metrics = metrics
+        self.typed = typed
         self.updateApiKey(api_key)
 
     def __del__(self):
         """
-        Clean up resources by closing the session.
+        Clean up resources by closing the transport.
         """
-        self.session.close()
+        self.close()
+
+    def close(self):
+        """
+        Close the transport and its keep-alive connections.
+        """
+        self.transport.close()
 
     def _getUrl(self, path, params={}):
         """
@@ -45,11 +91,12 @@ class GolemioClient(object):
         for param in params:
             if isinstance(params[param], bool):
                 params[param] = str(params[param]).lower()
-        query = '?' + urllib.parse.urlencode(params, doseq=True)
+        # Sorted so that equal requests always map to the same URL (and cache key)
+        query = '?' + urllib.parse.urlencode(sorted(params.items()), doseq=True)
         url = f'{self.protocol}://{self.base_url}/{self.api_version}{path}{query}'
         return url
 
-    def _callApi(self, path, proto=False, params={}):
+    def _callApi(self, path, proto=False, params={}, record=None):
         """
         Make the API request and handle common error responses.
 
@@ -57,6 +104,8 @@ class GolemioClient(object):
             path (str): The API path.
             proto (bool): Flag indicating whether to retrieve the response as a binary protobuf (optional, default is False).
             params (dict): Query parameters (optional, default is an empty dictionary).
+            record (type): The record class the response is converted to when the client is typed (optional,
+                default is None).
 
         Returns:
             dict or bytes: The response data, either as JSON or binary protobuf.
@@ -64,17 +113,249 @@ class GolemioClient(object):
         Raises:
             UnauthorizedError: If the API key is invalid or missing (HTTP status code 401).
             NotFoundError: If the requested resource was not found (HTTP status code 404).
+            RateLimitedError: If the request was throttled (HTTP status code 429) and not retried.
+            ServerError: If the server failed (HTTP status code 5xx) and the request was not retried.
+        """
+        url = self._getUrl(path, params)
+        observation = self.metrics.observe(path, url) if self.metrics is not None else NULL_OBSERVATION
+        try:
+            ttl = self.cache.ttlFor(path) if self.cache is not None else 0
+            entry, headers = None, {}
+            if ttl:
+                entry, fresh = self.cache.lookup(url)
+                if fresh:
+                    observation.cached('hit')
+                    return self._decode(entry.body, proto, observation, record)
+                observation.cached('miss')
+                if entry is not None:
+                    headers = entry.validators()
+            response = self._send(url, headers)
+            observation.responded(response.status_code, len(response.content))
+            if response.status_code == 304 and entry is not None:
+                observation.cached('revalidated')
+                self.cache.revalidated(entry, ttl)
+                return self._decode(entry.body, proto, observation, record)
+            self._raiseForStatus(response.status_code, response.headers)
+            if ttl and response.status_code == 200:
+                self.cache.store(url, response.content, response.headers, ttl)
+            return self._decode(response.content, proto, observation, record)
+        except Exception as e:
+            observation.failed(e)
+            raise
+        finally:
+            observation.finish()
+
+    def _streamApi(self, path, params={}, key='features', chunk_size=65536, record=None):
+        """
+        Make the API request and decode the records of the response while it is being downloaded.
+
+        The response cache is bypassed; the rate limiter, retry policy and metrics apply as in _callApi.
+
+        Args:
+            path (str): The API path.
+            params (dict): Query parameters (optional, default is an empty dictionary).
+            key (str): The member of a top-level object holding the records (optional, default is 'features').
+            chunk_size (int): The number of bytes read at a time (optional, default is 65536).
+            record (type): The record class the records are converted to when the client is typed (optional,
+                default is None).
+
+        Yields:
+            dict: The records; the elements of a top-level array or of its `key` member.
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing (HTTP status code 401).
+            NotFoundError: If the requested resource was not found (HTTP status code 404).
+            RateLimitedError: If the request was throttled (HTTP status code 429) and not retried.
+            ServerError: If the server failed (HTTP status code 5xx) and the request was not retried.
+        """
+        url = self._getUrl(path, params)
+        observation = self.metrics.observe(path, url) if self.metrics is not None else NULL_OBSERVATION
+        response = None
+        try:
+            response = self._send(url, stream=True)
+            observation.responded(response.status_code, 0)
+            self._raiseForStatus(response.status_code, response.headers)
+            decoder = JsonRecordDecoder(key)
+            convert = record.fromJsonList if record is not None and self.typed else None
+            size, decode_time = 0, 0.0
+            for chunk in response.iter_content(chunk_size):
+                size += len(chunk)
+                started = time.perf_counter()
+                records = decoder.feed(chunk)
+                if convert is not None:
+                    records = convert(records)
+                decode_time += time.perf_counter() - started
+                yield from records
+            observation.received(size)
+            started = time.perf_counter()
+            records = decoder.close()
+            if convert is not None:
+                records = convert(records)
+            observation.decoded(decode_time + time.perf_counter() - started)
+            yield from records
+        except Exception as e:
+            observation.failed(e)
+            raise
+        finally:
+            if response is not None:
+                response.close()
+            observation.finish()
+
+    def _send(self, url, headers={}, stream=False):
+        """
+        Send a GET request through the rate limiter, retrying according to the retry policy.
+
+        Args:
+            url (str): The request URL.
+            headers (dict): Extra request headers (optional, default is an empty dictionary).
+            stream (bool): Flag indicating whether to defer downloading the body (optional, default is False).
+
+        Returns:
+            The last response received from the transport.
+        """
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                response = self.transport.get(url, headers=headers, stream=stream)
+            except (requests.ConnectionError, requests.Timeout):
+                if self.retry is None or not self.retry.canRetry(attempt):
+                    raise
+                time.sleep(self.retry.delay(attempt))
+                attempt += 1
+                continue
+            retry_after = parseRetryAfter(response.headers.get('Retry-After'))
+            if response.status_code == 429 and retry_after and self.rate_limiter is not None:
+                self.rate_limiter.pause(retry_after)
+            if self.retry is None or not self.retry.shouldRetry(response.status_code, attempt):
+                return response
+            response.close()
+            time.sleep(self.retry.delay(attempt, retry_after))
+            attempt += 1
+
+    def _decode(self, body, proto=False, observation=NULL_OBSERVATION, record=None):
+        """
+        Decode a raw response body, with orjson when it is installed.
+
+        Args:
+            body (bytes): The response body.
+            proto (bool): Flag indicating whether the body is a binary protobuf (optional, default is False).
+            observation (RequestObservation): The observation recording the decode time (optional).
+            record (type): The record class the response is converted to when the client is typed (optional,
+                default is None).
+
+        Returns:
+            dict, list or bytes: The decoded JSON, or the body itself for protobuf responses.
         """
-        response = self.session.get(self._getUrl(path, params))
-        if response.status_code == 401:
+        if proto:
+            return body
+        started = time.perf_counter()
+        data = loadJson(body)
+        if record is not None and self.typed:
+            data = toRecords(record, data)
+        observation.decoded(time.perf_counter() - started)
+        return data
+
+    def _raiseForStatus(self, status_code, headers={}):
+        """
+        Translate an HTTP error status code into the matching GolemioClientError.
+
+        Args:
+            status_code (int): The HTTP status code of the response.
+            headers (Mapping): The response headers (optional, default is an empty dictionary).
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing (HTTP status code 401).
+            NotFoundError: If the requested resource was not found (HTTP status code 404).
+            RateLimitedError: If the request was throttled (HTTP status code 429).
+            ServerError: If the server failed (HTTP status code 5xx).
+        """
+        if status_code == 401:
             raise UnauthorizedError(
                 'Unauthorized: API key is invalid or missing.')
-        elif response.status_code == 404:
+        elif status_code == 404:
             raise NotFoundError(
                 'Not Found: The requested resource was not found.')
-        if proto:
-            return response.content
-        return response.json()
+        elif status_code == 429:
+            raise RateLimitedError(
+                'Too Many Requests: The rate limit of the API key was exceeded.',
+                parseRetryAfter(headers.get('Retry-After')))
+        elif status_code >= 500:
+            raise ServerError(
+                f'Server Error: The server answered with HTTP status code {status_code}.', status_code)
+
+    def _iterPages(self, getter, page_size, offset=0, **kwargs):
+        """
+        Iterate over the records of a paginated endpoint, fetching page N+1 in the background
+        while page N is being consumed.
+
+        Args:
+            getter (callable): The get* method of the endpoint, called with limit, offset and kwargs.
+            page_size (int): The number of records requested per page.
+            offset (int): The offset of the first record (optional, default is 0).
+            **kwargs: Filters passed through to the getter.
+
+        Yields:
+            dict: The records of all pages; for GeoJSON responses the elements of 'features'.
+        """
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            future = executor.submit(getter, limit=page_size, offset=offset, **kwargs)
+            while future is not None:
+                page = future.result()
+                records = page.get('features', []) if isinstance(page, dict) else page
+                offset += len(records)
+                future = None
+                if len(records) >= page_size:
+                    future = executor.submit(getter, limit=page_size, offset=offset, **kwargs)
+                yield from records
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _iterMany(self, getter, ids, max_workers=None):
+        """
+        Fetch records by ID in parallel on a thread pool, yielding them as they complete.
+
+        Args:
+            getter (callable): The get* method fetching one record by ID.
+            ids (iterable): The IDs; duplicates are fetched once.
+            max_workers (int): The number of threads (optional, default is the connection pool size).
+
+        Yields:
+            tuple: (id, record, error) where error is the exception raised for that ID, or None.
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return
+        executor = ThreadPoolExecutor(max_workers=min(max_workers or self.pool_size, len(ids)))
+        try:
+            futures = {executor.submit(getter, record_id): record_id for record_id in ids}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except (GolemioClientError, requests.RequestException) as e:
+                    yield futures[future], None, e
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _getMany(self, getter, ids, max_workers=None):
+        """
+        Fetch records by ID in parallel and collect them.
+
+        Returns:
+            BulkResult: The records by ID, in the order of the IDs, and the errors of the failed IDs.
+        """
+        ids = list(dict.fromkeys(ids))
+        records = {}
+        result = BulkResult()
+        for record_id, record, error in self._iterMany(getter, ids, max_workers):
+            if error is None:
+                records[record_id] = record
+            else:
+                result.errors[record_id] = error
+        result.update((record_id, records[record_id]) for record_id in ids if record_id in records)
+        return result
 
     def updateApiKey(self, api_key):
         """
@@ -83,7 +364,7 @@ class GolemioClient(object):
         Args:
             api_key (str): The new API key.
         """
-        self.session.headers.update({
+        self.transport.headers.update({
             'X-Access-Token': api_key
         })
 
@@ -109,6 +390,23 @@ class GolemioClient(object):
             params['date'] = date
         return self._callApi(path, params=params)
 
+    def iterGTFSServices(self, date=None, page_size=100, offset=0):
+        """
+        Iterate over all services, page by page.
+
+        Args:
+            date (str): The date for which to retrieve the services (optional, default is None).
+            page_size (int): The number of services fetched per request (optional, default is 100).
+            offset (int): The offset of the first service (optional, default is 0).
+
+        Yields:
+            dict: The services.
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing.
+        """
+        return self._iterPages(self.getGTFSServices, page_size, offset, date=date)
+
     def getGTFSRoutes(self):
         """
         Get all GTFS routes.
@@ -136,6 +434,32 @@ class GolemioClient(object):
         path = f'/gtfs/routes/{route_id}'
         return self._callApi(path)
 
+    def getGTFSRoutesByIds(self, route_ids, max_workers=None):
+        """
+        Retrieve many routes by ID in parallel.
+
+        Args:
+            route_ids (iterable): The IDs of the routes; duplicates are fetched once.
+            max_workers (int): The number of parallel requests (optional, default is the connection pool size).
+
+        Returns:
+            BulkResult: The routes by ID; the IDs that failed (e.g. with NotFoundError) are in its errors dict.
+        """
+        return self._getMany(self.getGTFSRoute, route_ids, max_workers)
+
+    def iterGTFSRoutesByIds(self, route_ids, max_workers=None):
+        """
+        Retrieve many routes by ID in parallel, yielding them as they complete.
+
+        Args:
+            route_ids (iterable): The IDs of the routes; duplicates are fetched once.
+            max_workers (int): The number of parallel requests (optional, default is the connection pool size).
+
+        Yields:
+            tuple: (route_id, route, error) where error is the exception raised for that ID, or None.
+        """
+        return self._iterMany(self.getGTFSRoute, route_ids, max_workers)
+
     def getGTFSTrips(self, stop_id=None, date=None, limit=10, offset=0):
         """
         Retrieve the list of trips.
@@ -147,7 +471,7 @@ class GolemioClient(object):
             offset (int): The offset for pagination (optional, default is 0).
 
         Returns:
-            list: A list of trips.
+            list: A list of trips, as Trip records if the client is typed.
 
         Raises:
             UnauthorizedError: If the API key is invalid or missing.
@@ -159,7 +483,25 @@ class GolemioClient(object):
             params['stopId'] = stop_id
         if date:
             params['date'] = date
-        return self._callApi(path, params=params)
+        return self._callApi(path, params=params, record=Trip)
+
+    def iterGTFSTrips(self, stop_id=None, date=None, page_size=100, offset=0):
+        """
+        Iterate over all trips, page by page.
+
+        Args:
+            stop_id (str): The ID of the stop to filter trips by (optional, default is None).
+            date (str): The date for which to retrieve the trips (optional, default is None).
+            page_size (int): The number of trips fetched per request (optional, default is 100).
+            offset (int): The offset of the first trip (optional, default is 0).
+
+        Yields:
+            dict: The trips.
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing.
+        """
+        return self._iterPages(self.getGTFSTrips, page_size, offset, stop_id=stop_id, date=date)
 
     def getGTFSTrip(self, trip_id):
         """
@@ -178,6 +520,32 @@ class GolemioClient(object):
         path = f'/gtfs/trips/{trip_id}'
         return self._callApi(path)
 
+    def getGTFSTripsByIds(self, trip_ids, max_workers=None):
+        """
+        Retrieve many trips by ID in parallel.
+
+        Args:
+            trip_ids (iterable): The IDs of the trips; duplicates are fetched once.
+            max_workers (int): The number of parallel requests (optional, default is the connection pool size).
+
+        Returns:
+            BulkResult: The trips by ID; the IDs that failed (e.g. with NotFoundError) are in its errors dict.
+        """
+        return self._getMany(self.getGTFSTrip, trip_ids, max_workers)
+
+    def iterGTFSTripsByIds(self, trip_ids, max_workers=None):
+        """
+        Retrieve many trips by ID in parallel, yielding them as they complete.
+
+        Args:
+            trip_ids (iterable): The IDs of the trips; duplicates are fetched once.
+            max_workers (int): The number of parallel requests (optional, default is the connection pool size).
+
+        Yields:
+            tuple: (trip_id, trip, error) where error is the exception raised for that ID, or None.
+        """
+        return self._iterMany(self.getGTFSTrip, trip_ids, max_workers)
+
     def getGTFSShape(self, shape_id):
         """
         Retrieve information about a specific shape.
@@ -195,7 +563,34 @@ class GolemioClient(object):
         path = f'/gtfs/shapes/{shape_id}'
         return self._callApi(path)
 
-    def getGTFSAllStops(self, names=None, stop_ids=None, asw_ids=None, cis_ids=None, limit=10000, offset=0):
+    def getGTFSShapesByIds(self, shape_ids, max_workers=None):
+        """
+        Retrieve many shapes by ID in parallel.
+
+        Args:
+            shape_ids (iterable): The IDs of the shapes; duplicates are fetched once.
+            max_workers (int): The number of parallel requests (optional, default is the connection pool size).
+
+        Returns:
+            BulkResult: The shapes by ID; the IDs that failed (e.g. with NotFoundError) are in its errors dict.
+        """
+        return self._getMany(self.getGTFSShape, shape_ids, max_workers)
+
+    def iterGTFSShapesByIds(self, shape_ids, max_workers=None):
+        """
+        Retrieve many shapes by ID in parallel, yielding them as they complete.
+
+        Args:
+            shape_ids (iterable): The IDs of the shapes; duplicates are fetched once.
+            max_workers (int): The number of parallel requests (optional, default is the connection pool size).
+
+        Yields:
+            tuple: (shape_id, shape, error) where error is the exception raised for that ID, or None.
+        """
+        return self._iterMany(self.getGTFSShape, shape_ids, max_workers)
+
+    def getGTFSAllStops(self, names=None, stop_ids=None, asw_ids=None, cis_ids=None, limit=10000, offset=0,
+                        stream=False):
         """
         Retrieve the list of all stops.
 
@@ -206,9 +601,12 @@ class GolemioClient(object):
             cis_ids (str or list): The CIS IDs of stops to retrieve (optional, default is None).
             limit (int): The maximum number of stops to retrieve (optional, default is 10000).
             offset (int): The offset for pagination (optional, default is 0).
+            stream (bool): Flag indicating whether to decode the stop features incrementally while the response
+                is downloaded (optional, default is False).
 
         Returns:
-            list: A list of stops.
+            list: A list of stops, or an iterator over the stop features if stream is True; Stop records
+            if the client is typed.
 
         Raises:
             UnauthorizedError: If the API key is invalid or missing.
@@ -223,7 +621,30 @@ class GolemioClient(object):
             params['aswIds'] = asw_ids
         if cis_ids:
             params['cisIds'] = cis_ids
-        return self._callApi(path, params=params)
+        if stream:
+            return self._streamApi(path, params=params, record=Stop)
+        return self._callApi(path, params=params, record=Stop)
+
+    def iterGTFSAllStops(self, names=None, stop_ids=None, asw_ids=None, cis_ids=None, page_size=1000, offset=0):
+        """
+        Iterate over all stops, page by page.
+
+        Args:
+            names (str or list): The names of stops to retrieve (optional, default is None).
+            stop_ids (str or list): The IDs of stops to retrieve (optional, default is None).
+            asw_ids (str or list): The ASW IDs of stops to retrieve (optional, default is None).
+            cis_ids (str or list): The CIS IDs of stops to retrieve (optional, default is None).
+            page_size (int): The number of stops fetched per request (optional, default is 1000).
+            offset (int): The offset of the first stop (optional, default is 0).
+
+        Yields:
+            dict: The stop features.
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing.
+        """
+        return self._iterPages(self.getGTFSAllStops, page_size, offset, names=names, stop_ids=stop_ids,
+                               asw_ids=asw_ids, cis_ids=cis_ids)
 
     def getGTFSStop(self, stop_id):
         """
@@ -242,7 +663,8 @@ class GolemioClient(object):
         path = f'/gtfs/stops/{stop_id}'
         return self._callApi(path)
 
-    def getGTFSStopTimes(self, stop_id, date=None, time_from=None, time_to=None, include_stop=False, limit=10000, offset=0):
+    def getGTFSStopTimes(self, stop_id, date=None, time_from=None, time_to=None, include_stop=False, limit=10000, offset=0,
+                         stream=False):
         """
         Retrieve the list of stop times for a specific stop.
 
@@ -254,9 +676,12 @@ class GolemioClient(object):
             include_stop (bool): Flag indicating whether to include stop information (optional, default is False).
             limit (int): The maximum number of stop times to retrieve (optional, default is 10000).
             offset (int): The offset for pagination (optional, default is 0).
+            stream (bool): Flag indicating whether to decode the stop times incrementally while the response
+                is downloaded (optional, default is False).
 
         Returns:
-            list: A list of stop times.
+            list: A list of stop times, or an iterator over the stop times if stream is True; StopTime records
+            if the client is typed.
 
         Raises:
             UnauthorizedError: If the API key is invalid or missing.
@@ -273,11 +698,36 @@ class GolemioClient(object):
             params['timeFrom'] = time_from
         if time_to:
             params['timeTo'] = time_to
-        return self._callApi(path, params=params)
+        if stream:
+            return self._streamApi(path, params=params, record=StopTime)
+        return self._callApi(path, params=params, record=StopTime)
+
+    def iterGTFSStopTimes(self, stop_id, date=None, time_from=None, time_to=None, include_stop=False, page_size=1000,
+                          offset=0):
+        """
+        Iterate over all stop times of a specific stop, page by page.
+
+        Args:
+            stop_id (str): The ID of the stop.
+            date (str): The date for which to retrieve the stop times (optional, default is None).
+            time_from (str): The starting time for the time range (optional, default is None).
+            time_to (str): The ending time for the time range (optional, default is None).
+            include_stop (bool): Flag indicating whether to include stop information (optional, default is False).
+            page_size (int): The number of stop times fetched per request (optional, default is 1000).
+            offset (int): The offset of the first stop time (optional, default is 0).
+
+        Yields:
+            dict: The stop times.
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing.
+        """
+        return self._iterPages(self.getGTFSStopTimes, page_size, offset, stop_id=stop_id, date=date,
+                               time_from=time_from, time_to=time_to, include_stop=include_stop)
 
     def getAllVehiclePositions(self, limit=10000, offset=0, include_not_tracking=False, include_not_public=False,
                                include_positions=False, cis_trip_number=None, preferred_timezone=None, route_id=None,
-                               route_short_name=None, updated_since=None):
+                               route_short_name=None, updated_since=None, stream=False):
         """
         Retrieve the list of all vehicle positions.
 
@@ -292,9 +742,12 @@ class GolemioClient(object):
             route_id (str): The ID of the route to filter vehicle positions by (optional, default is None).
             route_short_name (str): The short name of the route to filter vehicle positions by (optional, default is None).
             updated_since (str): The date and time since when the vehicle positions were updated (optional, default is None).
+            stream (bool): Flag indicating whether to decode the vehicle position features incrementally while the
+                response is downloaded (optional, default is False).
 
         Returns:
-            list: A list of vehicle positions.
+            list: A list of vehicle positions, or an iterator over the vehicle position features if stream is True;
+            VehiclePosition records if the client is typed.
 
         Raises:
             UnauthorizedError: If the API key is invalid or missing.
@@ -317,7 +770,39 @@ class GolemioClient(object):
             params['routeShortName'] = route_short_name
         if updated_since:
             params['updatedSince'] = updated_since
-        return self._callApi(path, params=params)
+        if stream:
+            return self._streamApi(path, params=params, record=VehiclePosition)
+        return self._callApi(path, params=params, record=VehiclePosition)
+
+    def iterAllVehiclePositions(self, page_size=1000, offset=0, include_not_tracking=False, include_not_public=False,
+                                include_positions=False, cis_trip_number=None, preferred_timezone=None, route_id=None,
+                                route_short_name=None, updated_since=None):
+        """
+        Iterate over all vehicle positions, page by page.
+
+        Args:
+            page_size (int): The number of vehicle positions fetched per request (optional, default is 1000).
+            offset (int): The offset of the first vehicle position (optional, default is 0).
+            include_not_tracking (bool): Flag indicating whether to include not tracking vehicles (optional, default is False).
+            include_not_public (bool): Flag indicating whether to include not public vehicles (optional, default is False).
+            include_positions (bool): Flag indicating whether to include vehicle positions (optional, default is False).
+            cis_trip_number (str): The CIS trip number to filter vehicle positions by (optional, default is None).
+            preferred_timezone (str): The preferred timezone for the results (optional, default is None).
+            route_id (str): The ID of the route to filter vehicle positions by (optional, default is None).
+            route_short_name (str): The short name of the route to filter vehicle positions by (optional, default is None).
+            updated_since (str): The date and time since when the vehicle positions were updated (optional, default is None).
+
+        Yields:
+            dict: The vehicle position features.
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing.
+        """
+        return self._iterPages(self.getAllVehiclePositions, page_size, offset,
+                               include_not_tracking=include_not_tracking, include_not_public=include_not_public,
+                               include_positions=include_positions, cis_trip_number=cis_trip_number,
+                               preferred_timezone=preferred_timezone, route_id=route_id,
+                               route_short_name=route_short_name, updated_since=updated_since)
 
     def getDepartureBoards(self, ids=None, asw_ids=None, cis_ids=None, names=None, minutes_before=None,
                            minutes_after=180, time_from=None, include_metro_trains=False, air_condition=True,
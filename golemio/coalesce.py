@@ -0,0 +1,224 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight(object):
+    """
+    Collapse identical concurrent calls into one: while a call for a key is in flight, other
+    callers with the same key wait for its result instead of starting their own.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Call fn(*args, **kwargs) unless a call with the same key is already running.
+
+        Args:
+            key (hashable): The key identifying equal calls.
+            fn (callable): The function to call.
+
+        Returns:
+            object: The result of the (shared) call.
+
+        Raises:
+            Exception: Whatever the shared call raised.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if leader:
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._calls[key]
+        return future.result()
+
+
+class _Batch(object):
+    """
+    Departure board requests waiting to be merged into one upstream call.
+    """
+
+    def __init__(self):
+        self.ids = set()
+        self.asw_ids = set()
+        self.limit = 0
+        self.waiters = []
+        self.full = threading.Event()
+
+    def add(self, ids, asw_ids, limit, future):
+        self.ids.update(ids)
+        self.asw_ids.update(asw_ids)
+        self.limit = max(self.limit, limit)
+        self.waiters.append((ids, asw_ids, limit, future))
+
+    def size(self):
+        return len(self.ids) + len(self.asw_ids)
+
+    def fits(self, ids, asw_ids, limit, max_stops, max_limit):
+        # Whether a request can join without the merged limit exceeding max_limit
+        size = len(self.ids.union(ids)) + len(self.asw_ids.union(asw_ids))
+        return size <= max_stops and size * max(self.limit, limit) <= max_limit
+
+
+class DepartureBoardBatcher(object):
+    """
+    Coalescing front for GolemioClient.getDepartureBoards.
+
+    Requests by `ids`/`asw_ids` with otherwise equal parameters that arrive within `window`
+    seconds are merged into one upstream call, and the response is split back per caller; a
+    request alone in its window gets the upstream board unchanged. ASW IDs may use either the _
+    or the / delimiter between node and platform. The first caller of a window waits for it to close and makes the call on behalf of everybody.
+    The limit of a departure board applies to all of its stops together, so the merged call asks
+    for the largest limit times the number of stops, and a batch is closed before that would
+    exceed `max_limit`. When the merged board was cut off by its limit and a caller got fewer
+    departures than asked for, busy stops may have crowded out its stops, and that caller repeats
+    its request on its own. Requests by `cis_ids` or `names` cannot be split reliably; identical
+    ones are only collapsed while in flight.
+    """
+
+    def __init__(self, client, window=0.05, max_stops=100, max_limit=1000):
+        """
+        Initialize a new instance of DepartureBoardBatcher.
+
+        Args:
+            client (GolemioClient): The client used for the upstream calls.
+            window (float): Seconds to wait for more requests before calling upstream (optional, default is 0.05).
+            max_stops (int): The maximum number of stops merged into one call (optional, default is 100).
+            max_limit (int): The maximum departure limit of a merged call, the API's maximum; a batch holds at
+                most max_limit // limit stops (optional, default is 1000).
+        """
+        self.client = client
+        self.window = window
+        self.max_stops = max_stops
+        self.max_limit = max_limit
+        self.requests = 0
+        self.upstream_calls = 0
+        self._flight = SingleFlight()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _asList(self, value, asw=False):
+        if value is None:
+            return []
+        values = [str(value)] if isinstance(value, (str, int)) else [str(v) for v in value]
+        # The API takes both 1040_2 and 1040/2 for platform 2 of ASW node 1040
+        return [v.replace('/', '_') for v in values] if asw else values
+
+    def _group(self, params):
+        return tuple(sorted((name, repr(value)) for name, value in params.items()))
+
+    def _call(self, **kwargs):
+        with self._lock:
+            self.upstream_calls += 1
+        return self.client.getDepartureBoards(**kwargs)
+
+    def getDepartureBoards(self, ids=None, asw_ids=None, cis_ids=None, names=None, limit=20, **kwargs):
+        """
+        Retrieve the departure boards for one or more stops, sharing upstream calls with concurrent callers.
+
+        Args:
+            ids (str or list): The IDs of the stops to retrieve departure boards for (optional, default is None).
+            asw_ids (str or list): The ASW IDs of the stops to retrieve departure boards for (optional, default is None).
+            cis_ids (str or list): The CIS IDs of the stops to retrieve departure boards for (optional, default is None).
+            names (str or list): The names of the stops to retrieve departure boards for (optional, default is None).
+            limit (int): The maximum number of departures to retrieve (optional, default is 20).
+            **kwargs: Any other parameter of GolemioClient.getDepartureBoards.
+
+        Returns:
+            dict: The departure board, restricted to the requested stops.
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing.
+        """
+        with self._lock:
+            self.requests += 1
+        if cis_ids is not None or names is not None or (ids is None and asw_ids is None):
+            key = (repr(cis_ids), repr(names), repr(ids), repr(asw_ids), limit, self._group(kwargs))
+            return self._flight.do(key, self._call, ids=ids, asw_ids=asw_ids, cis_ids=cis_ids, names=names,
+                                   limit=limit, **kwargs)
+        ids, asw_ids = self._asList(ids), self._asList(asw_ids, asw=True)
+        group = self._group(kwargs)
+        future = Future()
+        with self._lock:
+            batch = self._pending.get(group)
+            if batch is not None and not batch.fits(ids, asw_ids, limit, self.max_stops, self.max_limit):
+                # Send the pending batch now and start a new one with this request
+                del self._pending[group]
+                batch.full.set()
+                batch = None
+            leader = batch is None
+            if leader:
+                batch = self._pending[group] = _Batch()
+            batch.add(ids, asw_ids, limit, future)
+            if batch.size() >= self.max_stops or batch.size() * batch.limit >= self.max_limit:
+                del self._pending[group]
+                batch.full.set()
+        if leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                if self._pending.get(group) is batch:
+                    del self._pending[group]
+            self._flush(group, batch, kwargs)
+        board, complete = future.result()
+        if complete:
+            return board
+        key = (repr(ids), repr(asw_ids), limit, group)
+        return self._flight.do(key, self._call, ids=ids or None, asw_ids=asw_ids or None, limit=limit, **kwargs)
+
+    def _flush(self, group, batch, params):
+        lone = len(batch.waiters) == 1
+        if lone:
+            # A lone request is sent as it is
+            limit = batch.limit
+        else:
+            # The limit applies to the whole board, so scale it with the number of merged stops
+            limit = batch.limit * max(1, batch.size())
+        ids = sorted(batch.ids) or None
+        asw_ids = sorted(batch.asw_ids) or None
+        key = (repr(ids), repr(asw_ids), limit, group)
+        try:
+            response = self._flight.do(key, self._call, ids=ids, asw_ids=asw_ids, limit=limit, **params)
+        except BaseException as e:
+            for _, _, _, future in batch.waiters:
+                future.set_exception(e)
+            return
+        if lone:
+            # Nothing to split off: the caller gets the board unchanged
+            batch.waiters[0][3].set_result((response, True))
+            return
+        truncated = isinstance(response, dict) and len(response.get('departures', [])) >= limit
+        for waiter_ids, waiter_asw_ids, waiter_limit, future in batch.waiters:
+            board = self._split(response, waiter_ids, waiter_asw_ids, waiter_limit)
+            complete = not truncated or len(board['departures']) >= waiter_limit
+            future.set_result((board, complete))
+
+    def _matches(self, stop, ids, asw_ids):
+        if stop.get('stop_id') in ids:
+            return True
+        asw = stop.get('asw_id') or {}
+        node, platform = asw.get('node'), asw.get('stop')
+        return str(node) in asw_ids or f'{node}_{platform}' in asw_ids
+
+    def _split(self, response, ids, asw_ids, limit):
+        """
+        Restrict a merged departure board to the stops one caller asked for.
+        """
+        if not isinstance(response, dict):
+            return response
+        stops = [stop for stop in response.get('stops', []) if self._matches(stop, ids, asw_ids)]
+        stop_ids = set(ids) | {stop.get('stop_id') for stop in stops}
+        departures = [departure for departure in response.get('departures', [])
+                      if (departure.get('stop') or {}).get('id') in stop_ids]
+        board = dict(response)
+        board['stops'] = stops
+        board['departures'] = departures[:limit]
+        return board
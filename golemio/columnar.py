@@ -0,0 +1,340 @@
+try:
+    # pip install numpy
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    # pip install gtfs-realtime-bindings
+    from google.transit import gtfs_realtime_pb2
+except ImportError:
+    gtfs_realtime_pb2 = None
+
+
+def _requireEngines():
+    if np is None:
+        raise ImportError('Columnar decoding requires numpy (pip install numpy).')
+    if gtfs_realtime_pb2 is None:
+        raise ImportError('Columnar decoding requires gtfs-realtime-bindings (pip install gtfs-realtime-bindings).')
+
+
+class Interner(object):
+    """
+    Maps strings (trip, route, vehicle and stop IDs) to small integer codes and back.
+
+    Sharing one Interner between decodes keeps the codes stable from one feed to the next.
+    """
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def code(self, value):
+        """
+        Get the code of a string, assigning a new one if it was not seen yet.
+
+        Args:
+            value (str): The string to intern.
+
+        Returns:
+            int: The code.
+        """
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value):
+        """
+        Get the code of a string without assigning one.
+
+        Args:
+            value (str): The string.
+
+        Returns:
+            int: The code, or -1 if the string was never interned.
+        """
+        return self.codes.get(value, -1)
+
+    def decode(self, codes):
+        """
+        Turn an array of codes back into strings.
+
+        Args:
+            codes (numpy.ndarray): The codes.
+
+        Returns:
+            list: The strings.
+        """
+        return [self.values[code] for code in codes]
+
+
+class Columns(object):
+    """
+    Base class of the columnar tables: a set of equally long NumPy arrays, named in COLUMNS by
+    each subclass, whose ID columns hold the codes of a shared Interner.
+    """
+
+    COLUMNS = ()
+
+    def __init__(self, interner, timestamp, **columns):
+        self.interner = interner
+        self.timestamp = timestamp
+        for name in self.COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self):
+        return len(getattr(self, self.COLUMNS[0]))
+
+    def select(self, mask):
+        """
+        Keep only the rows selected by a boolean mask or an index array.
+
+        Args:
+            mask (numpy.ndarray): The boolean mask or row indices.
+
+        Returns:
+            The same kind of table with the selected rows.
+        """
+        return type(self)(self.interner, self.timestamp,
+                          **{name: getattr(self, name)[mask] for name in self.COLUMNS})
+
+    def _codeMask(self, column, values):
+        if isinstance(values, str):
+            values = [values]
+        codes = [self.interner.lookup(value) for value in values]
+        return np.isin(getattr(self, column), codes)
+
+    def routeMask(self, route_ids):
+        """
+        Build a mask of the rows belonging to one or more routes.
+
+        Args:
+            route_ids (str or list): The route ID(s).
+
+        Returns:
+            numpy.ndarray: The boolean mask.
+        """
+        return self._codeMask('route_id', route_ids)
+
+    def tripMask(self, trip_ids):
+        """
+        Build a mask of the rows belonging to one or more trips.
+
+        Args:
+            trip_ids (str or list): The trip ID(s).
+
+        Returns:
+            numpy.ndarray: The boolean mask.
+        """
+        return self._codeMask('trip_id', trip_ids)
+
+    def byRoute(self, route_ids):
+        """
+        Keep only the rows of one or more routes.
+
+        Args:
+            route_ids (str or list): The route ID(s).
+
+        Returns:
+            The same kind of table with the selected rows.
+        """
+        return self.select(self.routeMask(route_ids))
+
+    def strings(self, column):
+        """
+        Decode a categorical column back into strings.
+
+        Args:
+            column (str): The column name, e.g. 'trip_id'.
+
+        Returns:
+            list: The strings, None for missing values.
+        """
+        return [self.interner.values[code] if code >= 0 else None for code in getattr(self, column)]
+
+
+class VehiclePositionColumns(Columns):
+    """
+    Columnar vehicle positions feed: one row per vehicle.
+
+    trip_id, route_id and vehicle_id are int32 codes of the shared Interner (-1 when missing);
+    lat, lon, bearing and speed are float32 (NaN when missing); timestamp is int64 POSIX time
+    (0 when missing).
+    """
+
+    COLUMNS = ('trip_id', 'route_id', 'vehicle_id', 'lat', 'lon', 'bearing', 'speed', 'timestamps')
+
+    def bboxMask(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Build a mask of the vehicles inside a bounding box.
+
+        Args:
+            min_lat (float): The southern edge.
+            min_lon (float): The western edge.
+            max_lat (float): The northern edge.
+            max_lon (float): The eastern edge.
+
+        Returns:
+            numpy.ndarray: The boolean mask.
+        """
+        return (self.lat >= min_lat) & (self.lat <= max_lat) & (self.lon >= min_lon) & (self.lon <= max_lon)
+
+    def inBoundingBox(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Keep only the vehicles inside a bounding box.
+
+        Args:
+            min_lat (float): The southern edge.
+            min_lon (float): The western edge.
+            max_lat (float): The northern edge.
+            max_lon (float): The eastern edge.
+
+        Returns:
+            VehiclePositionColumns: The selected vehicles.
+        """
+        return self.select(self.bboxMask(min_lat, min_lon, max_lat, max_lon))
+
+
+class TripUpdateColumns(Columns):
+    """
+    Columnar trip updates feed: one row per stop time update.
+
+    trip_id, route_id, vehicle_id and stop_id are int32 codes of the shared Interner (-1 when
+    missing); stop_sequence is int32 (-1 when missing); arrival_delay and departure_delay are
+    float32 seconds (NaN when missing); arrival_time, departure_time and timestamps are int64
+    POSIX times (0 when missing); start_date is the int32 YYYYMMDD start date of the trip (0 when missing).
+    """
+
+    COLUMNS = ('trip_id', 'route_id', 'vehicle_id', 'stop_id', 'stop_sequence', 'arrival_delay',
+               'departure_delay', 'arrival_time', 'departure_time', 'timestamps', 'start_date')
+
+    def stopMask(self, stop_ids):
+        """
+        Build a mask of the updates for one or more stops.
+
+        Args:
+            stop_ids (str or list): The stop ID(s).
+
+        Returns:
+            numpy.ndarray: The boolean mask.
+        """
+        return self._codeMask('stop_id', stop_ids)
+
+
+def _parse(data):
+    _requireEngines()
+    feed = gtfs_realtime_pb2.FeedMessage()
+    feed.ParseFromString(data)
+    return feed
+
+
+def decodeVehiclePositions(data, interner=None):
+    """
+    Decode a GTFS Realtime vehicle positions feed into columns.
+
+    Args:
+        data (bytes): The feed, e.g. from GolemioClient.getVehiclePositionsProtobuf().
+        interner (Interner): The interner for the ID columns, share it between polls to keep codes
+            stable (optional, default is a new Interner).
+
+    Returns:
+        VehiclePositionColumns: The decoded feed.
+
+    Raises:
+        ImportError: If numpy or gtfs-realtime-bindings is not installed.
+    """
+    feed = _parse(data)
+    interner = interner if interner is not None else Interner()
+    code = interner.code
+    trip_id, route_id, vehicle_id, lat, lon, bearing, speed, timestamps = [], [], [], [], [], [], [], []
+    nan = float('nan')
+    for entity in feed.entity:
+        if not entity.HasField('vehicle'):
+            continue
+        vehicle = entity.vehicle
+        trip = vehicle.trip
+        trip_id.append(code(trip.trip_id) if trip.trip_id else -1)
+        route_id.append(code(trip.route_id) if trip.route_id else -1)
+        vehicle_id.append(code(vehicle.vehicle.id) if vehicle.vehicle.id else -1)
+        if vehicle.HasField('position'):
+            position = vehicle.position
+            lat.append(position.latitude)
+            lon.append(position.longitude)
+            bearing.append(position.bearing if position.HasField('bearing') else nan)
+            speed.append(position.speed if position.HasField('speed') else nan)
+        else:
+            lat.append(nan)
+            lon.append(nan)
+            bearing.append(nan)
+            speed.append(nan)
+        timestamps.append(vehicle.timestamp)
+    return VehiclePositionColumns(
+        interner, feed.header.timestamp,
+        trip_id=np.array(trip_id, dtype=np.int32),
+        route_id=np.array(route_id, dtype=np.int32),
+        vehicle_id=np.array(vehicle_id, dtype=np.int32),
+        lat=np.array(lat, dtype=np.float32),
+        lon=np.array(lon, dtype=np.float32),
+        bearing=np.array(bearing, dtype=np.float32),
+        speed=np.array(speed, dtype=np.float32),
+        timestamps=np.array(timestamps, dtype=np.int64),
+    )
+
+
+def decodeTripUpdates(data, interner=None):
+    """
+    Decode a GTFS Realtime trip updates feed into columns, one row per stop time update.
+
+    Args:
+        data (bytes): The feed, e.g. from GolemioClient.getTripUpdatesProtobuf().
+        interner (Interner): The interner for the ID columns, share it between polls to keep codes
+            stable (optional, default is a new Interner).
+
+    Returns:
+        TripUpdateColumns: The decoded feed.
+
+    Raises:
+        ImportError: If numpy or gtfs-realtime-bindings is not installed.
+    """
+    feed = _parse(data)
+    interner = interner if interner is not None else Interner()
+    code = interner.code
+    columns = {name: [] for name in TripUpdateColumns.COLUMNS}
+    trip_id, route_id, vehicle_id, stop_id = (columns['trip_id'], columns['route_id'], columns['vehicle_id'],
+                                              columns['stop_id'])
+    stop_sequence, arrival_delay, departure_delay = (columns['stop_sequence'], columns['arrival_delay'],
+                                                     columns['departure_delay'])
+    arrival_time, departure_time, timestamps, start_date = (columns['arrival_time'], columns['departure_time'],
+                                                            columns['timestamps'], columns['start_date'])
+    nan = float('nan')
+    for entity in feed.entity:
+        if not entity.HasField('trip_update'):
+            continue
+        update = entity.trip_update
+        trip = code(update.trip.trip_id) if update.trip.trip_id else -1
+        route = code(update.trip.route_id) if update.trip.route_id else -1
+        vehicle = code(update.vehicle.id) if update.vehicle.id else -1
+        date = int(update.trip.start_date) if update.trip.start_date.isdigit() else 0
+        for stop_time in update.stop_time_update:
+            trip_id.append(trip)
+            route_id.append(route)
+            vehicle_id.append(vehicle)
+            stop_id.append(code(stop_time.stop_id) if stop_time.stop_id else -1)
+            stop_sequence.append(stop_time.stop_sequence if stop_time.HasField('stop_sequence') else -1)
+            arrival, departure = stop_time.arrival, stop_time.departure
+            arrival_delay.append(arrival.delay if arrival.HasField('delay') else nan)
+            departure_delay.append(departure.delay if departure.HasField('delay') else nan)
+            arrival_time.append(arrival.time)
+            departure_time.append(departure.time)
+            timestamps.append(update.timestamp)
+            start_date.append(date)
+    dtypes = {'stop_sequence': np.int32, 'arrival_delay': np.float32, 'departure_delay': np.float32,
+              'arrival_time': np.int64, 'departure_time': np.int64, 'timestamps': np.int64}
+    return TripUpdateColumns(interner, feed.header.timestamp,
+                             **{name: np.array(values, dtype=dtypes.get(name, np.int32))
+                                for name, values in columns.items()})
@@ -0,0 +1,368 @@
+import datetime
+import threading
+import time
+from collections import namedtuple
+from .columnar import Columns, Interner, decodeTripUpdates
+from .timetable import TIMEZONE, parseTime
+
+try:
+    # pip install numpy
+    import numpy as np
+except ImportError:
+    np = None
+
+# A departure predicted from the schedule and the trip updates feed; times are in seconds since
+# midnight of the service date, delay is None and the times are scheduled when there is no realtime data
+PredictedDeparture = namedtuple('PredictedDeparture', ['stop_id', 'scheduled', 'arrival', 'departure', 'delay',
+                                                       'trip_id', 'route_id', 'stop_sequence', 'headsign'])
+
+
+def serviceDayStart(date):
+    """
+    Get the POSIX time GTFS times of a service date count from: noon minus 12 hours, local time.
+
+    Args:
+        date (str or datetime.date): The service date, as YYYY-MM-DD.
+
+    Returns:
+        int: The POSIX time.
+    """
+    if isinstance(date, str):
+        date = datetime.date.fromisoformat(date)
+    noon = datetime.datetime(date.year, date.month, date.day, 12, tzinfo=TIMEZONE)
+    return int(noon.timestamp()) - 12 * 3600
+
+
+class PredictionColumns(Columns):
+    """
+    Columnar predictions: one row per scheduled stop time, sorted by stop, then predicted departure.
+
+    stop_id, trip_id and route_id are int32 codes of the shared Interner (-1 when missing);
+    stop_sequence is int32; scheduled, arrival and departure are int64 seconds since midnight of
+    the service date; delay is float32 seconds of the departure (NaN when there is no realtime data).
+    """
+
+    COLUMNS = ('stop_id', 'trip_id', 'route_id', 'stop_sequence', 'scheduled', 'arrival', 'departure', 'delay')
+
+    def stopMask(self, stop_ids):
+        """
+        Build a mask of the predictions for one or more stops.
+
+        Args:
+            stop_ids (str or list): The stop ID(s).
+
+        Returns:
+            numpy.ndarray: The boolean mask.
+        """
+        return self._codeMask('stop_id', stop_ids)
+
+
+class _Static(object):
+    """
+    The stop times of a TimetableIndex flattened into arrays sorted by (trip, service day, stop sequence).
+
+    The service day is 1 for the stop times of the service date and 0 for the runs of the previous
+    service date after midnight, so the two runs of a trip running every night have distinct keys.
+    """
+
+    def __init__(self, timetable, interner):
+        self.version = timetable.version
+        code = interner.code
+        stops, trips, sequences, times, headsigns, offsets = [], [], [], [], [], []
+        for stop_id in timetable.stopIds():
+            arrays = timetable.arrays(stop_id)
+            if arrays is None:
+                continue
+            stop_times, trip_ids, stop_sequences, stop_headsigns, day_offsets = arrays
+            stops.extend([code(stop_id)] * len(stop_times))
+            trips.extend(code(trip_id) for trip_id in trip_ids)
+            sequences.extend(stop_sequences)
+            times.extend(stop_times)
+            headsigns.extend(stop_headsigns)
+            offsets.extend(day_offsets)
+        trip_routes = timetable.trip_routes
+        trips = np.array(trips, dtype=np.int32)
+        sequences = np.array(sequences, dtype=np.int32)
+        days = (np.array(offsets, dtype=np.int64) == 0).astype(np.int64)
+        order = np.lexsort((sequences, days, trips))
+        self.stop_id = np.array(stops, dtype=np.int32)[order]
+        self.trip_id = trips[order]
+        self.stop_sequence = sequences[order]
+        self.scheduled = np.array(times, dtype=np.int64)[order]
+        self.headsigns = [headsigns[i] for i in order]
+        self.day = days[order]
+        routes = [trip_routes.get(interner.values[trip]) for trip in self.trip_id]
+        self.route_id = np.array([code(route) if route else -1 for route in routes], dtype=np.int32)
+        self.keys = _keys(self.trip_id, self.stop_sequence, self.day)
+        # Lookup of the stop sequence by (trip, stop) for updates that only carry a stop ID
+        self.stop_keys = _keys(self.trip_id, self.stop_id)
+        self.stop_order = np.argsort(self.stop_keys, kind='stable')
+        # The trips with a run of the previous service date indexed
+        self.overnight_trips = np.unique(self.trip_id[self.day == 0])
+
+
+def _keys(trips, values, days=None):
+    # (trip, service day, value) packed into one sortable int64
+    trips = trips.astype(np.int64)
+    if days is not None:
+        trips = (trips << 1) | days
+    return (trips << 32) | values.astype(np.int64)
+
+
+def _find(keys, wanted):
+    # The row of every wanted key in the sorted keys, and whether it is there
+    rows = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+    return rows, keys[rows] == wanted
+
+
+class RealtimeDepartures(object):
+    """
+    Departure boards for every stop of a TimetableIndex, adjusted with the delays of the trip
+    updates feed.
+
+    Each update() downloads and decodes the feed once and joins all of its stop time updates with
+    all indexed stop times in one vectorized pass: a delay applies to its stop and is propagated to
+    the following stops of the trip until the next update, as in GTFS Realtime. A trip running on
+    both the service date and, after midnight, the previous one is matched to one run per stop time
+    update: by its start date, else by the run scheduled nearest to the update's time (or to the
+    feed's time for updates with only a delay). Queries then run
+    locally, so the boards of the whole network refresh with a single request. Requires numpy and
+    gtfs-realtime-bindings.
+    """
+
+    def __init__(self, timetable, client=None, date=None, interner=None):
+        """
+        Initialize a new instance of RealtimeDepartures.
+
+        Args:
+            timetable (TimetableIndex): The index holding the scheduled stop times; stops added to it
+                later are picked up by the next update().
+            client (GolemioClient): The client downloading the trip updates (optional, default is the
+                client of the timetable).
+            date (str): The service date as YYYY-MM-DD, used to convert absolute times of the feed
+                (optional, default is the date of the timetable, or the local date of the feed).
+            interner (Interner): The interner for the ID columns (optional, default is a new Interner).
+
+        Raises:
+            ImportError: If numpy is not installed.
+        """
+        if np is None:
+            raise ImportError('RealtimeDepartures requires numpy (pip install numpy).')
+        self.timetable = timetable
+        self.client = client if client is not None else timetable.client
+        self.date = date or timetable.date
+        self.interner = interner if interner is not None else Interner()
+        self.timestamp = None
+        self.predictions = None
+        self._static = None
+        self._boards = None
+        self._lock = threading.Lock()
+
+    def _staticTimes(self):
+        if self._static is None or self._static.version != self.timetable.version:
+            self._static = _Static(self.timetable, self.interner)
+        return self._static
+
+    def update(self, data=None):
+        """
+        Download the trip updates feed and recompute the predictions of all indexed stops.
+
+        Args:
+            data (bytes): An already downloaded feed to use instead (optional, default is None).
+
+        Returns:
+            int: The number of stop times with a realtime prediction.
+        """
+        if data is None:
+            data = self.client.getTripUpdatesProtobuf()
+        return self.apply(decodeTripUpdates(data, self.interner))
+
+    def apply(self, updates):
+        """
+        Recompute the predictions of all indexed stops from decoded trip updates.
+
+        Args:
+            updates (TripUpdateColumns): The feed decoded with this instance's interner.
+
+        Returns:
+            int: The number of stop times with a realtime prediction.
+        """
+        with self._lock:
+            static = self._staticTimes()
+            date = self.date or datetime.datetime.fromtimestamp(updates.timestamp or time.time(), TIMEZONE).date()
+            if isinstance(date, str):
+                date = datetime.date.fromisoformat(date)
+            arrival_delay, departure_delay, realtime = self._join(static, updates, date)
+            arrival = static.scheduled + np.rint(arrival_delay).astype(np.int64)
+            departure = static.scheduled + np.rint(departure_delay).astype(np.int64)
+            order = np.lexsort((departure, static.stop_id))
+            predictions = PredictionColumns(
+                self.interner, updates.timestamp,
+                stop_id=static.stop_id[order],
+                trip_id=static.trip_id[order],
+                route_id=static.route_id[order],
+                stop_sequence=static.stop_sequence[order],
+                scheduled=static.scheduled[order],
+                arrival=arrival[order],
+                departure=departure[order],
+                delay=np.where(realtime, departure_delay, np.nan).astype(np.float32)[order],
+            )
+            starts = np.searchsorted(predictions.stop_id, np.arange(len(self.interner) + 1))
+            # Swap in the new boards at once for concurrent readers
+            self._boards = (predictions, starts, static.headsigns, order)
+            self.predictions = predictions
+            self.timestamp = updates.timestamp
+            return int(realtime.sum())
+
+    def _serviceDays(self, static, updates, sequence, date, day_start):
+        """
+        Pick the run every stop time update belongs to.
+
+        Returns:
+            numpy.ndarray: The service day of every update: 1 for the service date, 0 for the previous
+                one and -1 for trips started on another date.
+        """
+        days = np.ones(len(sequence), dtype=np.int64)
+        if not len(static.keys):
+            return days
+        rows_today, today = _find(static.keys, _keys(updates.trip_id, sequence, 1))
+        rows_yesterday, yesterday = _find(static.keys, _keys(updates.trip_id, sequence, 0))
+        # The time the update is about: its absolute time, else the time of the feed
+        absolute = np.where(updates.departure_time > 0, updates.departure_time, updates.arrival_time)
+        reference = np.where(absolute > 0, absolute, updates.timestamp or int(time.time())) - day_start
+        gap_today = np.where(today, np.abs(static.scheduled[rows_today] - reference), np.inf)
+        gap_yesterday = np.where(yesterday, np.abs(static.scheduled[rows_yesterday] - reference), np.inf)
+        days = (gap_today <= gap_yesterday).astype(np.int64)
+        # The previous date only keeps its stop times after midnight, so a stop time may be indexed for
+        # one run of an overnight trip only: more than 12 hours away from it means the other run
+        lone = (np.isin(updates.trip_id, static.overnight_trips) & (today != yesterday)
+                & (np.minimum(gap_today, gap_yesterday) > 12 * 3600))
+        days = np.where(lone, 1 - days, days)
+        service = int(date.strftime('%Y%m%d'))
+        previous = int((date - datetime.timedelta(days=1)).strftime('%Y%m%d'))
+        start_date = updates.start_date
+        days = np.where(start_date == service, 1, np.where(start_date == previous, 0, days))
+        return np.where((start_date > 0) & (start_date != service) & (start_date != previous), -1, days)
+
+    def _eventDelay(self, static, updates, event, keys, day_start):
+        delay = getattr(updates, f'{event}_delay').astype(np.float64)
+        absolute = getattr(updates, f'{event}_time')
+        # Updates with only an absolute time get the delay against the schedule of their run's stop time
+        if len(static.keys):
+            rows, found = _find(static.keys, keys)
+            timed = np.isnan(delay) & (absolute > 0) & found
+            delay = np.where(timed, absolute - day_start - static.scheduled[rows], delay)
+        return delay
+
+    def _join(self, static, updates, date):
+        """
+        Find the arrival and departure delay of every static stop time.
+
+        Returns:
+            tuple: (arrival delays, departure delays, boolean mask of the stop times with realtime data).
+        """
+        day_start = serviceDayStart(date)
+        sequence = updates.stop_sequence.astype(np.int64)
+        # Updates without a stop sequence are matched by stop ID within their trip
+        if len(static.stop_keys):
+            stop_keys = _keys(updates.trip_id, updates.stop_id)
+            positions = np.minimum(np.searchsorted(static.stop_keys, stop_keys, sorter=static.stop_order),
+                                   len(static.stop_keys) - 1)
+            rows = static.stop_order[positions]
+            by_stop = (sequence < 0) & (static.stop_keys[rows] == stop_keys)
+            sequence = np.where(by_stop, static.stop_sequence[rows], sequence)
+        days = self._serviceDays(static, updates, sequence, date, day_start)
+        keys = _keys(updates.trip_id, sequence, np.maximum(days, 0))
+        arrival = self._eventDelay(static, updates, 'arrival', keys, day_start)
+        departure = self._eventDelay(static, updates, 'departure', keys, day_start)
+        # Within a stop time update, a missing event takes the delay of the other one
+        arrival = np.where(np.isnan(arrival), departure, arrival)
+        departure = np.where(np.isnan(departure), arrival, departure)
+        valid = (updates.trip_id >= 0) & (sequence >= 0) & (days >= 0) & ~np.isnan(departure)
+        keys, arrival, departure = keys[valid], arrival[valid], departure[valid]
+        order = np.argsort(keys, kind='stable')
+        keys, arrival, departure = keys[order], arrival[order], departure[order]
+        zeros = np.zeros(len(static.keys), dtype=np.float64)
+        if not len(keys):
+            return zeros, zeros, np.zeros(len(static.keys), dtype=bool)
+        # The last update at or before each stop time of the same run applies to it; the stops after
+        # an update inherit its departure delay
+        rows = np.searchsorted(keys, static.keys, side='right') - 1
+        clipped = np.maximum(rows, 0)
+        found = (rows >= 0) & ((keys[clipped] >> 32) == (static.keys >> 32))
+        exact = found & (keys[clipped] == static.keys)
+        departure_delay = np.where(found, departure[clipped], 0.0)
+        arrival_delay = np.where(exact, arrival[clipped], departure_delay)
+        return arrival_delay, departure_delay, found
+
+    def _departure(self, boards, row):
+        predictions, _, headsigns, order = boards
+        values = self.interner.values
+        delay = predictions.delay[row]
+        route = predictions.route_id[row]
+        return PredictedDeparture(values[predictions.stop_id[row]], int(predictions.scheduled[row]),
+                                  int(predictions.arrival[row]), int(predictions.departure[row]),
+                                  None if np.isnan(delay) else int(round(float(delay))),
+                                  values[predictions.trip_id[row]], values[route] if route >= 0 else None,
+                                  int(predictions.stop_sequence[row]), headsigns[order[row]])
+
+    def nextDepartures(self, stop_id, t, n=5, until=None):
+        """
+        Find the next departures from a stop by predicted departure time.
+
+        Args:
+            stop_id (str): The ID of the stop.
+            t (int or str): The time as seconds since midnight of the service date or as a GTFS time.
+            n (int): The maximum number of departures (optional, default is 5).
+            until (int or str): Only return departures predicted before this time (optional, default is None).
+
+        Returns:
+            list: PredictedDeparture tuples at or after t, earliest first; empty if the stop is not
+                indexed or update() was not called yet.
+        """
+        boards = self._boards
+        code = self.interner.lookup(stop_id)
+        if boards is None or code < 0 or code + 1 >= len(boards[1]):
+            return []
+        predictions, starts = boards[0], boards[1]
+        t = parseTime(t) if isinstance(t, str) else t
+        departures = predictions.departure[starts[code]:starts[code + 1]]
+        start = int(np.searchsorted(departures, t))
+        end = min(start + n, len(departures))
+        if until is not None:
+            until = parseTime(until) if isinstance(until, str) else until
+            end = max(start, min(end, int(np.searchsorted(departures, until))))
+        return [self._departure(boards, int(starts[code]) + row) for row in range(start, end)]
+
+    def nextDeparturesMany(self, stop_ids, t, n=5, until=None):
+        """
+        Batch version of nextDepartures().
+
+        Args:
+            stop_ids (iterable): The IDs of the stops.
+            t (int or str): The time as seconds since midnight of the service date or as a GTFS time.
+            n (int): The maximum number of departures per stop (optional, default is 5).
+            until (int or str): Only return departures predicted before this time (optional, default is None).
+
+        Returns:
+            dict: The nextDepartures() result of every stop.
+        """
+        return {stop_id: self.nextDepartures(stop_id, t, n, until) for stop_id in stop_ids}
+
+    def mergedDepartures(self, stop_ids, t, n=5, until=None):
+        """
+        Find the next departures from a group of stops, e.g. all platforms of a station.
+
+        Args:
+            stop_ids (iterable): The IDs of the stops.
+            t (int or str): The time as seconds since midnight of the service date or as a GTFS time.
+            n (int): The maximum number of departures (optional, default is 5).
+            until (int or str): Only return departures predicted before this time (optional, default is None).
+
+        Returns:
+            list: PredictedDeparture tuples of all the stops, earliest first.
+        """
+        departures = [departure for stop_id in dict.fromkeys(stop_ids)
+                      for departure in self.nextDepartures(stop_id, t, n, until)]
+        departures.sort(key=lambda departure: departure.departure)
+        return departures[:n]
@@ -34,3 +34,37 @@ class NotFoundError(GolemioClientError):
 
     def __init__(self, message):
         super().__init__(message)
+
+
+class RateLimitedError(GolemioClientError):
+    """
+    Exception raised when receiving a 429 - Too Many Requests error.
+    """
+
+    def __init__(self, message, retry_after=None):
+        """
+        Initialize a new instance of RateLimitedError.
+
+        Args:
+            message (str): The error message.
+            retry_after (float): Seconds the server asked to wait before retrying (optional, default is None).
+        """
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+class ServerError(GolemioClientError):
+    """
+    Exception raised when receiving a 5xx server error.
+    """
+
+    def __init__(self, message, status_code=None):
+        """
+        Initialize a new instance of ServerError.
+
+        Args:
+            message (str): The error message.
+            status_code (int): The HTTP status code (optional, default is None).
+        """
+        self.status_code = status_code
+        super().__init__(message)
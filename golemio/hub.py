@@ -0,0 +1,306 @@
+import asyncio
+from .polling import _Poller
+
+try:
+    # pip install gtfs-realtime-bindings
+    from google.transit import gtfs_realtime_pb2
+except ImportError:
+    gtfs_realtime_pb2 = None
+
+# Feed names and the GolemioClient methods downloading them
+FEEDS = {
+    'vehicle_positions': 'getVehiclePositionsProtobuf',
+    'trip_updates': 'getTripUpdatesProtobuf',
+    'alerts': 'getAlertsProtobuf',
+    'pid_feed': 'getPidFeedProtobuf',
+}
+
+
+def _entityKeys(entity):
+    """
+    Collect the route, trip and stop IDs a feed entity refers to.
+
+    Returns:
+        tuple: (route IDs, trip IDs, stop IDs) sets.
+    """
+    routes, trips, stops = set(), set(), set()
+    if entity.HasField('vehicle'):
+        vehicle = entity.vehicle
+        routes.add(vehicle.trip.route_id)
+        trips.add(vehicle.trip.trip_id)
+        stops.add(vehicle.stop_id)
+    if entity.HasField('trip_update'):
+        update = entity.trip_update
+        routes.add(update.trip.route_id)
+        trips.add(update.trip.trip_id)
+        stops.update(stop_time.stop_id for stop_time in update.stop_time_update)
+    if entity.HasField('alert'):
+        for informed in entity.alert.informed_entity:
+            routes.add(informed.route_id or informed.trip.route_id)
+            trips.add(informed.trip.trip_id)
+            stops.add(informed.stop_id)
+    for keys in (routes, trips, stops):
+        keys.discard('')
+    return routes, trips, stops
+
+
+class FeedUpdate(object):
+    """
+    One poll of a feed as delivered to a subscriber.
+
+    Attributes:
+        feed (str): The feed name, e.g. 'vehicle_positions'.
+        timestamp (int): The POSIX time of the feed header.
+        entities (list): The FeedEntity messages matching the subscriber's filters.
+    """
+
+    def __init__(self, feed, timestamp, entities):
+        self.feed = feed
+        self.timestamp = timestamp
+        self.entities = entities
+
+    def __repr__(self):
+        return f'FeedUpdate({self.feed!r}, timestamp={self.timestamp}, entities={len(self.entities)})'
+
+
+class Subscription(object):
+    """
+    A subscriber of a RealtimeHub feed with a bounded, drop-oldest buffer.
+
+    Iterate over it with `async for`, or pass a callback to RealtimeHub.subscribe.
+    """
+
+    def __init__(self, hub, feed, routes=None, trips=None, stops=None, maxsize=16, callback=None):
+        self.hub = hub
+        self.feed = feed
+        self.routes = self._asSet(routes)
+        self.trips = self._asSet(trips)
+        self.stops = self._asSet(stops)
+        self.callback = callback
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+        self._queue = asyncio.Queue(maxsize)
+        self._task = None
+
+    def _asSet(self, values):
+        if values is None:
+            return None
+        return {values} if isinstance(values, str) else set(values)
+
+    def matches(self, keys):
+        """
+        Check whether an entity passes the filters: every given filter has to match at least one ID.
+
+        Args:
+            keys (tuple): The (route IDs, trip IDs, stop IDs) of the entity.
+
+        Returns:
+            bool: True if the entity matches.
+        """
+        routes, trips, stops = keys
+        return ((self.routes is None or not self.routes.isdisjoint(routes)) and
+                (self.trips is None or not self.trips.isdisjoint(trips)) and
+                (self.stops is None or not self.stops.isdisjoint(stops)))
+
+    def _put(self, update):
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(update)
+
+    async def get(self):
+        """
+        Wait for the next update.
+
+        Returns:
+            FeedUpdate: The oldest buffered update, or None once the subscription is closed.
+        """
+        if self.closed and self._queue.empty():
+            return None
+        update = await self._queue.get()
+        if update is None:
+            return None
+        self.delivered += 1
+        return update
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        update = await self.get()
+        if update is None:
+            raise StopAsyncIteration
+        return update
+
+    async def _run(self):
+        async for update in self:
+            try:
+                result = self.callback(update)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                self.hub.errors += 1
+                self.hub.last_error = e
+
+    def close(self):
+        """
+        Stop receiving updates; the buffered updates can still be read.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        self.hub._unsubscribe(self)
+        # Wake up a reader waiting on an empty queue
+        if self._queue.empty():
+            self._queue.put_nowait(None)
+        if self._task is not None:
+            self._task.cancel()
+
+
+class RealtimeHub(_Poller):
+    """
+    Polls the GTFS Realtime feeds once per interval and fans every parsed feed out to any number of
+    in-process subscribers.
+
+    Only feeds with at least one subscriber are polled, so the upstream load does not depend on the
+    number of consumers. Works with GolemioClient (downloads run in the default executor) and
+    AsyncGolemioClient, and must be started inside a running event loop.
+    """
+
+    def __init__(self, client, interval=10):
+        """
+        Initialize a new instance of RealtimeHub.
+
+        Args:
+            client (GolemioClient or AsyncGolemioClient): The client used to download the feeds.
+            interval (float): Seconds between polls of each feed (optional, default is 10).
+
+        Raises:
+            ImportError: If gtfs-realtime-bindings is not installed.
+        """
+        if gtfs_realtime_pb2 is None:
+            raise ImportError('RealtimeHub requires gtfs-realtime-bindings (pip install gtfs-realtime-bindings).')
+        super().__init__(client)
+        self.interval = interval
+        self.polls = 0
+        self.errors = 0
+        self.last_error = None
+        self._subscriptions = {feed: [] for feed in FEEDS}
+        self._latest = {}
+
+    def subscribe(self, feed, routes=None, trips=None, stops=None, maxsize=16, callback=None):
+        """
+        Subscribe to a feed. The latest update, if any, is delivered right away.
+
+        Args:
+            feed (str): The feed name: 'vehicle_positions', 'trip_updates', 'alerts' or 'pid_feed'.
+            routes (str or iterable): Only deliver entities of these route IDs (optional, default is None).
+            trips (str or iterable): Only deliver entities of these trip IDs (optional, default is None).
+            stops (str or iterable): Only deliver entities referring to these stop IDs (optional, default is None).
+            maxsize (int): The number of buffered updates; the oldest is dropped when a new one arrives
+                (optional, default is 16).
+            callback (callable): Function or coroutine function called with every update instead of
+                iterating over the subscription (optional, default is None).
+
+        Returns:
+            Subscription: The subscription.
+
+        Raises:
+            ValueError: If the feed name is unknown.
+        """
+        if feed not in FEEDS:
+            raise ValueError(f'Unknown feed {feed!r}, expected one of {", ".join(FEEDS)}.')
+        subscription = Subscription(self, feed, routes, trips, stops, maxsize, callback)
+        if callback is not None:
+            subscription._task = asyncio.ensure_future(subscription._run())
+        self._subscriptions[feed].append(subscription)
+        if feed in self._latest:
+            self._deliver(subscription, *self._latest[feed])
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        if subscription in self._subscriptions[subscription.feed]:
+            self._subscriptions[subscription.feed].remove(subscription)
+
+    def latest(self, feed):
+        """
+        Get the last parsed message of a feed.
+
+        Args:
+            feed (str): The feed name.
+
+        Returns:
+            gtfs_realtime_pb2.FeedMessage: The message, or None if the feed was not polled yet.
+        """
+        latest = self._latest.get(feed)
+        return latest[0] if latest is not None else None
+
+    async def stop(self):
+        """
+        Stop polling and close all subscriptions.
+        """
+        await super().stop()
+        for subscriptions in self._subscriptions.values():
+            for subscription in list(subscriptions):
+                subscription.close()
+
+    async def poll(self, feed):
+        """
+        Download and parse a feed once and publish it to its subscribers.
+
+        An update is only published when the feed header timestamp changed since the last poll.
+
+        Args:
+            feed (str): The feed name.
+
+        Returns:
+            bool: True if a new update was published.
+        """
+        message = gtfs_realtime_pb2.FeedMessage()
+        message.ParseFromString(await self._download(getattr(self.client, FEEDS[feed])))
+        self.polls += 1
+        latest = self._latest.get(feed)
+        if latest is not None and latest[0].header.timestamp == message.header.timestamp:
+            return False
+        entities = [(entity, _entityKeys(entity)) for entity in message.entity]
+        self._latest[feed] = (message, entities)
+        for subscription in self._subscriptions[feed]:
+            self._deliver(subscription, message, entities)
+        return True
+
+    def _deliver(self, subscription, message, entities):
+        if subscription.routes is None and subscription.trips is None and subscription.stops is None:
+            matching = [entity for entity, _ in entities]
+        else:
+            matching = [entity for entity, keys in entities if subscription.matches(keys)]
+        subscription._put(FeedUpdate(subscription.feed, message.header.timestamp, matching))
+
+    def _keys(self):
+        return FEEDS
+
+    async def _tick(self, feed):
+        if self._subscriptions[feed]:
+            await self.poll(feed)
+
+    def _interval(self, feed):
+        return self.interval
+
+    def _failed(self, feed, error):
+        self.errors += 1
+        self.last_error = error
+
+    def stats(self):
+        """
+        Get the hub statistics.
+
+        Returns:
+            dict: polls, errors, and the number of subscribers and dropped updates per feed.
+        """
+        return {
+            'polls': self.polls,
+            'errors': self.errors,
+            'subscribers': {feed: len(subscriptions) for feed, subscriptions in self._subscriptions.items()},
+            'dropped': {feed: sum(subscription.dropped for subscription in subscriptions)
+                        for feed, subscriptions in self._subscriptions.items()},
+        }
@@ -0,0 +1,379 @@
+import bisect
+import re
+import threading
+import time
+from collections import Counter
+
+# Concrete API paths are grouped under these templates, in order; anything else is its own endpoint
+ENDPOINT_TEMPLATES = (
+    (re.compile(r'^/gtfs/(routes|trips|shapes|stops)/[^/]+$'), r'/gtfs/\1/{id}'),
+    (re.compile(r'^/gtfs/stoptimes/[^/]+$'), '/gtfs/stoptimes/{id}'),
+)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def endpointFor(path):
+    """
+    Map an API path to its endpoint template, e.g. '/gtfs/trips/123' to '/gtfs/trips/{id}'.
+
+    Args:
+        path (str): The API path.
+
+    Returns:
+        str: The endpoint template.
+    """
+    for pattern, template in ENDPOINT_TEMPLATES:
+        if pattern.match(path):
+            return pattern.sub(template, path)
+    return path
+
+
+class Histogram(object):
+    """
+    Cumulative histogram with fixed bucket bounds, in the Prometheus sense.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        Get the cumulative bucket counts.
+
+        Returns:
+            list: (upper bound, count) pairs, the last bound being float('inf').
+        """
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class EndpointMetrics(object):
+    """
+    Metrics of one endpoint template.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.requests = 0
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.cache = Counter()
+        self.bytes = 0
+        self.latency = Histogram(buckets)
+        self.decode_time = Histogram(buckets)
+
+    def snapshot(self):
+        lookups = sum(self.cache.values())
+        return {
+            'requests': self.requests,
+            'statuses': dict(self.statuses),
+            'errors': dict(self.errors),
+            'bytes': self.bytes,
+            'latency': {'count': self.latency.count, 'sum': self.latency.sum,
+                        'buckets': self.latency.cumulative()},
+            'decode_time': {'count': self.decode_time.count, 'sum': self.decode_time.sum,
+                            'buckets': self.decode_time.cumulative()},
+            'cache': dict(self.cache),
+            'cache_hit_rate': self.cache['hit'] / lookups if lookups else 0.0,
+        }
+
+
+class _NullObservation(object):
+    """
+    Stand-in for RequestObservation when a client has no metrics attached.
+    """
+
+    def responded(self, status, size):
+        pass
+
+    def received(self, size):
+        pass
+
+    def cached(self, result):
+        pass
+
+    def decoded(self, seconds):
+        pass
+
+    def failed(self, error):
+        pass
+
+    def finish(self):
+        pass
+
+
+NULL_OBSERVATION = _NullObservation()
+
+
+class RequestObservation(object):
+    """
+    Measurements of a single _callApi call, recorded into Metrics by finish().
+    """
+
+    def __init__(self, metrics, path, url):
+        self.metrics = metrics
+        self.endpoint = endpointFor(path)
+        self.url = url
+        self.status = None
+        self.size = 0
+        self.latency = None
+        self.decode_time = None
+        self.cache = None
+        self.error = None
+        self._started = time.perf_counter()
+        for hook in metrics.pre_request_hooks:
+            hook(self.endpoint, url)
+
+    def responded(self, status, size):
+        """
+        Record the response of the server.
+
+        Args:
+            status (int): The HTTP status code.
+            size (int): The size of the response body in bytes.
+        """
+        self.latency = time.perf_counter() - self._started
+        self.status = status
+        self.size = size
+
+    def received(self, size):
+        """
+        Record the size of a streamed response body once it has been read.
+
+        Args:
+            size (int): The size of the response body in bytes.
+        """
+        self.size = size
+
+    def cached(self, result):
+        """
+        Record the outcome of the cache lookup.
+
+        Args:
+            result (str): 'hit', 'miss' or 'revalidated'.
+        """
+        self.cache = result
+
+    def decoded(self, seconds):
+        """
+        Record the time spent decoding the body.
+
+        Args:
+            seconds (float): The decode time.
+        """
+        self.decode_time = seconds
+
+    def failed(self, error):
+        """
+        Record the exception that ended the call.
+
+        Args:
+            error (Exception): The exception.
+        """
+        self.error = error
+
+    def finish(self):
+        """
+        Record the observation and run the post-request hooks.
+        """
+        self.metrics._record(self)
+        record = {
+            'endpoint': self.endpoint,
+            'url': self.url,
+            'status': self.status,
+            'latency': self.latency,
+            'bytes': self.size,
+            'decode_time': self.decode_time,
+            'cache': self.cache,
+            'error': self.error,
+        }
+        for hook in self.metrics.post_request_hooks:
+            hook(record)
+
+
+class Metrics(object):
+    """
+    Per-endpoint instrumentation of a GolemioClient: request counts by status code, latency
+    histograms, response bytes, decode time and cache hit rate, plus pre/post-request hooks.
+
+    Pass an instance as the `metrics` argument of GolemioClient or AsyncGolemioClient; one
+    instance may be shared by several clients.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Initialize a new instance of Metrics.
+
+        Args:
+            buckets (tuple): The upper bounds of the latency and decode time histogram buckets in seconds
+                (optional, default is DEFAULT_BUCKETS).
+        """
+        self.buckets = buckets
+        self.endpoints = {}
+        self.pre_request_hooks = []
+        self.post_request_hooks = []
+        self._lock = threading.Lock()
+
+    def addPreRequestHook(self, hook):
+        """
+        Register a callback run before every request as hook(endpoint, url).
+
+        Args:
+            hook (callable): The callback.
+        """
+        self.pre_request_hooks.append(hook)
+
+    def addPostRequestHook(self, hook):
+        """
+        Register a callback run after every request with a dict holding endpoint, url, status,
+        latency, bytes, decode_time, cache and error.
+
+        Args:
+            hook (callable): The callback.
+        """
+        self.post_request_hooks.append(hook)
+
+    def observe(self, path, url):
+        """
+        Start observing a request.
+
+        Args:
+            path (str): The API path.
+            url (str): The request URL.
+
+        Returns:
+            RequestObservation: The observation, to be finished by the caller.
+        """
+        return RequestObservation(self, path, url)
+
+    def _record(self, observation):
+        with self._lock:
+            endpoint = self.endpoints.get(observation.endpoint)
+            if endpoint is None:
+                endpoint = self.endpoints[observation.endpoint] = EndpointMetrics(self.buckets)
+            endpoint.requests += 1
+            if observation.status is not None:
+                endpoint.statuses[observation.status] += 1
+                endpoint.bytes += observation.size
+                endpoint.latency.observe(observation.latency)
+            if observation.decode_time is not None:
+                endpoint.decode_time.observe(observation.decode_time)
+            if observation.cache is not None:
+                endpoint.cache[observation.cache] += 1
+            if observation.error is not None:
+                endpoint.errors[type(observation.error).__name__] += 1
+
+    def snapshot(self):
+        """
+        Export the metrics as plain data.
+
+        Returns:
+            dict: The metrics of every endpoint template.
+        """
+        with self._lock:
+            return {name: endpoint.snapshot() for name, endpoint in self.endpoints.items()}
+
+    def reset(self):
+        """
+        Drop all recorded metrics.
+        """
+        with self._lock:
+            self.endpoints.clear()
+
+    def prometheus(self, prefix='golemio'):
+        """
+        Export the metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix (str): The metric name prefix (optional, default is 'golemio').
+
+        Returns:
+            str: The exposition text.
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def family(name, kind, help):
+            lines.append(f'# HELP {prefix}_{name} {help}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+
+        def label(value):
+            return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+        def histogram(name, key):
+            for endpoint, data in snapshot.items():
+                for bound, count in data[key]['buckets']:
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{prefix}_{name}_bucket{{endpoint="{label(endpoint)}",le="{le}"}} {count}')
+                lines.append(f'{prefix}_{name}_sum{{endpoint="{label(endpoint)}"}} {data[key]["sum"]}')
+                lines.append(f'{prefix}_{name}_count{{endpoint="{label(endpoint)}"}} {data[key]["count"]}')
+
+        family('requests_total', 'counter', 'API calls by endpoint and HTTP status code.')
+        for endpoint, data in snapshot.items():
+            for status, count in sorted(data['statuses'].items()):
+                lines.append(f'{prefix}_requests_total{{endpoint="{label(endpoint)}",status="{status}"}} {count}')
+            if data['cache'].get('hit'):
+                lines.append(f'{prefix}_requests_total{{endpoint="{label(endpoint)}",status="cached"}} '
+                             f'{data["cache"]["hit"]}')
+        family('errors_total', 'counter', 'API calls that raised, by endpoint and exception type.')
+        for endpoint, data in snapshot.items():
+            for error, count in sorted(data['errors'].items()):
+                lines.append(f'{prefix}_errors_total{{endpoint="{label(endpoint)}",error="{error}"}} {count}')
+        family('response_bytes_total', 'counter', 'Response body bytes received, by endpoint.')
+        for endpoint, data in snapshot.items():
+            lines.append(f'{prefix}_response_bytes_total{{endpoint="{label(endpoint)}"}} {data["bytes"]}')
+        family('cache_lookups_total', 'counter', 'Response cache lookups by endpoint and result.')
+        for endpoint, data in snapshot.items():
+            for result, count in sorted(data['cache'].items()):
+                lines.append(f'{prefix}_cache_lookups_total{{endpoint="{label(endpoint)}",result="{result}"}} '
+                             f'{count}')
+        family('request_duration_seconds', 'histogram', 'Time until the response was received, by endpoint.')
+        histogram('request_duration_seconds', 'latency')
+        family('decode_duration_seconds', 'histogram', 'Time spent decoding response bodies, by endpoint.')
+        histogram('decode_duration_seconds', 'decode_time')
+        return '\n'.join(lines) + '\n'
+
+    def servePrometheus(self, port=9464, host='127.0.0.1'):
+        """
+        Serve prometheus() over HTTP from a background thread.
+
+        Args:
+            port (int): The port, 0 picks a free one (optional, default is 9464).
+            host (str): The interface to bind (optional, default is '127.0.0.1').
+
+        Returns:
+            http.server.ThreadingHTTPServer: The running server; call shutdown() to stop it.
+        """
+        # Imported here, the client imports this module and most programs never serve metrics
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
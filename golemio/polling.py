@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+
+class _Poller(object):
+    """
+    Base class of the background pollers: one asyncio task per key polls it forever.
+
+    Subclasses implement `_keys()` returning the keys to poll once started, `_tick(key)` polling a
+    key once, `_interval(key)` returning the seconds between the starts of two polls, and
+    `_failed(key, error)` recording an error raised by `_tick`. Works with GolemioClient (downloads
+    run in the default executor) and AsyncGolemioClient, and must be started inside a running
+    event loop.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._tasks = {}
+        self._running = False
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    def start(self):
+        """
+        Start polling in background tasks of the running event loop.
+        """
+        self._running = True
+        for key in self._keys():
+            self._startTask(key)
+
+    async def stop(self):
+        """
+        Stop polling.
+        """
+        self._running = False
+        tasks, self._tasks = list(self._tasks.values()), {}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _startTask(self, key):
+        if self._running and key not in self._tasks:
+            self._tasks[key] = asyncio.ensure_future(self._pollForever(key))
+
+    def _cancelTask(self, key):
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    async def _download(self, getter, *args):
+        """
+        Call a client getter without blocking the event loop.
+
+        Args:
+            getter (callable): A method of the client, or a function or coroutine function.
+            *args: The arguments of the getter.
+
+        Returns:
+            The result of the getter.
+        """
+        # The getters of AsyncGolemioClient return awaitables; the others block and run in the executor
+        if asyncio.iscoroutinefunction(getter) or asyncio.iscoroutinefunction(getattr(self.client, '_callApi', None)):
+            return await getter(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, getter, *args)
+
+    async def _pollForever(self, key):
+        while True:
+            started = time.monotonic()
+            try:
+                await self._tick(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failed(key, e)
+            await asyncio.sleep(max(0.0, self._interval(key) - (time.monotonic() - started)))
@@ -0,0 +1,243 @@
+import threading
+import time
+from .client import GolemioClient
+from .errors import GolemioClientError
+from .ratelimit import RetryPolicy, TokenBucket, parseRetryAfter
+
+
+class _Member(object):
+    """
+    One API key of a GolemioClientPool with its client and bookkeeping.
+    """
+
+    def __init__(self, api_key, client):
+        self.api_key = api_key
+        self.client = client
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.unauthorized = 0
+        self.benched_until = 0.0
+        self.added = time.monotonic()
+        self.removed = False
+
+    def load(self):
+        # Requests in flight plus the ones queued behind the rate budget
+        limiter = self.client.rate_limiter
+        return self.in_flight + (limiter.backlog() * limiter.rate if limiter is not None else 0.0)
+
+
+class GolemioClientPool(GolemioClient):
+    """
+    GolemioClient spreading its requests over several API keys.
+
+    Every key has its own transport and, with `rate`, its own TokenBucket. Each request goes to the
+    least loaded key that is not benched: a key is taken out of rotation for the Retry-After of a
+    429 (or `bench_time`) and for `unauthorized_time` after a 401, and the request is retried on
+    another key. While every key is benched, requests wait for the first one to come back. The
+    response cache, metrics and typed records are shared by all keys, so the pool can be used
+    wherever a GolemioClient is expected.
+    """
+
+    def __init__(self, api_keys, rate=None, capacity=None, bench_time=30, unauthorized_time=600, api_version='v2',
+                 ssl=True, debug=False, cache=None, retry=None, pool_size=10, metrics=None, typed=False,
+                 transport=None):
+        """
+        Initialize a new instance of GolemioClientPool.
+
+        Args:
+            api_keys (iterable): The API keys.
+            rate (float): The sustained number of requests per second allowed per key, None disables rate
+                limiting (optional, default is None).
+            capacity (int): The burst size per key (optional, default is max(1, rate)).
+            bench_time (float): Seconds a key sits out after a 429 without Retry-After (optional, default is 30).
+            unauthorized_time (float): Seconds a key sits out after a 401 (optional, default is 600).
+            api_version (str): The API version to use (optional, default is 'v2').
+            ssl (bool): Flag indicating whether to use SSL (optional, default is True).
+            debug (bool): Flag indicating whether to use the debug mode (optional, default is False).
+            cache (ResponseCache): The response cache shared by all keys (optional, default is None).
+            retry (RetryPolicy): The retry policy for 5xx and connection errors; 429 responses move on to
+                another key instead (optional, default is None).
+            pool_size (int): The number of keep-alive connections kept per key (optional, default is 10).
+            metrics (Metrics): The per-endpoint instrumentation (optional, default is None).
+            typed (bool): Flag indicating whether records are returned as compact record classes
+                (optional, default is False).
+            transport (callable): Called without arguments to create the transport of every key, e.g.
+                HttpxTransport (optional, default is a RequestsTransport with `pool_size` connections).
+
+        Raises:
+            ValueError: If no API key is given.
+        """
+        self._members = []
+        self._lock = threading.Lock()
+        self._next = 0
+        # Every key has its own transport, so the pool itself has none
+        self.transport = None
+        self.session = None
+        self.pool_size = pool_size
+        self.api_key = None
+        self.api_version = api_version
+        self.base_url = 'rabin.golemio.cz' if debug else 'api.golemio.cz'
+        self.protocol = 'https' if ssl else 'http'
+        self.cache = cache
+        self.rate_limiter = None
+        self.retry = retry
+        self.metrics = metrics
+        self.typed = typed
+        self.rate = rate
+        self.capacity = capacity
+        self.bench_time = bench_time
+        self.unauthorized_time = unauthorized_time
+        self.key_pool_size = pool_size
+        self.key_transport = transport
+        for api_key in api_keys:
+            self.addKey(api_key)
+        if not self._members:
+            raise ValueError('GolemioClientPool needs at least one API key.')
+
+    def updateApiKey(self, api_key):
+        """
+        Not supported: a pool holds one transport per key, use addKey and removeKey.
+
+        Raises:
+            TypeError: Always.
+        """
+        raise TypeError('GolemioClientPool holds one transport per key, use addKey and removeKey.')
+
+    def addKey(self, api_key):
+        """
+        Add an API key to the rotation.
+
+        Args:
+            api_key (str): The API key.
+        """
+        retry = None
+        if self.retry is not None:
+            # Throttled requests are moved to another key rather than retried on the same one
+            retry = RetryPolicy(self.retry.max_retries, self.retry.backoff, self.retry.max_backoff,
+                                tuple(status for status in self.retry.retry_statuses if status != 429))
+        rate_limiter = TokenBucket(self.rate, self.capacity) if self.rate else None
+        transport = self.key_transport() if self.key_transport is not None else None
+        client = GolemioClient(api_key=api_key, rate_limiter=rate_limiter, retry=retry, pool_size=self.key_pool_size,
+                               transport=transport)
+        with self._lock:
+            self._members.append(_Member(api_key, client))
+            self.pool_size = self.key_pool_size * len(self._members)
+
+    def removeKey(self, api_key):
+        """
+        Remove an API key from the rotation and close its transport once the requests in flight on it complete.
+
+        Args:
+            api_key (str): The API key.
+        """
+        with self._lock:
+            removed = [member for member in self._members if member.api_key == api_key]
+            self._members = [member for member in self._members if member.api_key != api_key]
+            self.pool_size = self.key_pool_size * max(1, len(self._members))
+            idle = []
+            for member in removed:
+                member.removed = True
+                if not member.in_flight:
+                    idle.append(member)
+        for member in idle:
+            member.client.close()
+
+    def close(self):
+        """
+        Close the transports of all keys.
+        """
+        for member in self._members:
+            member.client.close()
+
+    def _acquire(self, exclude):
+        """
+        Pick the least loaded key that is not benched, waiting for the one back soonest if all are.
+
+        Raises:
+            GolemioClientError: If the pool has no key left to try.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                members = self._members
+                if not members:
+                    raise GolemioClientError('The pool has no API keys, add one with addKey.')
+                # Start the scan at a rotating position so that equally loaded keys take turns
+                start = self._next % len(members)
+                self._next += 1
+                candidates = [member for member in members[start:] + members[:start] if member not in exclude]
+                if not candidates:
+                    raise GolemioClientError('Every API key of the pool was tried.')
+                available = [member for member in candidates if member.benched_until <= now]
+                if available:
+                    member = min(available, key=_Member.load)
+                    member.in_flight += 1
+                    member.requests += 1
+                    return member
+                wait = min(member.benched_until for member in candidates) - now
+            time.sleep(wait)
+
+    def _release(self, member):
+        with self._lock:
+            member.in_flight -= 1
+            closing = member.removed and not member.in_flight
+        if closing:
+            member.client.close()
+
+    def _send(self, url, headers={}, stream=False):
+        """
+        Send a GET request with the least loaded key, moving on to the next key on 401 and 429.
+
+        Args:
+            url (str): The request URL.
+            headers (dict): Extra request headers (optional, default is an empty dictionary).
+            stream (bool): Flag indicating whether to defer downloading the body (optional, default is False).
+
+        Returns:
+            The last response received from the transport.
+        """
+        tried = set()
+        while True:
+            member = self._acquire(tried)
+            tried.add(member)
+            try:
+                response = member.client._send(url, headers, stream)
+            finally:
+                self._release(member)
+            if response.status_code not in (401, 429):
+                return response
+            with self._lock:
+                if response.status_code == 429:
+                    member.throttled += 1
+                    pause = parseRetryAfter(response.headers.get('Retry-After')) or self.bench_time
+                else:
+                    member.unauthorized += 1
+                    pause = self.unauthorized_time
+                member.benched_until = max(member.benched_until, time.monotonic() + pause)
+                retry = any(other not in tried and other.benched_until <= time.monotonic()
+                            for other in self._members)
+            if not retry:
+                return response
+            response.close()
+
+    def stats(self):
+        """
+        Get the utilization of every key.
+
+        Returns:
+            list: A dict per key with the masked key, requests, requests in flight, 429 and 401 responses,
+                seconds left on the bench, and utilization, the share of the key's rate budget used since
+                it was added (None without a rate).
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                'key': '...' + member.api_key[-4:],
+                'requests': member.requests,
+                'in_flight': member.in_flight,
+                'throttled': member.throttled,
+                'unauthorized': member.unauthorized,
+                'benched': max(0.0, member.benched_until - now),
+                'utilization': member.requests / (self.rate * (now - member.added)) if self.rate else None,
+            } for member in self._members]
@@ -0,0 +1,174 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+def parseRetryAfter(value):
+    """
+    Parse a Retry-After header.
+
+    Args:
+        value (str): The header value, either delay seconds or an HTTP date.
+
+    Returns:
+        float: The delay in seconds, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket rate limiter that can be shared by threads and asyncio tasks.
+
+    Callers reserve a slot and then wait for it, either by blocking (acquire) or with
+    asyncio.sleep (acquireAsync), so all users of one bucket together never exceed `rate`
+    requests per second after an initial burst of `capacity`.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        Initialize a new instance of TokenBucket.
+
+        Args:
+            rate (float): The sustained number of requests per second.
+            capacity (int): The burst size (optional, default is max(1, rate)).
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, rate)
+        self._interval = 1.0 / rate
+        self._tat = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens=1):
+        """
+        Reserve tokens and return how long the caller has to wait before using them.
+
+        Args:
+            tokens (int): The number of tokens (optional, default is 1).
+
+        Returns:
+            float: The delay in seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            # Generic cell rate algorithm: _tat is when the bucket would be full again
+            self._tat = max(self._tat, now) + tokens * self._interval
+            return max(0.0, self._tat - now - self.capacity * self._interval)
+
+    def backlog(self):
+        """
+        Get how long a new reservation would have to wait, without reserving anything.
+
+        Returns:
+            float: The delay in seconds, 0 while the bucket has tokens left.
+        """
+        with self._lock:
+            return max(0.0, self._tat + self._interval - time.monotonic() - self.capacity * self._interval)
+
+    def acquire(self, tokens=1):
+        """
+        Block until tokens are available.
+
+        Args:
+            tokens (int): The number of tokens (optional, default is 1).
+        """
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def acquireAsync(self, tokens=1):
+        """
+        Wait without blocking the event loop until tokens are available.
+
+        Args:
+            tokens (int): The number of tokens (optional, default is 1).
+        """
+        # Imported here: asyncio is already loaded when this runs, but not by sync-only programs
+        import asyncio
+        delay = self.reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds):
+        """
+        Hold back all users of the bucket, e.g. for the Retry-After of a 429 response.
+
+        Args:
+            seconds (float): The pause in seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tat = max(self._tat, now + seconds + (self.capacity - 1) * self._interval)
+
+
+class RetryPolicy(object):
+    """
+    Retry policy for idempotent GET requests: jittered exponential backoff that honors Retry-After.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, max_retries=3, backoff=0.5, max_backoff=30, retry_statuses=RETRY_STATUSES):
+        """
+        Initialize a new instance of RetryPolicy.
+
+        Args:
+            max_retries (int): The maximum number of retries per request (optional, default is 3).
+            backoff (float): The base delay in seconds, doubled on every retry (optional, default is 0.5).
+            max_backoff (float): The maximum delay in seconds (optional, default is 30).
+            retry_statuses (tuple): The HTTP status codes that are retried (optional, default is RETRY_STATUSES).
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+
+    def canRetry(self, attempt):
+        """
+        Check whether another retry is allowed.
+
+        Args:
+            attempt (int): The number of retries made so far.
+
+        Returns:
+            bool: True if the request may be retried.
+        """
+        return attempt < self.max_retries
+
+    def shouldRetry(self, status_code, attempt):
+        """
+        Check whether a response should be retried.
+
+        Args:
+            status_code (int): The HTTP status code.
+            attempt (int): The number of retries made so far.
+
+        Returns:
+            bool: True if the request should be retried.
+        """
+        return status_code in self.retry_statuses and self.canRetry(attempt)
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Compute the delay before the next retry.
+
+        Args:
+            attempt (int): The number of retries made so far.
+            retry_after (float): The Retry-After of the response in seconds (optional, default is None).
+
+        Returns:
+            float: The delay in seconds; Retry-After if given, otherwise "full jitter" exponential backoff.
+        """
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
@@ -0,0 +1,418 @@
+import gc
+import json
+import sys
+from itertools import compress, repeat
+from operator import itemgetter, not_
+
+try:
+    # pip install orjson
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _GcPaused(object):
+    """
+    Pause the cyclic garbage collector while building objects that cannot form reference cycles, such as
+    a decoded JSON document or records; it would otherwise traverse them again and again while they are
+    allocated, only to find nothing to collect.
+    """
+
+    def __enter__(self):
+        self.enabled = gc.isenabled()
+        gc.disable()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.enabled:
+            gc.enable()
+
+
+def loadJson(body):
+    """
+    Decode a JSON document with orjson when it is installed, otherwise with the standard library.
+
+    Args:
+        body (bytes or str): The JSON document.
+
+    Returns:
+        The decoded document.
+    """
+    with _GcPaused():
+        if orjson is not None:
+            return orjson.loads(body)
+        return json.loads(body)
+
+
+def dumpJson(data):
+    """
+    Encode data as compact JSON with orjson when it is installed, otherwise with the standard library.
+
+    Args:
+        data: The data to encode.
+
+    Returns:
+        bytes: The JSON document.
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+# Read in place of a missing nested member
+_EMPTY = {}
+
+
+def _interned(values):
+    values = list(values)
+    try:
+        return list(map(sys.intern, values))
+    except TypeError:
+        # Not only strings, e.g. None for a missing member
+        return [sys.intern(value) if value.__class__ is str else value for value in values]
+
+
+def _compileRead(fields):
+    """
+    Build the function reading the FIELDS of a record class out of a list of decoded API records.
+
+    The paths are grouped into a tree of (leaves, branches, mapped keys) per nested dict. Every field
+    is read from all the records at once with map() over dict.get, so the per-record work runs in C,
+    and nothing is copied. Only the records holding members that no field maps are walked in Python,
+    to collect those members.
+
+    Returns:
+        callable: Called with the list of dicts and the columns already read by attribute name, which are
+            not read again. Returns the columns and the unmapped members of every record (None for a record
+            without any, or when no record has any).
+    """
+    tree = {}
+    for name, path, intern in fields:
+        node = tree
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = (name, intern)
+
+    def freeze(node):
+        leaves = tuple((key,) + value for key, value in node.items() if isinstance(value, tuple))
+        branches = tuple((key, freeze(value)) for key, value in node.items() if isinstance(value, dict))
+        return leaves, branches, frozenset(node)
+
+    get = dict.get
+
+    def columns(node, dicts, result, unmapped):
+        leaves, branches, mapped = node
+        n = len(dicts)
+        for key, name, intern in leaves:
+            if name in result:
+                continue
+            values = map(get, dicts, repeat(key, n))
+            result[name] = _interned(values) if intern else list(values)
+        if not mapped.issuperset(set().union(*dicts)):
+            unmapped.update(compress(range(n), map(not_, map(mapped.issuperset, dicts))))
+        for key, child in branches:
+            values = list(map(get, dicts, repeat(key, n), repeat(_EMPTY, n)))
+            if not all(map(isinstance, values, repeat(dict, n))):
+                # A member that is not an object, e.g. null, is kept as it is
+                unmapped.update(i for i, value in enumerate(values) if value.__class__ is not dict)
+                values = [value if value.__class__ is dict else _EMPTY for value in values]
+            columns(child, values, result, unmapped)
+
+    def rest(node, data):
+        _, branches, mapped = node
+        extra = {key: value for key, value in data.items() if key not in mapped}
+        for key, child in branches:
+            value = data.get(key, _EMPTY)
+            if value.__class__ is dict:
+                value = rest(child, value)
+                if not value:
+                    continue
+            extra[key] = value
+        return extra
+
+    root = freeze(tree)
+
+    def read(dicts, result):
+        unmapped = set()
+        columns(root, dicts, result, unmapped)
+        extras = None
+        if unmapped:
+            extras = [None] * len(dicts)
+            for i in unmapped:
+                extra = rest(root, dicts[i])
+                if extra:
+                    extras[i] = _Extra(dumpJson(extra))
+        return result, extras
+    return read
+
+
+class _Extra(object):
+    """
+    The members of an API record that are not attributes, as compact JSON decoded on first access.
+    """
+
+    __slots__ = ('json', 'data')
+
+    def __init__(self, json):
+        self.json = json
+        self.data = None
+
+    def __eq__(self, other):
+        return type(other) is _Extra and self.json == other.json
+
+
+class _Record(tuple):
+    """
+    Base class of the compact records returned by a typed client.
+
+    FIELDS lists (attribute, path, intern) triples: path is the sequence of keys leading to the
+    value in the API response (below 'properties' for GeoJSON features) and intern marks IDs and
+    other often repeated strings that are shared between records with sys.intern. A record is a
+    tuple of the field values followed by the members that are not mapped to an attribute, which
+    are kept as compact JSON and decoded the first time `extra` is read. The attributes are read
+    with itemgetter, and records are built a whole response at a time (see fromJsonList).
+    """
+
+    __slots__ = ()
+
+    FIELDS = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for i, (name, _, _) in enumerate(cls.FIELDS):
+            setattr(cls, name, property(itemgetter(i)))
+        cls._read = staticmethod(_compileRead(cls.FIELDS))
+
+    def __new__(cls, **fields):
+        return tuple.__new__(cls, [fields.get(name) for name, _, _ in cls.FIELDS] + [None])
+
+    def __reduce__(self):
+        return tuple.__new__, (type(self), tuple(self))
+
+    @classmethod
+    def fromJson(cls, data):
+        """
+        Build a record from a decoded API record; `data` is left unchanged.
+
+        Args:
+            data (dict): The record, either a GeoJSON feature or a plain dict.
+
+        Returns:
+            _Record: The record.
+        """
+        return cls.fromJsonList([data])[0]
+
+    @classmethod
+    def fromJsonList(cls, items):
+        """
+        Build records from a list of decoded API records, column by column; `items` are left unchanged.
+
+        Args:
+            items (list): The records, either GeoJSON features or plain dicts.
+
+        Returns:
+            list: The records.
+        """
+        with _GcPaused():
+            return cls._fromJsonList(items)
+
+    @classmethod
+    def _fromJsonList(cls, items):
+        n = len(items)
+        if not n or 'properties' not in items[0]:
+            columns, extras = cls._read(items, {})
+        else:
+            try:
+                roots = list(map(itemgetter('properties'), items))
+            except KeyError:
+                roots = [item.get('properties') for item in items]
+            if not all(map(isinstance, roots, repeat(dict, n))):
+                roots = [root if root.__class__ is dict else _EMPTY for root in roots]
+            coordinates = cls._readCoordinates(items) if hasattr(cls, 'lat') and hasattr(cls, 'lon') else None
+            columns, extras = cls._read(roots, coordinates or {})
+            if coordinates == {}:
+                # Not all points: override lat and lon one feature at a time
+                lon, lat = columns['lon'], columns['lat']
+                for i, item in enumerate(items):
+                    point = (item.get('geometry') or _EMPTY).get('coordinates')
+                    if point:
+                        lon[i], lat[i] = point[0], point[1]
+        values = [columns[name] for name, _, _ in cls.FIELDS]
+        values.append(extras if extras is not None else repeat(None, n))
+        return list(map(tuple.__new__, repeat(cls, n), zip(*values)))
+
+    @staticmethod
+    def _readCoordinates(items):
+        # The lon and lat columns of point geometries, which override the properties, or {} for other geometries
+        try:
+            coordinates = list(map(itemgetter('coordinates'), map(itemgetter('geometry'), items)))
+            return {'lon': list(map(itemgetter(0), coordinates)), 'lat': list(map(itemgetter(1), coordinates))}
+        except (KeyError, TypeError, IndexError):
+            return {}
+
+    @property
+    def _extra(self):
+        return self[-1]
+
+    @property
+    def extra(self):
+        """
+        dict: The members of the API record that are not attributes, decoded on first access.
+        """
+        extra = self[-1]
+        if extra is None:
+            return {}
+        if extra.data is None:
+            extra.data = loadJson(extra.json)
+        return extra.data
+
+    def asDict(self):
+        """
+        Convert the record to a flat dict of its attributes and extra members.
+
+        Returns:
+            dict: The record.
+        """
+        data = {name: value for (name, _, _), value in zip(self.FIELDS, self)}
+        data.update(self.extra)
+        return data
+
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={value!r}' for (name, _, _), value in zip(self.FIELDS[:3], self))
+        return f'{type(self).__name__}({fields}, ...)'
+
+
+class Stop(_Record):
+    """
+    A stop of getGTFSAllStops.
+    """
+
+    FIELDS = (
+        ('stop_id', ('stop_id',), False),
+        ('stop_name', ('stop_name',), True),
+        ('lat', ('lat',), False),
+        ('lon', ('lon',), False),
+        ('platform_code', ('platform_code',), True),
+        ('zone_id', ('zone_id',), True),
+        ('parent_station', ('parent_station',), True),
+        ('location_type', ('location_type',), False),
+        ('wheelchair_boarding', ('wheelchair_boarding',), False),
+        ('level_id', ('level_id',), True),
+        ('asw_node', ('asw_id', 'node'), False),
+        ('asw_stop', ('asw_id', 'stop'), False),
+    )
+    __slots__ = ()
+
+
+class StopTime(_Record):
+    """
+    A stop time of getGTFSStopTimes; the stop of include_stop=True is in `extra`.
+    """
+
+    FIELDS = (
+        ('trip_id', ('trip_id',), True),
+        ('stop_id', ('stop_id',), True),
+        ('stop_sequence', ('stop_sequence',), False),
+        ('arrival_time', ('arrival_time',), True),
+        ('departure_time', ('departure_time',), True),
+        ('stop_headsign', ('stop_headsign',), True),
+        ('pickup_type', ('pickup_type',), False),
+        ('drop_off_type', ('drop_off_type',), False),
+        ('shape_dist_traveled', ('shape_dist_traveled',), False),
+        ('timepoint', ('timepoint',), False),
+    )
+    __slots__ = ()
+
+
+class Trip(_Record):
+    """
+    A trip of getGTFSTrips.
+    """
+
+    FIELDS = (
+        ('trip_id', ('trip_id',), False),
+        ('route_id', ('route_id',), True),
+        ('service_id', ('service_id',), True),
+        ('trip_headsign', ('trip_headsign',), True),
+        ('trip_short_name', ('trip_short_name',), True),
+        ('direction_id', ('direction_id',), False),
+        ('block_id', ('block_id',), True),
+        ('shape_id', ('shape_id',), True),
+        ('wheelchair_accessible', ('wheelchair_accessible',), False),
+        ('bikes_allowed', ('bikes_allowed',), False),
+        ('exceptional', ('exceptional',), False),
+    )
+    __slots__ = ()
+
+
+class VehiclePosition(_Record):
+    """
+    A vehicle position feature of getAllVehiclePositions, flattened.
+    """
+
+    FIELDS = (
+        ('trip_id', ('trip', 'gtfs', 'trip_id'), False),
+        ('route_id', ('trip', 'gtfs', 'route_id'), True),
+        ('route_short_name', ('trip', 'gtfs', 'route_short_name'), True),
+        ('route_type', ('trip', 'gtfs', 'route_type'), False),
+        ('trip_headsign', ('trip', 'gtfs', 'trip_headsign'), True),
+        ('vehicle_registration_number', ('trip', 'vehicle_registration_number'), False),
+        ('vehicle_type_id', ('trip', 'vehicle_type', 'id'), False),
+        ('vehicle_type_description_cs', ('trip', 'vehicle_type', 'description_cs'), True),
+        ('vehicle_type_description_en', ('trip', 'vehicle_type', 'description_en'), True),
+        ('agency_name_real', ('trip', 'agency_name', 'real'), True),
+        ('agency_name_scheduled', ('trip', 'agency_name', 'scheduled'), True),
+        ('trip_short_name', ('trip', 'gtfs', 'trip_short_name'), True),
+        ('cis_line_id', ('trip', 'cis', 'line_id'), True),
+        ('cis_trip_number', ('trip', 'cis', 'trip_number'), False),
+        ('origin_route_name', ('trip', 'origin_route_name'), True),
+        ('sequence_id', ('trip', 'sequence_id'), False),
+        ('start_timestamp', ('trip', 'start_timestamp'), True),
+        ('wheelchair_accessible', ('trip', 'wheelchair_accessible'), False),
+        ('air_conditioned', ('trip', 'air_conditioned'), False),
+        ('lat', ('lat',), False),
+        ('lon', ('lon',), False),
+        ('bearing', ('last_position', 'bearing'), False),
+        ('speed', ('last_position', 'speed'), False),
+        ('delay', ('last_position', 'delay', 'actual'), False),
+        ('delay_last_stop_arrival', ('last_position', 'delay', 'last_stop_arrival'), False),
+        ('delay_last_stop_departure', ('last_position', 'delay', 'last_stop_departure'), False),
+        ('origin_timestamp', ('last_position', 'origin_timestamp'), False),
+        ('state_position', ('last_position', 'state_position'), True),
+        ('tracking', ('last_position', 'tracking'), False),
+        ('is_canceled', ('last_position', 'is_canceled'), False),
+        ('last_stop_id', ('last_position', 'last_stop', 'id'), True),
+        ('last_stop_sequence', ('last_position', 'last_stop', 'sequence'), False),
+        ('last_stop_arrival_time', ('last_position', 'last_stop', 'arrival_time'), True),
+        ('last_stop_departure_time', ('last_position', 'last_stop', 'departure_time'), True),
+        ('next_stop_id', ('last_position', 'next_stop', 'id'), True),
+        ('next_stop_sequence', ('last_position', 'next_stop', 'sequence'), False),
+        ('next_stop_arrival_time', ('last_position', 'next_stop', 'arrival_time'), True),
+        ('next_stop_departure_time', ('last_position', 'next_stop', 'departure_time'), True),
+        ('shape_dist_traveled', ('last_position', 'shape_dist_traveled'), False),
+    )
+    __slots__ = ()
+
+
+def toRecords(record_type, data):
+    """
+    Convert a decoded API response to records.
+
+    Args:
+        record_type (type): The record class, e.g. Stop.
+        data (dict or list): The response; a GeoJSON FeatureCollection or a list of records.
+
+    Returns:
+        list: The records, or `data` unchanged if it holds no records.
+    """
+    if isinstance(data, dict):
+        if 'features' not in data:
+            return data
+        data = data['features']
+    return record_type.fromJsonList(data if isinstance(data, list) else list(data))
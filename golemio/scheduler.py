@@ -0,0 +1,239 @@
+import asyncio
+import hashlib
+import time
+from .polling import _Poller
+from .records import dumpJson
+
+try:
+    # pip install gtfs-realtime-bindings
+    from google.transit import gtfs_realtime_pb2
+except ImportError:
+    gtfs_realtime_pb2 = None
+
+# Endpoint names and their (GolemioClient getter, format); protobuf feeds are GTFS Realtime FeedMessages
+ENDPOINTS = {
+    'alerts': ('getAlertsProtobuf', 'protobuf'),
+    'pid_feed': ('getPidFeedProtobuf', 'protobuf'),
+    'trip_updates': ('getTripUpdatesProtobuf', 'protobuf'),
+    'vehicle_positions': ('getVehiclePositionsProtobuf', 'protobuf'),
+    'infotexts': ('getInfoTexts', 'json'),
+}
+
+
+def headerTimestamp(data):
+    """
+    Read the header timestamp of a GTFS Realtime feed without parsing its entities.
+
+    Args:
+        data (bytes): The serialized FeedMessage.
+
+    Returns:
+        int: The POSIX time of the feed header, or None if the feed has no header timestamp.
+    """
+    # The header is field 1, which serializers write first: tag 0x0A and a varint length
+    if data[:1] == b'\x0a':
+        length, shift, pos = 0, 0, 1
+        while pos < len(data):
+            byte = data[pos]
+            length |= (byte & 0x7f) << shift
+            shift += 7
+            pos += 1
+            if not byte & 0x80:
+                break
+        header = gtfs_realtime_pb2.FeedHeader()
+        header.ParseFromString(data[pos:pos + length])
+    else:
+        message = gtfs_realtime_pb2.FeedMessage()
+        message.ParseFromString(data)
+        header = message.header
+    return header.timestamp if header.HasField('timestamp') else None
+
+
+class _Endpoint(object):
+    """
+    The polling state of one scheduled endpoint.
+    """
+
+    def __init__(self, name, getter, format, callback, min_interval, max_interval, detect):
+        self.name = name
+        self.getter = getter
+        self.format = format
+        self.callback = callback
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.detect = detect
+        self.interval = min_interval
+        self.version = None
+        self.value = None
+        self.last_change = None
+        self.mean_period = None
+        self.polls = 0
+        self.changes = 0
+        self.errors = 0
+        self.last_error = None
+        self.bytes = 0
+
+
+class ChangeScheduler(_Poller):
+    """
+    Polls slow-moving endpoints and calls back only when their payload changed.
+
+    Every poll downloads the payload through a getter of the client and compares its hash (or the
+    header timestamp of a GTFS Realtime feed) with the previous one; unchanged protobuf payloads are
+    not parsed, and decoded JSON payloads are hashed in their compact encoding. The interval of each
+    endpoint adapts to how often it is seen changing: it tracks half of the mean time between
+    changes and backs off while nothing changes, always staying within the endpoint's bounds.
+    Works with GolemioClient (downloads run in the default executor) and AsyncGolemioClient, and
+    must be started inside a running event loop.
+    """
+
+    def __init__(self, client, backoff=1.5, smoothing=0.3):
+        """
+        Initialize a new instance of ChangeScheduler.
+
+        Args:
+            client (GolemioClient or AsyncGolemioClient): The client used to download the payloads.
+            backoff (float): Factor by which the interval grows after a poll without change
+                (optional, default is 1.5).
+            smoothing (float): Weight of the latest time between changes in its moving average
+                (optional, default is 0.3).
+        """
+        super().__init__(client)
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self._endpoints = {}
+
+    def add(self, name, callback, min_interval=10, max_interval=300, detect='hash', getter=None, format=None):
+        """
+        Schedule an endpoint.
+
+        Args:
+            name (str): One of 'alerts', 'pid_feed', 'trip_updates', 'vehicle_positions' or 'infotexts',
+                or any name together with getter and format.
+            callback (callable): Function or coroutine function called with (name, parsed payload) on
+                every change; protobuf payloads are FeedMessages (or bytes without gtfs-realtime-bindings),
+                JSON payloads are passed on as the getter returned them.
+            min_interval (float): The shortest interval between polls in seconds (optional, default is 10).
+            max_interval (float): The longest interval between polls in seconds (optional, default is 300).
+            detect (str): 'hash' to compare payload hashes, 'timestamp' to compare the header timestamps
+                of a protobuf feed (optional, default is 'hash').
+            getter (str or callable): The name of the client method downloading a custom endpoint, or a function
+                or coroutine function without arguments (optional, default is None).
+            format (str): 'protobuf' or 'raw' for a getter returning bytes, 'json' for one returning decoded
+                JSON (optional, default is None).
+
+        Raises:
+            ValueError: If the endpoint or the detection mode is unknown, or the bounds are invalid.
+        """
+        if getter is None:
+            if name not in ENDPOINTS:
+                raise ValueError(f'Unknown endpoint {name!r}, expected one of {", ".join(ENDPOINTS)} or a getter.')
+            getter, format = ENDPOINTS[name]
+        format = format or 'raw'
+        if format not in ('protobuf', 'json', 'raw'):
+            raise ValueError(f'Unknown format {format!r}, expected protobuf, json or raw.')
+        if detect not in ('hash', 'timestamp') or (detect == 'timestamp' and format != 'protobuf'):
+            raise ValueError(f'Unsupported change detection {detect!r} for {format} endpoint {name!r}.')
+        if not 0 < min_interval <= max_interval:
+            raise ValueError('Expected 0 < min_interval <= max_interval.')
+        if detect == 'timestamp' and gtfs_realtime_pb2 is None:
+            raise ImportError('Timestamp change detection requires gtfs-realtime-bindings '
+                              '(pip install gtfs-realtime-bindings).')
+        self.remove(name)
+        if isinstance(getter, str):
+            getter = getattr(self.client, getter)
+        self._endpoints[name] = _Endpoint(name, getter, format, callback, min_interval, max_interval, detect)
+        self._startTask(name)
+
+    def remove(self, name):
+        """
+        Stop polling an endpoint.
+
+        Args:
+            name (str): The endpoint name.
+        """
+        self._endpoints.pop(name, None)
+        self._cancelTask(name)
+
+    def latest(self, name):
+        """
+        Get the last parsed payload of an endpoint.
+
+        Args:
+            name (str): The endpoint name.
+
+        Returns:
+            The payload, or None if the endpoint was not polled yet.
+        """
+        endpoint = self._endpoints.get(name)
+        return endpoint.value if endpoint is not None else None
+
+    def _parse(self, endpoint, data):
+        if endpoint.format == 'protobuf' and gtfs_realtime_pb2 is not None:
+            message = gtfs_realtime_pb2.FeedMessage()
+            message.ParseFromString(data)
+            return message
+        return data
+
+    async def poll(self, name):
+        """
+        Poll an endpoint once, calling its callback if the payload changed, and adapt its interval.
+
+        Args:
+            name (str): The endpoint name.
+
+        Returns:
+            bool: True if the payload changed.
+        """
+        endpoint = self._endpoints[name]
+        data = await self._download(endpoint.getter)
+        now = time.monotonic()
+        endpoint.polls += 1
+        body = data if isinstance(data, bytes) else dumpJson(data)
+        endpoint.bytes += len(body)
+        if endpoint.detect == 'timestamp':
+            version = headerTimestamp(data)
+        else:
+            version = hashlib.blake2b(body, digest_size=16).digest()
+        if version is not None and version == endpoint.version:
+            endpoint.interval = min(endpoint.max_interval, endpoint.interval * self.backoff)
+            return False
+        if endpoint.last_change is not None:
+            period = now - endpoint.last_change
+            endpoint.mean_period = period if endpoint.mean_period is None else (
+                self.smoothing * period + (1 - self.smoothing) * endpoint.mean_period)
+            # Poll twice per expected change to notice it within half a period
+            endpoint.interval = min(endpoint.max_interval, max(endpoint.min_interval, endpoint.mean_period / 2))
+        endpoint.version = version
+        endpoint.last_change = now
+        endpoint.changes += 1
+        endpoint.value = self._parse(endpoint, data)
+        result = endpoint.callback(name, endpoint.value)
+        if asyncio.iscoroutine(result):
+            await result
+        return True
+
+    def _keys(self):
+        return list(self._endpoints)
+
+    async def _tick(self, name):
+        await self.poll(name)
+
+    def _interval(self, name):
+        return self._endpoints[name].interval
+
+    def _failed(self, name, error):
+        endpoint = self._endpoints[name]
+        endpoint.errors += 1
+        endpoint.last_error = error
+
+    def stats(self):
+        """
+        Get the scheduler statistics.
+
+        Returns:
+            dict: polls, changes, errors, downloaded bytes and the current interval per endpoint.
+        """
+        return {name: {'polls': endpoint.polls, 'changes': endpoint.changes, 'errors': endpoint.errors,
+                       'bytes': endpoint.bytes, 'interval': endpoint.interval}
+                for name, endpoint in self._endpoints.items()}
@@ -0,0 +1,258 @@
+import json
+import math
+import os
+import threading
+from .errors import *
+from .spatial import EARTH_RADIUS
+
+try:
+    # pip install numpy
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _shapePoints(shape):
+    """
+    Extract the (lat, lon) points of a getGTFSShape response in sequence order.
+
+    Both GeoJSON point features and plain GTFS shape rows (shape_pt_lat, shape_pt_lon) are accepted.
+    """
+    if isinstance(shape, dict):
+        shape = shape.get('features', [])
+    points = []
+    for i, point in enumerate(shape):
+        if 'geometry' in point:
+            lon, lat = point['geometry']['coordinates'][:2]
+            properties = point.get('properties') or {}
+        else:
+            lat, lon = point['shape_pt_lat'], point['shape_pt_lon']
+            properties = point
+        points.append((properties.get('shape_pt_sequence', i), float(lat), float(lon)))
+    points.sort(key=lambda p: p[0])
+    return [p[1] for p in points], [p[2] for p in points]
+
+
+class ShapeStore(object):
+    """
+    Compact store of GTFS shapes with vectorized projection of vehicles onto their shapes.
+
+    All shapes are packed into three flat float64 arrays (latitude, longitude and cumulative
+    distance in metres) plus an offsets array, and can be saved to a directory of .npy files that
+    is memory-mapped when reopened.
+    """
+
+    def __init__(self):
+        """
+        Initialize a new, empty instance of ShapeStore.
+
+        Raises:
+            ImportError: If numpy is not installed.
+        """
+        if np is None:
+            raise ImportError('ShapeStore requires numpy (pip install numpy).')
+        self.shape_ids = []
+        self._index = {}
+        self._lat = np.zeros(0)
+        self._lon = np.zeros(0)
+        self._dist = np.zeros(0)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._pending = []
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.shape_ids)
+
+    def __contains__(self, shape_id):
+        return shape_id in self._index
+
+    @classmethod
+    def open(cls, directory, mmap=True):
+        """
+        Open a store saved with save().
+
+        Args:
+            directory (str): The directory written by save().
+            mmap (bool): Flag indicating whether to memory-map the arrays instead of reading them (optional, default is True).
+
+        Returns:
+            ShapeStore: The store.
+        """
+        store = cls()
+        mode = 'r' if mmap else None
+        store._lat = np.load(os.path.join(directory, 'lat.npy'), mmap_mode=mode)
+        store._lon = np.load(os.path.join(directory, 'lon.npy'), mmap_mode=mode)
+        store._dist = np.load(os.path.join(directory, 'dist.npy'), mmap_mode=mode)
+        store._offsets = np.load(os.path.join(directory, 'offsets.npy'))
+        with open(os.path.join(directory, 'shape_ids.json')) as f:
+            store.shape_ids = json.load(f)
+        store._index = {shape_id: i for i, shape_id in enumerate(store.shape_ids)}
+        return store
+
+    def save(self, directory):
+        """
+        Write the store to a directory of .npy files.
+
+        Args:
+            directory (str): The target directory, created if missing.
+        """
+        with self._lock:
+            self._pack()
+            os.makedirs(directory, exist_ok=True)
+            np.save(os.path.join(directory, 'lat.npy'), self._lat)
+            np.save(os.path.join(directory, 'lon.npy'), self._lon)
+            np.save(os.path.join(directory, 'dist.npy'), self._dist)
+            np.save(os.path.join(directory, 'offsets.npy'), self._offsets)
+            with open(os.path.join(directory, 'shape_ids.json'), 'w') as f:
+                json.dump(self.shape_ids, f)
+
+    def add(self, shape_id, shape):
+        """
+        Add (or replace) a shape.
+
+        Args:
+            shape_id (str): The ID of the shape.
+            shape (dict or list): The getGTFSShape response.
+        """
+        lat, lon = _shapePoints(shape)
+        lat = np.array(lat, dtype=np.float64)
+        lon = np.array(lon, dtype=np.float64)
+        dist = np.zeros(len(lat))
+        if len(lat) > 1:
+            p1, p2 = np.radians(lat[:-1]), np.radians(lat[1:])
+            a = np.sin((p2 - p1) / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(np.radians(lon[1:] - lon[:-1]) / 2) ** 2
+            dist[1:] = np.cumsum(2 * EARTH_RADIUS * np.arcsin(np.sqrt(a)))
+        with self._lock:
+            self._pending.append((shape_id, lat, lon, dist))
+            if shape_id not in self._index:
+                self._index[shape_id] = len(self.shape_ids)
+                self.shape_ids.append(shape_id)
+
+    def load(self, client, shape_ids):
+        """
+        Fetch the shapes that are not stored yet through a client.
+
+        Args:
+            client (GolemioClient): The client (or GTFSStore) used to fetch the shapes.
+            shape_ids (iterable): The IDs of the shapes.
+
+        Returns:
+            list: The IDs of the shapes that were not found.
+        """
+        missing = []
+        for shape_id in dict.fromkeys(shape_ids):
+            if shape_id in self._index:
+                continue
+            try:
+                self.add(shape_id, client.getGTFSShape(shape_id))
+            except NotFoundError:
+                missing.append(shape_id)
+        return missing
+
+    def _pack(self):
+        if not self._pending:
+            return
+        pending = {shape_id: (lat, lon, dist) for shape_id, lat, lon, dist in self._pending}
+        lats, lons, dists = [], [], []
+        for shape_id in self.shape_ids:
+            if shape_id in pending:
+                lat, lon, dist = pending[shape_id]
+            else:
+                lat, lon, dist = self._slice(self._index[shape_id])
+            lats.append(lat)
+            lons.append(lon)
+            dists.append(dist)
+        self._offsets = np.concatenate([[0], np.cumsum([len(lat) for lat in lats])]).astype(np.int64)
+        self._lat = np.concatenate(lats) if lats else np.zeros(0)
+        self._lon = np.concatenate(lons) if lons else np.zeros(0)
+        self._dist = np.concatenate(dists) if dists else np.zeros(0)
+        self._pending = []
+
+    def _slice(self, i):
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return self._lat[start:end], self._lon[start:end], self._dist[start:end]
+
+    def get(self, shape_id):
+        """
+        Get the packed arrays of one shape.
+
+        Args:
+            shape_id (str): The ID of the shape.
+
+        Returns:
+            tuple: (lat, lon, cumulative distance in metres) arrays, or None if the shape is not stored.
+        """
+        with self._lock:
+            self._pack()
+            i = self._index.get(shape_id)
+            return None if i is None else self._slice(i)
+
+    def length(self, shape_id):
+        """
+        Get the length of a shape.
+
+        Args:
+            shape_id (str): The ID of the shape.
+
+        Returns:
+            float: The length in metres, or None if the shape is not stored.
+        """
+        arrays = self.get(shape_id)
+        return None if arrays is None or not len(arrays[2]) else float(arrays[2][-1])
+
+    def project(self, shape_ids, lats, lons):
+        """
+        Project vehicles onto their shapes.
+
+        Vehicles are grouped by shape and every group is matched against all segments of its
+        shape at once, in a local planar approximation around the shape.
+
+        Args:
+            shape_ids (sequence): The shape ID of every vehicle.
+            lats (sequence): The latitude of every vehicle.
+            lons (sequence): The longitude of every vehicle.
+
+        Returns:
+            tuple: (distance along the shape, cross-track distance) float64 arrays in metres,
+            NaN for vehicles whose shape is not stored.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        along = np.full(len(lats), np.nan)
+        cross = np.full(len(lats), np.nan)
+        groups = {}
+        for i, shape_id in enumerate(shape_ids):
+            groups.setdefault(shape_id, []).append(i)
+        with self._lock:
+            self._pack()
+            for shape_id, rows in groups.items():
+                i = self._index.get(shape_id)
+                if i is None:
+                    continue
+                rows = np.array(rows)
+                shape_along, shape_cross = self._projectOnShape(*self._slice(i), lats[rows], lons[rows])
+                along[rows] = shape_along
+                cross[rows] = shape_cross
+        return along, cross
+
+    def _projectOnShape(self, lat, lon, dist, vehicle_lat, vehicle_lon):
+        if len(lat) == 0:
+            return np.nan, np.nan
+        kx = math.radians(1) * EARTH_RADIUS * math.cos(math.radians(float(lat[0])))
+        ky = math.radians(1) * EARTH_RADIUS
+        x = (np.asarray(lon) - lon[0]) * kx
+        y = (np.asarray(lat) - lat[0]) * ky
+        px = ((vehicle_lon - lon[0]) * kx)[:, None]
+        py = ((vehicle_lat - lat[0]) * ky)[:, None]
+        if len(lat) == 1:
+            return np.zeros(len(vehicle_lat)), np.hypot(px[:, 0] - x[0], py[:, 0] - y[0])
+        ax, ay = x[:-1], y[:-1]
+        dx, dy = x[1:] - ax, y[1:] - ay
+        length2 = dx * dx + dy * dy
+        length2[length2 == 0] = 1e-12
+        t = np.clip(((px - ax) * dx + (py - ay) * dy) / length2, 0, 1)
+        distance = np.hypot(ax + t * dx - px, ay + t * dy - py)
+        best = np.argmin(distance, axis=1)
+        rows = np.arange(len(best))
+        segment_length = np.asarray(dist[1:]) - np.asarray(dist[:-1])
+        return dist[best] + t[rows, best] * segment_length[best], distance[rows, best]
@@ -0,0 +1,312 @@
+import heapq
+import math
+import threading
+
+EARTH_RADIUS = 6371008.8
+# Upper bound of the relative distance error of the projection at city scale, used as a search margin
+PROJECTION_MARGIN = 0.02
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance between two points.
+
+    Args:
+        lat1 (float): The latitude of the first point.
+        lon1 (float): The longitude of the first point.
+        lat2 (float): The latitude of the second point.
+        lon2 (float): The longitude of the second point.
+
+    Returns:
+        float: The distance in metres.
+    """
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+class StopIndex(object):
+    """
+    Grid index over GTFS stops for nearest-stop, radius and bounding box queries.
+
+    Stops are projected onto a local equirectangular plane (metres) centred on the data and
+    bucketed into square cells, so a query only looks at the few cells around the point. Queries
+    outside the bounding box of the stops, where the projection is no longer accurate, scan all
+    stops instead. Reported distances are great-circle (haversine) distances.
+
+    The index is built lazily: it is (re)built on the first query after construction, after
+    update() or invalidate(), or when the `version` callable reports a different value.
+    """
+
+    def __init__(self, stops=None, loader=None, version=None, cell_size=250):
+        """
+        Initialize a new instance of StopIndex.
+
+        Args:
+            stops (dict or list): A getGTFSAllStops response or a list of stop features (optional, default is None).
+            loader (callable): Function returning the stops, called whenever the index needs to be rebuilt
+                (optional, default is None).
+            version (callable): Function returning a token that changes whenever the stop data is refreshed,
+                e.g. GTFSStore.lastRefresh (optional, default is None).
+            cell_size (float): The grid cell size in metres (optional, default is 250).
+        """
+        self.loader = loader
+        self.version = version
+        self.cell_size = cell_size
+        self.stops = []
+        self._stale = True
+        self._built_version = None
+        self._pending = stops
+        self._cells = {}
+        self._xy = []
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        self._ensureBuilt()
+        return len(self.stops)
+
+    @classmethod
+    def fromClient(cls, client, cell_size=250):
+        """
+        Build an index that loads all stops through iterGTFSAllStops; a refreshed GTFSStore reads them
+        from its SQLite file.
+
+        Args:
+            client (GolemioClient or GTFSStore): The client.
+            cell_size (float): The grid cell size in metres (optional, default is 250).
+
+        Returns:
+            StopIndex: The index; call invalidate() to reload the stops.
+        """
+        version = getattr(client, 'lastRefresh', None)
+        return cls(loader=lambda: list(client.iterGTFSAllStops(page_size=10000)), version=version,
+                   cell_size=cell_size)
+
+    def update(self, stops):
+        """
+        Replace the stop data; the index is rebuilt on the next query.
+
+        Args:
+            stops (dict or list): A getGTFSAllStops response or a list of stop features.
+        """
+        with self._lock:
+            self._pending = stops
+            self._stale = True
+
+    def invalidate(self):
+        """
+        Mark the index as stale so that the next query reloads the stops from the loader.
+        """
+        with self._lock:
+            self._stale = True
+
+    def _ensureBuilt(self):
+        version = self.version() if self.version is not None else None
+        if not self._stale and version == self._built_version:
+            return
+        with self._lock:
+            if not self._stale and version == self._built_version:
+                return
+            stops = self._pending
+            self._pending = None
+            if stops is None and self.loader is not None:
+                stops = self.loader()
+            if stops is None:
+                stops = self.stops
+            if isinstance(stops, dict):
+                stops = stops.get('features', [])
+            self._build(list(stops))
+            self._built_version = version
+            self._stale = False
+
+    def _build(self, stops):
+        coordinates = [stop['geometry']['coordinates'] for stop in stops]
+        if coordinates:
+            self._lat0 = sum(c[1] for c in coordinates) / len(coordinates)
+            self._lon0 = sum(c[0] for c in coordinates) / len(coordinates)
+        else:
+            self._lat0 = self._lon0 = 0.0
+        self._kx = math.radians(1) * EARTH_RADIUS * math.cos(math.radians(self._lat0))
+        self._ky = math.radians(1) * EARTH_RADIUS
+        cells = {}
+        xy = []
+        for i, (lon, lat) in enumerate(c[:2] for c in coordinates):
+            x, y = self._project(lat, lon)
+            xy.append((x, y))
+            cells.setdefault(self._cell(x, y), []).append(i)
+        self.stops = stops
+        self._xy = xy
+        self._cells = cells
+        # The extent of the occupied cells; no ring search or cell range needs to go beyond it
+        if cells:
+            self._extent = (min(cx for cx, _ in cells), min(cy for _, cy in cells),
+                            max(cx for cx, _ in cells), max(cy for _, cy in cells))
+        else:
+            self._extent = None
+        if coordinates:
+            self._bounds = (min(c[1] for c in coordinates), min(c[0] for c in coordinates),
+                            max(c[1] for c in coordinates), max(c[0] for c in coordinates))
+        else:
+            self._bounds = None
+
+    def _project(self, lat, lon):
+        return (lon - self._lon0) * self._kx, (lat - self._lat0) * self._ky
+
+    def _distance(self, lat, lon, i):
+        stop_lon, stop_lat = self.stops[i]['geometry']['coordinates'][:2]
+        return haversine(lat, lon, stop_lat, stop_lon)
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def _cellRange(self, x0, y0, x1, y1):
+        # The cells of a rectangle, clipped to the occupied extent
+        min_x, min_y, max_x, max_y = self._extent
+        return (range(max(x0, min_x), min(x1, max_x) + 1), range(max(y0, min_y), min(y1, max_y) + 1))
+
+    def _ring(self, cx, cy, r):
+        if r == 0:
+            yield cx, cy
+            return
+        for dx in range(-r, r + 1):
+            yield cx + dx, cy - r
+            yield cx + dx, cy + r
+        for dy in range(-r + 1, r):
+            yield cx - r, cy + dy
+            yield cx + r, cy + dy
+
+    def nearest(self, lat, lon, k=1):
+        """
+        Find the k stops closest to a point.
+
+        Args:
+            lat (float): The latitude of the point.
+            lon (float): The longitude of the point.
+            k (int): The number of stops to return (optional, default is 1).
+
+        Returns:
+            list: (stop feature, distance in metres) tuples, closest first.
+        """
+        self._ensureBuilt()
+        if self._extent is None:
+            return []
+        if self._outside(lat, lon):
+            # Far from the data the rings would be huge and mostly empty, and the projection inaccurate
+            return [(self.stops[i], d) for d, i in heapq.nsmallest(k, self._scan(lat, lon))]
+        x, y = self._project(lat, lon)
+        cx, cy = self._cell(x, y)
+        best = []
+        # The query lies within the extent, so rings beyond its farthest edge are empty
+        min_x, min_y, max_x, max_y = self._extent
+        max_ring = max(cx - min_x, max_x - cx, cy - min_y, max_y - cy)
+        for r in range(max_ring + 1):
+            for cell in self._ring(cx, cy, r):
+                for i in self._cells.get(cell, ()):
+                    d = self._distance(lat, lon, i)
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, i))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, i))
+            # Everything in the rings not visited yet is at least r cells away
+            if len(best) >= k and -best[0][0] <= r * self.cell_size * (1 - PROJECTION_MARGIN):
+                break
+        return [(self.stops[i], -d) for d, i in sorted(best, reverse=True)]
+
+    def _outside(self, lat, lon):
+        min_lat, min_lon, max_lat, max_lon = self._bounds
+        return not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon)
+
+    def _scan(self, lat, lon):
+        return ((self._distance(lat, lon, i), i) for i in range(len(self.stops)))
+
+    def within(self, lat, lon, radius_m):
+        """
+        Find all stops within a radius of a point.
+
+        Args:
+            lat (float): The latitude of the point.
+            lon (float): The longitude of the point.
+            radius_m (float): The radius in metres.
+
+        Returns:
+            list: (stop feature, distance in metres) tuples, closest first.
+        """
+        self._ensureBuilt()
+        if self._extent is None:
+            return []
+        if self._outside(lat, lon):
+            found = sorted((d, i) for d, i in self._scan(lat, lon) if d <= radius_m)
+            return [(self.stops[i], d) for d, i in found]
+        x, y = self._project(lat, lon)
+        reach = radius_m * (1 + PROJECTION_MARGIN)
+        x0, y0 = self._cell(x - reach, y - reach)
+        x1, y1 = self._cell(x + reach, y + reach)
+        found = []
+        xs, ys = self._cellRange(x0, y0, x1, y1)
+        for cx in xs:
+            for cy in ys:
+                for i in self._cells.get((cx, cy), ()):
+                    sx, sy = self._xy[i]
+                    if math.hypot(sx - x, sy - y) > reach:
+                        continue
+                    d = self._distance(lat, lon, i)
+                    if d <= radius_m:
+                        found.append((d, i))
+        found.sort()
+        return [(self.stops[i], d) for d, i in found]
+
+    def inBoundingBox(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Find all stops inside a bounding box.
+
+        Args:
+            min_lat (float): The southern edge.
+            min_lon (float): The western edge.
+            max_lat (float): The northern edge.
+            max_lon (float): The eastern edge.
+
+        Returns:
+            list: The stop features.
+        """
+        self._ensureBuilt()
+        if self._extent is None:
+            return []
+        x0, y0 = self._cell(*self._project(min_lat, min_lon))
+        x1, y1 = self._cell(*self._project(max_lat, max_lon))
+        found = []
+        xs, ys = self._cellRange(x0, y0, x1, y1)
+        for cx in xs:
+            for cy in ys:
+                for i in self._cells.get((cx, cy), ()):
+                    lon, lat = self.stops[i]['geometry']['coordinates'][:2]
+                    if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+                        found.append(i)
+        return [self.stops[i] for i in sorted(found)]
+
+    def nearestMany(self, lats, lons, k=1):
+        """
+        Run nearest() for every point, one after another.
+
+        Args:
+            lats (iterable): The latitudes of the points.
+            lons (iterable): The longitudes of the points.
+            k (int): The number of stops to return per point (optional, default is 1).
+
+        Returns:
+            list: One nearest() result per point.
+        """
+        return [self.nearest(lat, lon, k) for lat, lon in zip(lats, lons)]
+
+    def withinMany(self, lats, lons, radius_m):
+        """
+        Run within() for every point, one after another.
+
+        Args:
+            lats (iterable): The latitudes of the points.
+            lons (iterable): The longitudes of the points.
+            radius_m (float): The radius in metres.
+
+        Returns:
+            list: One within() result per point.
+        """
+        return [self.within(lat, lon, radius_m) for lat, lon in zip(lats, lons)]
@@ -0,0 +1,537 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from .client import BulkResult
+from .errors import *
+
+
+class GTFSStore(object):
+    """
+    Local SQLite mirror of the static GTFS data served by the Golemio API.
+
+    Routes, stops, trips, services and shapes are pulled through the list endpoints of a
+    GolemioClient and stored in an indexed SQLite file. The getters have the same signatures as
+    the ones of GolemioClient and answer from the local file; anything not mirrored locally is
+    fetched from the client (and stored) on first use. The list and iter* endpoints of routes,
+    services, trips and stops are answered locally once the store was refreshed, except for the
+    filters that need server-side data (service and trip dates, trips by stop, stop names, ASW and
+    CIS IDs). Stop times, vehicle positions and departure boards are not mirrored. Any other
+    attribute, e.g. getGTFSStopTimes and iterGTFSStopTimes, is forwarded to the client, so a
+    GTFSStore can be used wherever a GolemioClient is expected.
+    """
+
+    TABLES = {
+        'routes': 'route_id',
+        'stops': 'stop_id',
+        'trips': 'trip_id',
+        'services': 'service_id',
+        'shapes': 'shape_id',
+    }
+
+    def __init__(self, client, path=':memory:', page_size=1000):
+        """
+        Initialize a new instance of GTFSStore.
+
+        Args:
+            client (GolemioClient): The client used to pull the data.
+            path (str): The path of the SQLite file (optional, default is ':memory:').
+            page_size (int): The number of records fetched per request while refreshing (optional, default is 1000).
+        """
+        self.client = client
+        self.path = path
+        self.page_size = page_size
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            for table, key in self.TABLES.items():
+                # Trips also keep their route and shape as indexed columns
+                extra = ', route_id TEXT, shape_id TEXT' if table == 'trips' else ''
+                self._db.execute(f'CREATE TABLE IF NOT EXISTS {table} '
+                                 f'({key} TEXT PRIMARY KEY, hash TEXT NOT NULL, data TEXT NOT NULL{extra})')
+            self._db.execute('CREATE INDEX IF NOT EXISTS trips_route_id ON trips (route_id)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS trips_shape_id ON trips (shape_id)')
+            self._db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+
+    def __getattr__(self, name):
+        if name == 'client':
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def close(self):
+        """
+        Close the SQLite connection.
+        """
+        self._db.close()
+
+    def _hash(self, record):
+        return hashlib.sha1(json.dumps(record, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+    def _getMeta(self, key):
+        row = self._db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _setMeta(self, key, value):
+        self._db.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def _get(self, table, record_id):
+        with self._lock:
+            row = self._db.execute(f'SELECT data FROM {table} WHERE {self.TABLES[table]} = ?',
+                                   (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _put(self, table, record_id, record):
+        with self._lock, self._db:
+            self._upsert(table, record_id, record, self._hash(record))
+
+    def _upsert(self, table, record_id, record, digest):
+        data = json.dumps(record, separators=(',', ':'))
+        if table == 'trips':
+            self._db.execute('INSERT OR REPLACE INTO trips (trip_id, hash, data, route_id, shape_id) '
+                             'VALUES (?, ?, ?, ?, ?)',
+                             (record_id, digest, data, record.get('route_id'), record.get('shape_id')))
+        else:
+            self._db.execute(f'INSERT OR REPLACE INTO {table} ({self.TABLES[table]}, hash, data) VALUES (?, ?, ?)',
+                             (record_id, digest, data))
+
+    def _sync(self, table, records, id_of, batch_size=500):
+        """
+        Bring a table in line with a full listing, writing only the records whose hash changed.
+
+        Changes are written in small transactions while the listing is being downloaded, so
+        readers are never blocked for the duration of a whole refresh.
+
+        Returns:
+            dict: The number of inserted, updated and deleted records.
+        """
+        key = self.TABLES[table]
+        stats = {'inserted': 0, 'updated': 0, 'deleted': 0}
+        with self._lock:
+            known = dict(self._db.execute(f'SELECT {key}, hash FROM {table}'))
+        seen = set()
+        batch = []
+        for record in records:
+            record_id = id_of(record)
+            seen.add(record_id)
+            digest = self._hash(record)
+            old = known.get(record_id)
+            if old == digest:
+                continue
+            batch.append((record_id, record, digest))
+            stats['updated' if old else 'inserted'] += 1
+            if len(batch) >= batch_size:
+                self._write(table, batch)
+                batch = []
+        self._write(table, batch)
+        gone = [(record_id,) for record_id in known if record_id not in seen]
+        with self._lock, self._db:
+            self._db.executemany(f'DELETE FROM {table} WHERE {key} = ?', gone)
+        stats['deleted'] = len(gone)
+        return stats
+
+    def _write(self, table, batch):
+        with self._lock, self._db:
+            for record_id, record, digest in batch:
+                self._upsert(table, record_id, record, digest)
+
+    def refresh(self, full=False, shapes=True):
+        """
+        Pull the static GTFS data and update the local copy incrementally.
+
+        Routes, services and stops are listed and only records whose payload hash changed are
+        written. Trips are re-listed only if the services changed (a new timetable always comes
+        with new service dates) or if full is set. Shapes are fetched in parallel, only for shape IDs
+        that are referenced by a trip but not stored yet; shapes no longer referenced are dropped.
+
+        Args:
+            full (bool): Flag indicating whether to re-list trips and re-fetch all shapes (optional, default is False).
+            shapes (bool): Flag indicating whether to mirror shapes (optional, default is True).
+
+        Returns:
+            dict: Per table the number of inserted, updated and deleted records.
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing.
+        """
+        result = {}
+        result['routes'] = self._sync('routes', self.client.getGTFSRoutes(), lambda r: r['route_id'])
+        result['services'] = self._sync('services', self.client.iterGTFSServices(page_size=self.page_size),
+                                        lambda s: s['service_id'])
+        result['stops'] = self._sync('stops', self.client.iterGTFSAllStops(page_size=self.page_size),
+                                     lambda s: s['properties']['stop_id'])
+        services_changed = any(result['services'].values())
+        if full or services_changed or self._getMeta('trips_refreshed') is None:
+            result['trips'] = self._sync('trips', self.client.iterGTFSTrips(page_size=self.page_size),
+                                         lambda t: t['trip_id'])
+            with self._lock, self._db:
+                self._setMeta('trips_refreshed', str(time.time()))
+        else:
+            result['trips'] = {'inserted': 0, 'updated': 0, 'deleted': 0}
+        if shapes:
+            result['shapes'] = self._refreshShapes(full)
+        with self._lock, self._db:
+            self._setMeta('refreshed', str(time.time()))
+        return result
+
+    def _refreshShapes(self, full=False):
+        with self._lock:
+            referenced = {row[0] for row in self._db.execute('SELECT DISTINCT shape_id FROM trips')
+                          if row[0] is not None}
+            stored = {row[0] for row in self._db.execute('SELECT shape_id FROM shapes')}
+        missing = referenced if full else referenced - stored
+        stats = {'inserted': 0, 'updated': 0, 'deleted': 0}
+        for shape_id, shape, error in self.client.iterGTFSShapesByIds(sorted(missing)):
+            if isinstance(error, NotFoundError):
+                continue
+            elif error is not None:
+                raise error
+            self._put('shapes', shape_id, shape)
+            stats['updated' if shape_id in stored else 'inserted'] += 1
+        gone = [(shape_id,) for shape_id in stored - referenced]
+        with self._lock, self._db:
+            self._db.executemany('DELETE FROM shapes WHERE shape_id = ?', gone)
+        stats['deleted'] = len(gone)
+        return stats
+
+    def lastRefresh(self):
+        """
+        Get the time of the last completed refresh.
+
+        Returns:
+            float: The time.time() of the last refresh, or None if the store was never refreshed.
+        """
+        with self._lock:
+            value = self._getMeta('refreshed')
+        return float(value) if value else None
+
+    def _has(self, table):
+        with self._lock:
+            return self._db.execute(f'SELECT 1 FROM {table} LIMIT 1').fetchone() is not None
+
+    def _list(self, table, limit=-1, offset=0, ids=None):
+        key = self.TABLES[table]
+        where, args = '', ()
+        if ids is not None:
+            ids = [ids] if isinstance(ids, str) else list(ids)
+            where, args = f' WHERE {key} IN ({", ".join("?" * len(ids))})', tuple(ids)
+        with self._lock:
+            rows = self._db.execute(f'SELECT data FROM {table}{where} ORDER BY {key} LIMIT ? OFFSET ?',
+                                    args + (limit, offset)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _iterList(self, table, page_size, offset=0, ids=None):
+        # Page through the table so that the lock is never held while the caller consumes records
+        while True:
+            page = self._list(table, page_size, offset, ids)
+            yield from page
+            if len(page) < page_size:
+                return
+            offset += page_size
+
+    def _lookup(self, table, record_id, getter):
+        record = self._get(table, record_id)
+        if record is None:
+            record = getter(record_id)
+            self._put(table, record_id, record)
+        return record
+
+    def _iterLookup(self, table, record_ids, iter_many, max_workers=None, chunk_size=500):
+        # Stored records first, then the missing ones fetched in parallel through the client
+        record_ids = list(dict.fromkeys(record_ids))
+        key = self.TABLES[table]
+        found = {}
+        for start in range(0, len(record_ids), chunk_size):
+            chunk = record_ids[start:start + chunk_size]
+            with self._lock:
+                rows = self._db.execute(f'SELECT {key}, data FROM {table} WHERE {key} IN '
+                                        f'({", ".join("?" * len(chunk))})', chunk).fetchall()
+            found.update((record_id, json.loads(data)) for record_id, data in rows)
+        for record_id in record_ids:
+            if record_id in found:
+                yield record_id, found[record_id], None
+        missing = [record_id for record_id in record_ids if record_id not in found]
+        if missing:
+            for record_id, record, error in iter_many(missing, max_workers):
+                if error is None:
+                    self._put(table, record_id, record)
+                yield record_id, record, error
+
+    def _getLookup(self, table, record_ids, iter_many, max_workers=None):
+        record_ids = list(dict.fromkeys(record_ids))
+        records = {}
+        result = BulkResult()
+        for record_id, record, error in self._iterLookup(table, record_ids, iter_many, max_workers):
+            if error is None:
+                records[record_id] = record
+            else:
+                result.errors[record_id] = error
+        result.update((record_id, records[record_id]) for record_id in record_ids if record_id in records)
+        return result
+
+    def getGTFSRoutes(self):
+        """
+        Get all GTFS routes.
+
+        Returns:
+            list: A list of GTFS routes.
+        """
+        with self._lock:
+            rows = self._db.execute('SELECT data FROM routes ORDER BY route_id').fetchall()
+        if not rows:
+            return self.client.getGTFSRoutes()
+        return [json.loads(row[0]) for row in rows]
+
+    def getGTFSServices(self, date=None, limit=10, offset=0):
+        """
+        Retrieve the list of services; filtering by date is left to the client.
+
+        Args:
+            date (str): The date for which to retrieve the services (optional, default is None).
+            limit (int): The maximum number of services to retrieve (optional, default is 10).
+            offset (int): The offset for pagination (optional, default is 0).
+
+        Returns:
+            list: A list of services.
+        """
+        if date or not self._has('services'):
+            return self.client.getGTFSServices(date=date, limit=limit, offset=offset)
+        return self._list('services', limit, offset)
+
+    def iterGTFSServices(self, date=None, page_size=100, offset=0):
+        """
+        Iterate over all services; filtering by date is left to the client.
+
+        Args:
+            date (str): The date for which to retrieve the services (optional, default is None).
+            page_size (int): The number of services read at a time (optional, default is 100).
+            offset (int): The offset of the first service (optional, default is 0).
+
+        Yields:
+            dict: The services.
+        """
+        if date or not self._has('services'):
+            return self.client.iterGTFSServices(date=date, page_size=page_size, offset=offset)
+        return self._iterList('services', page_size, offset)
+
+    def getGTFSRoute(self, route_id):
+        """
+        Retrieve information about a specific route.
+
+        Args:
+            route_id (str): The ID of the route.
+
+        Returns:
+            dict: Information about the route.
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing.
+            NotFoundError: If the requested resource was not found.
+        """
+        return self._lookup('routes', route_id, self.client.getGTFSRoute)
+
+    def getGTFSRoutesByIds(self, route_ids, max_workers=None):
+        """
+        Retrieve many routes by ID; routes missing locally are fetched through the client in parallel.
+
+        Args:
+            route_ids (iterable): The IDs of the routes; duplicates are looked up once.
+            max_workers (int): The number of parallel requests (optional, default is the connection pool size).
+
+        Returns:
+            BulkResult: The routes by ID; the IDs that failed (e.g. with NotFoundError) are in its errors dict.
+        """
+        return self._getLookup('routes', route_ids, self.client.iterGTFSRoutesByIds, max_workers)
+
+    def iterGTFSRoutesByIds(self, route_ids, max_workers=None):
+        """
+        Retrieve many routes by ID, the stored ones first; routes missing locally are fetched through the client.
+
+        Args:
+            route_ids (iterable): The IDs of the routes; duplicates are looked up once.
+            max_workers (int): The number of parallel requests (optional, default is the connection pool size).
+
+        Yields:
+            tuple: (route_id, route, error) where error is the exception raised for that ID, or None.
+        """
+        return self._iterLookup('routes', route_ids, self.client.iterGTFSRoutesByIds, max_workers)
+
+    def getGTFSTrips(self, stop_id=None, date=None, limit=10, offset=0):
+        """
+        Retrieve the list of trips; filtering by stop or date is left to the client.
+
+        Args:
+            stop_id (str): The ID of the stop to filter trips by (optional, default is None).
+            date (str): The date for which to retrieve the trips (optional, default is None).
+            limit (int): The maximum number of trips to retrieve (optional, default is 10).
+            offset (int): The offset for pagination (optional, default is 0).
+
+        Returns:
+            list: A list of trips.
+        """
+        if stop_id or date or not self._has('trips'):
+            return self.client.getGTFSTrips(stop_id=stop_id, date=date, limit=limit, offset=offset)
+        return self._list('trips', limit, offset)
+
+    def iterGTFSTrips(self, stop_id=None, date=None, page_size=100, offset=0):
+        """
+        Iterate over all trips; filtering by stop or date is left to the client.
+
+        Args:
+            stop_id (str): The ID of the stop to filter trips by (optional, default is None).
+            date (str): The date for which to retrieve the trips (optional, default is None).
+            page_size (int): The number of trips read at a time (optional, default is 100).
+            offset (int): The offset of the first trip (optional, default is 0).
+
+        Yields:
+            dict: The trips.
+        """
+        if stop_id or date or not self._has('trips'):
+            return self.client.iterGTFSTrips(stop_id=stop_id, date=date, page_size=page_size, offset=offset)
+        return self._iterList('trips', page_size, offset)
+
+    def getGTFSTrip(self, trip_id):
+        """
+        Get GTFS trip information for a specific trip.
+
+        Args:
+            trip_id (str): The ID of the trip.
+
+        Returns:
+            dict: Information about the GTFS trip.
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing.
+            NotFoundError: If the requested resource was not found.
+        """
+        return self._lookup('trips', trip_id, self.client.getGTFSTrip)
+
+    def getGTFSTripsByIds(self, trip_ids, max_workers=None):
+        """
+        Retrieve many trips by ID; trips missing locally are fetched through the client in parallel.
+
+        Args:
+            trip_ids (iterable): The IDs of the trips; duplicates are looked up once.
+            max_workers (int): The number of parallel requests (optional, default is the connection pool size).
+
+        Returns:
+            BulkResult: The trips by ID; the IDs that failed (e.g. with NotFoundError) are in its errors dict.
+        """
+        return self._getLookup('trips', trip_ids, self.client.iterGTFSTripsByIds, max_workers)
+
+    def iterGTFSTripsByIds(self, trip_ids, max_workers=None):
+        """
+        Retrieve many trips by ID, the stored ones first; trips missing locally are fetched through the client.
+
+        Args:
+            trip_ids (iterable): The IDs of the trips; duplicates are looked up once.
+            max_workers (int): The number of parallel requests (optional, default is the connection pool size).
+
+        Yields:
+            tuple: (trip_id, trip, error) where error is the exception raised for that ID, or None.
+        """
+        return self._iterLookup('trips', trip_ids, self.client.iterGTFSTripsByIds, max_workers)
+
+    def getGTFSShape(self, shape_id):
+        """
+        Retrieve information about a specific shape.
+
+        Args:
+            shape_id (str): The ID of the shape.
+
+        Returns:
+            dict: Information about the shape.
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing.
+            NotFoundError: If the requested resource was not found.
+        """
+        return self._lookup('shapes', shape_id, self.client.getGTFSShape)
+
+    def getGTFSShapesByIds(self, shape_ids, max_workers=None):
+        """
+        Retrieve many shapes by ID; shapes missing locally are fetched through the client in parallel.
+
+        Args:
+            shape_ids (iterable): The IDs of the shapes; duplicates are looked up once.
+            max_workers (int): The number of parallel requests (optional, default is the connection pool size).
+
+        Returns:
+            BulkResult: The shapes by ID; the IDs that failed (e.g. with NotFoundError) are in its errors dict.
+        """
+        return self._getLookup('shapes', shape_ids, self.client.iterGTFSShapesByIds, max_workers)
+
+    def iterGTFSShapesByIds(self, shape_ids, max_workers=None):
+        """
+        Retrieve many shapes by ID, the stored ones first; shapes missing locally are fetched through the client.
+
+        Args:
+            shape_ids (iterable): The IDs of the shapes; duplicates are looked up once.
+            max_workers (int): The number of parallel requests (optional, default is the connection pool size).
+
+        Yields:
+            tuple: (shape_id, shape, error) where error is the exception raised for that ID, or None.
+        """
+        return self._iterLookup('shapes', shape_ids, self.client.iterGTFSShapesByIds, max_workers)
+
+    def getGTFSAllStops(self, names=None, stop_ids=None, asw_ids=None, cis_ids=None, limit=10000, offset=0,
+                        stream=False):
+        """
+        Retrieve the list of all stops; filtering by name, ASW or CIS ID is left to the client.
+
+        Args:
+            names (str or list): The names of stops to retrieve (optional, default is None).
+            stop_ids (str or list): The IDs of stops to retrieve (optional, default is None).
+            asw_ids (str or list): The ASW IDs of stops to retrieve (optional, default is None).
+            cis_ids (str or list): The CIS IDs of stops to retrieve (optional, default is None).
+            limit (int): The maximum number of stops to retrieve (optional, default is 10000).
+            offset (int): The offset for pagination (optional, default is 0).
+            stream (bool): Flag indicating whether to return an iterator over the stop features
+                (optional, default is False).
+
+        Returns:
+            dict: A FeatureCollection of the stops, or an iterator over the stop features if stream is True.
+        """
+        if names or asw_ids or cis_ids or not self._has('stops'):
+            return self.client.getGTFSAllStops(names=names, stop_ids=stop_ids, asw_ids=asw_ids, cis_ids=cis_ids,
+                                               limit=limit, offset=offset, stream=stream)
+        features = self._list('stops', limit, offset, stop_ids or None)
+        if stream:
+            return iter(features)
+        return {'type': 'FeatureCollection', 'features': features}
+
+    def iterGTFSAllStops(self, names=None, stop_ids=None, asw_ids=None, cis_ids=None, page_size=1000, offset=0):
+        """
+        Iterate over all stops; filtering by name, ASW or CIS ID is left to the client.
+
+        Args:
+            names (str or list): The names of stops to retrieve (optional, default is None).
+            stop_ids (str or list): The IDs of stops to retrieve (optional, default is None).
+            asw_ids (str or list): The ASW IDs of stops to retrieve (optional, default is None).
+            cis_ids (str or list): The CIS IDs of stops to retrieve (optional, default is None).
+            page_size (int): The number of stops read at a time (optional, default is 1000).
+            offset (int): The offset of the first stop (optional, default is 0).
+
+        Yields:
+            dict: The stop features.
+        """
+        if names or asw_ids or cis_ids or not self._has('stops'):
+            return self.client.iterGTFSAllStops(names=names, stop_ids=stop_ids, asw_ids=asw_ids, cis_ids=cis_ids,
+                                                page_size=page_size, offset=offset)
+        return self._iterList('stops', page_size, offset, stop_ids or None)
+
+    def getGTFSStop(self, stop_id):
+        """
+        Retrieve information about a specific stop.
+
+        Args:
+            stop_id (str): The ID of the stop.
+
+        Returns:
+            dict: Information about the stop.
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing.
+            NotFoundError: If the requested resource was not found.
+        """
+        return self._lookup('stops', stop_id, self.client.getGTFSStop)
@@ -0,0 +1,167 @@
+import codecs
+import json
+import re
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class JsonRecordDecoder(object):
+    """
+    Incremental decoder yielding the records of a JSON response as its chunks arrive.
+
+    The records are the elements of a top-level array, or of the array stored under `key` in a
+    top-level object (e.g. the 'features' of a GeoJSON FeatureCollection). Only the record being
+    decoded is buffered, so neither the whole body nor the whole object tree is held in memory.
+    Other members of a top-level object are skipped.
+    """
+
+    def __init__(self, key='features'):
+        """
+        Initialize a new instance of JsonRecordDecoder.
+
+        Args:
+            key (str): The member of a top-level object holding the records (optional, default is 'features').
+        """
+        self.key = key
+        self.records = 0
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._state = 'start'
+        self._member = None
+
+    def feed(self, chunk):
+        """
+        Decode the next chunk of the body.
+
+        Args:
+            chunk (bytes): The chunk.
+
+        Returns:
+            list: The records completed by this chunk.
+        """
+        self._buffer = self._buffer[self._pos:] + self._text.decode(chunk)
+        self._pos = 0
+        return self._parse(final=False)
+
+    def close(self):
+        """
+        Finish decoding after the last chunk.
+
+        Returns:
+            list: The records completed by the end of the body.
+
+        Raises:
+            ValueError: If the body ended in the middle of a record or is not valid JSON.
+        """
+        self._buffer = self._buffer[self._pos:] + self._text.decode(b'', final=True)
+        self._pos = 0
+        records = self._parse(final=True)
+        if self._state not in ('start', 'done'):
+            raise ValueError('Truncated JSON response.')
+        return records
+
+    def _skip(self):
+        self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+        return self._buffer[self._pos] if self._pos < len(self._buffer) else None
+
+    def _value(self, final):
+        """
+        Decode the value at the current position, or return (False, None) if more data is needed.
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return False, None
+        # A number at the end of the buffer may continue in the next chunk
+        if end == len(self._buffer) and not final:
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _parse(self, final):
+        records = []
+        while True:
+            char = self._skip()
+            if char is None:
+                if final and self._state == 'start':
+                    self._state = 'done'
+                return records
+            if self._state == 'done':
+                # Anything after the records is ignored
+                self._pos = len(self._buffer)
+                return records
+            if self._state == 'start':
+                if char == '[':
+                    self._state = 'array'
+                elif char == '{':
+                    self._state = 'object'
+                else:
+                    raise ValueError(f'Expected a JSON array or object, got {char!r}.')
+                self._pos += 1
+            elif self._state in ('object', 'after_member'):
+                if char == '}':
+                    self._state = 'done'
+                    self._pos += 1
+                    continue
+                if self._state == 'after_member':
+                    if char != ',':
+                        raise ValueError(f'Expected , or }} in JSON object, got {char!r}.')
+                    self._state = 'object'
+                    self._pos += 1
+                    continue
+                complete, self._member = self._value(final)
+                if not complete:
+                    return records
+                self._state = 'colon'
+            elif self._state == 'colon':
+                if char != ':':
+                    raise ValueError(f'Expected : in JSON object, got {char!r}.')
+                self._pos += 1
+                self._state = 'member'
+            elif self._state == 'member':
+                if self._member == self.key and char == '[':
+                    self._state = 'array'
+                    self._pos += 1
+                    continue
+                complete, _ = self._value(final)
+                if not complete:
+                    return records
+                self._state = 'after_member'
+            elif self._state in ('array', 'after_record'):
+                if char == ']':
+                    self._state = 'done'
+                    self._pos += 1
+                    continue
+                if self._state == 'after_record':
+                    if char != ',':
+                        raise ValueError(f'Expected , or ] in JSON array, got {char!r}.')
+                    self._state = 'array'
+                    self._pos += 1
+                    continue
+                complete, record = self._value(final)
+                if not complete:
+                    return records
+                records.append(record)
+                self.records += 1
+                self._state = 'after_record'
+
+
+def iterJsonRecords(chunks, key='features'):
+    """
+    Iterate over the records of a JSON body delivered in chunks.
+
+    Args:
+        chunks (iterable): The chunks of the body as bytes.
+        key (str): The member of a top-level object holding the records (optional, default is 'features').
+
+    Yields:
+        The records, see JsonRecordDecoder.
+    """
+    decoder = JsonRecordDecoder(key)
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.close()
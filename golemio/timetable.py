@@ -0,0 +1,319 @@
+import bisect
+import datetime
+import sys
+import threading
+from array import array
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from zoneinfo import ZoneInfo
+from .errors import *
+
+# The time zone of the PID timetables
+TIMEZONE = ZoneInfo('Europe/Prague')
+
+# A scheduled departure; time is in seconds since midnight of the service date and may exceed 86400,
+# day_offset is -86400 for the runs of the previous service date still running after midnight
+Departure = namedtuple('Departure', ['stop_id', 'time', 'trip_id', 'route_id', 'stop_sequence', 'headsign',
+                                     'day_offset'], defaults=(0,))
+
+
+def parseTime(value):
+    """
+    Parse a GTFS time, which may be 24:00:00 or later for trips running past midnight.
+
+    Args:
+        value (str): The time as H:MM:SS or HH:MM:SS.
+
+    Returns:
+        int: The seconds since midnight of the service date, or None if the value is empty.
+    """
+    if not value:
+        return None
+    hours, minutes, seconds = value.split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def formatTime(seconds):
+    """
+    Format seconds since midnight of the service date as a GTFS time.
+
+    Args:
+        seconds (int): The seconds, 86400 and more for times after midnight.
+
+    Returns:
+        str: The time as HH:MM:SS, e.g. '25:10:00'.
+    """
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours:02d}:{minutes:02d}:{seconds:02d}'
+
+
+def _field(row, name):
+    # Rows are dicts, or StopTime records from a typed client
+    return row.get(name) if isinstance(row, dict) else getattr(row, name, None)
+
+
+class _StopTimetable(object):
+    """
+    The departures of one stop, sorted by time, as parallel arrays. The departures of the previous
+    service date after midnight are moved to the early hours of this one; their day offset of -86400
+    tells them apart from the run of the same trip on this date.
+    """
+
+    __slots__ = ('times', 'trip_ids', 'sequences', 'headsigns', 'day_offsets')
+
+    def __init__(self, rows, previous_rows=()):
+        departures = []
+        for shift, rows in ((0, rows), (86400, previous_rows)):
+            self._collect(departures, rows, shift)
+        departures.sort(key=lambda departure: departure[0])
+        self.times = array('l', [departure[0] for departure in departures])
+        self.trip_ids = [departure[1] for departure in departures]
+        self.sequences = array('l', [departure[2] for departure in departures])
+        self.headsigns = [departure[3] for departure in departures]
+        self.day_offsets = array('l', [departure[4] for departure in departures])
+
+    def _collect(self, departures, rows, shift):
+        for row in rows:
+            time = parseTime(_field(row, 'departure_time') or _field(row, 'arrival_time'))
+            trip_id = _field(row, 'trip_id')
+            if time is None or trip_id is None or time < shift:
+                continue
+            time -= shift
+            sequence = _field(row, 'stop_sequence')
+            headsign = _field(row, 'stop_headsign')
+            departures.append((time, sys.intern(trip_id), -1 if sequence is None else sequence,
+                               sys.intern(headsign) if headsign else None, -shift))
+
+    def __len__(self):
+        return len(self.times)
+
+
+class TimetableIndex(object):
+    """
+    Offline index of the scheduled departures of one service date for "next departures" queries.
+
+    Stops are added incrementally with addStop/addStops, which page through getGTFSStopTimes. Each
+    stop keeps its departure times (seconds since midnight) sorted, so a query is a binary search.
+    Times of trips running past midnight stay above 86400: to ask for the departures at 00:30 of
+    the next calendar day, query this index with t='24:30:00' (88200). The trips of the previous
+    service date still running after midnight are loaded as well and appear at their calendar
+    time, e.g. a departure at 25:10:00 of the previous date is found at 01:10:00. A trip running
+    every night then appears twice at a stop, told apart by the day_offset of its departures.
+
+    Stop times are always downloaded from the API, also through a GTFSStore, which does not mirror
+    them. The routes of the trips come from one listing of the trips of the service date, which a
+    refreshed GTFSStore answers locally.
+    """
+
+    def __init__(self, client, date=None, page_size=1000, routes=True, overnight=True):
+        """
+        Initialize a new instance of TimetableIndex.
+
+        Args:
+            client (GolemioClient or GTFSStore): The client used to load the stop times and trips.
+            date (str): The service date as YYYY-MM-DD, None for the API's default (optional, default is None).
+            page_size (int): The number of stop times or trips fetched per request (optional, default is 1000).
+            routes (bool): Flag indicating whether to resolve the route of every trip from iterGTFSTrips
+                (optional, default is True).
+            overnight (bool): Flag indicating whether to load the departures of the previous service date
+                after midnight; a second stop times request per stop (optional, default is True).
+        """
+        self.client = client
+        self.date = date
+        self.page_size = page_size
+        self.routes = routes
+        self.overnight = overnight
+        self.trip_routes = {}
+        self.version = 0
+        self._stops = {}
+        self._routes_loaded = False
+        self._lock = threading.Lock()
+        self._routes_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._stops)
+
+    def __contains__(self, stop_id):
+        return stop_id in self._stops
+
+    def stopIds(self):
+        """
+        Get the IDs of the indexed stops.
+
+        Returns:
+            list: The stop IDs.
+        """
+        return list(self._stops)
+
+    def previousDate(self):
+        """
+        Get the service date before the one of the index.
+
+        Returns:
+            str: The date as YYYY-MM-DD; without a date, the day before today in Prague.
+        """
+        date = datetime.date.fromisoformat(self.date) if self.date else datetime.datetime.now(TIMEZONE).date()
+        return (date - datetime.timedelta(days=1)).isoformat()
+
+    def addStop(self, stop_id, rows=None, previous_rows=None):
+        """
+        Load (or reload) the departures of a stop.
+
+        Args:
+            stop_id (str): The ID of the stop.
+            rows (iterable): The stop times to index instead of loading them through the client
+                (optional, default is None).
+            previous_rows (iterable): The stop times of the previous service date to take the departures after
+                midnight from; loaded through the client unless rows are given (optional, default is None).
+
+        Returns:
+            int: The number of departures indexed.
+        """
+        if rows is None:
+            rows = self.client.iterGTFSStopTimes(stop_id, date=self.date, page_size=self.page_size)
+            if previous_rows is None and self.overnight:
+                previous_rows = self.client.iterGTFSStopTimes(stop_id, date=self.previousDate(),
+                                                              page_size=self.page_size)
+        timetable = _StopTimetable(rows, previous_rows or ())
+        if self.routes:
+            self._resolveRoutes()
+        with self._lock:
+            self._stops[stop_id] = timetable
+            self.version += 1
+        return len(timetable)
+
+    def addStops(self, stop_ids, max_workers=None):
+        """
+        Load the departures of many stops in parallel; stops that are already indexed are skipped.
+
+        Args:
+            stop_ids (iterable): The IDs of the stops.
+            max_workers (int): The number of parallel loads (optional, default is the client's pool size).
+
+        Returns:
+            dict: The stops that failed to load, mapped to their exception.
+        """
+        stop_ids = [stop_id for stop_id in dict.fromkeys(stop_ids) if stop_id not in self._stops]
+        errors = {}
+        if not stop_ids:
+            return errors
+        max_workers = max_workers or getattr(self.client, 'pool_size', 10)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {stop_id: executor.submit(self.addStop, stop_id) for stop_id in stop_ids}
+            for stop_id, future in futures.items():
+                try:
+                    future.result()
+                except GolemioClientError as e:
+                    errors[stop_id] = e
+        return errors
+
+    def arrays(self, stop_id):
+        """
+        Get the departures of a stop as parallel sequences sorted by time.
+
+        Args:
+            stop_id (str): The ID of the stop.
+
+        Returns:
+            tuple: (times, trip IDs, stop sequences, headsigns, day offsets), or None if the stop is not indexed.
+        """
+        timetable = self._stops.get(stop_id)
+        if timetable is None:
+            return None
+        return timetable.times, timetable.trip_ids, timetable.sequences, timetable.headsigns, timetable.day_offsets
+
+    def removeStop(self, stop_id):
+        """
+        Drop a stop from the index.
+
+        Args:
+            stop_id (str): The ID of the stop.
+        """
+        with self._lock:
+            if self._stops.pop(stop_id, None) is not None:
+                self.version += 1
+
+    def _resolveRoutes(self):
+        # The trips are listed once instead of being fetched one request per trip
+        if self._routes_loaded:
+            return
+        with self._routes_lock:
+            if self._routes_loaded:
+                return
+            # A refreshed GTFSStore lists its trips locally, but only without a date filter
+            last_refresh = getattr(self.client, 'lastRefresh', None)
+            if last_refresh is not None and last_refresh() is not None:
+                trips = self.client.iterGTFSTrips(page_size=self.page_size)
+            else:
+                dates = [self.date, self.previousDate()] if self.overnight else [self.date]
+                trips = (trip for date in dates for trip in self.client.iterGTFSTrips(date=date,
+                                                                                      page_size=self.page_size))
+            trip_routes = {}
+            for trip in trips:
+                trip_id, route_id = _field(trip, 'trip_id'), _field(trip, 'route_id')
+                if trip_id:
+                    trip_routes[sys.intern(trip_id)] = sys.intern(route_id) if route_id else None
+            self.trip_routes = trip_routes
+            self._routes_loaded = True
+
+    def nextDepartures(self, stop_id, t, n=5, until=None):
+        """
+        Find the next scheduled departures from a stop.
+
+        Args:
+            stop_id (str): The ID of the stop.
+            t (int or str): The time as seconds since midnight of the service date or as a GTFS time.
+            n (int): The maximum number of departures (optional, default is 5).
+            until (int or str): Only return departures before this time (optional, default is None).
+
+        Returns:
+            list: Departure tuples at or after t, earliest first; empty if the stop is not indexed.
+        """
+        timetable = self._stops.get(stop_id)
+        if timetable is None:
+            return []
+        t = parseTime(t) if isinstance(t, str) else t
+        start = bisect.bisect_left(timetable.times, t)
+        end = min(start + n, len(timetable))
+        if until is not None:
+            until = parseTime(until) if isinstance(until, str) else until
+            end = min(end, bisect.bisect_left(timetable.times, until, start, end))
+        trip_routes = self.trip_routes
+        return [Departure(stop_id, timetable.times[i], timetable.trip_ids[i],
+                          trip_routes.get(timetable.trip_ids[i]), timetable.sequences[i], timetable.headsigns[i],
+                          timetable.day_offsets[i])
+                for i in range(start, end)]
+
+    def nextDeparturesMany(self, stop_ids, t, n=5, until=None):
+        """
+        Batch version of nextDepartures().
+
+        Args:
+            stop_ids (iterable): The IDs of the stops.
+            t (int or str): The time as seconds since midnight of the service date or as a GTFS time.
+            n (int): The maximum number of departures per stop (optional, default is 5).
+            until (int or str): Only return departures before this time (optional, default is None).
+
+        Returns:
+            dict: The nextDepartures() result of every stop.
+        """
+        return {stop_id: self.nextDepartures(stop_id, t, n, until) for stop_id in stop_ids}
+
+    def mergedDepartures(self, stop_ids, t, n=5, until=None):
+        """
+        Find the next departures from a group of stops, e.g. all platforms of a station.
+
+        Args:
+            stop_ids (iterable): The IDs of the stops.
+            t (int or str): The time as seconds since midnight of the service date or as a GTFS time.
+            n (int): The maximum number of departures (optional, default is 5).
+            until (int or str): Only return departures before this time (optional, default is None).
+
+        Returns:
+            list: Departure tuples of all the stops, earliest first.
+        """
+        departures = [departure for stop_id in dict.fromkeys(stop_ids)
+                      for departure in self.nextDepartures(stop_id, t, n, until)]
+        departures.sort(key=lambda departure: departure.time)
+        return departures[:n]
@@ -0,0 +1,136 @@
+import threading
+import time
+from datetime import datetime, timezone
+from .vehicles import vehicleKey
+
+
+class VehiclePositionTracker(object):
+    """
+    In-memory table of current vehicle positions kept up to date with deltas.
+
+    The first poll (and every resync) downloads all vehicle positions; the polls in between only
+    ask for positions updated since the previous poll via getAllVehiclePositions(updated_since=...).
+    Vehicles that have not been reported for max_age seconds are dropped.
+    """
+
+    def __init__(self, client, key=vehicleKey, max_age=300, resync_interval=600, overlap=5, page_size=10000,
+                 **filters):
+        """
+        Initialize a new instance of VehiclePositionTracker.
+
+        Args:
+            client (GolemioClient): The client used to poll the vehicle positions.
+            key (callable): Function returning the key of a vehicle position feature (optional, default is
+                vehicleKey, the GTFS trip ID falling back to the vehicle registration number).
+            max_age (float): Seconds after which a vehicle that is no longer reported is dropped (optional, default is 300).
+            resync_interval (float): Seconds between full reloads, None disables them (optional, default is 600).
+            overlap (float): Seconds subtracted from the watermark to absorb clock skew and latency (optional, default is 5).
+            page_size (int): The number of positions fetched per request (optional, default is 10000).
+            **filters: Other parameters of getAllVehiclePositions, e.g. route_short_name or include_not_tracking.
+        """
+        self.client = client
+        self.key = key
+        self.max_age = max_age
+        self.resync_interval = resync_interval
+        self.overlap = overlap
+        self.page_size = page_size
+        self.filters = filters
+        self.watermark = None
+        self.last_sync = None
+        self._vehicles = {}
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._vehicles)
+
+    def _isoformat(self, timestamp):
+        return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+    def poll(self, full=False):
+        """
+        Fetch the positions changed since the last poll and apply them to the table.
+
+        Args:
+            full (bool): Flag indicating whether to force a full reload (optional, default is False).
+
+        Returns:
+            dict: The keys of the 'added', 'updated' and 'removed' vehicles.
+
+        Raises:
+            UnauthorizedError: If the API key is invalid or missing.
+        """
+        started = time.time()
+        full = full or self.watermark is None or (
+            self.resync_interval is not None and started - self.last_sync >= self.resync_interval)
+        updated_since = None if full else self._isoformat(self.watermark - self.overlap)
+        features = list(self.client.iterAllVehiclePositions(page_size=self.page_size, updated_since=updated_since,
+                                                            **self.filters))
+        changes = {'added': [], 'updated': [], 'removed': []}
+        with self._lock:
+            received = set()
+            for feature in features:
+                key = self.key(feature)
+                received.add(key)
+                self._seen[key] = started
+                old = self._vehicles.get(key)
+                if old is None:
+                    changes['added'].append(key)
+                elif old != feature:
+                    changes['updated'].append(key)
+                else:
+                    continue
+                self._vehicles[key] = feature
+            for key in list(self._vehicles):
+                if (full and key not in received) or started - self._seen[key] > self.max_age:
+                    del self._vehicles[key]
+                    del self._seen[key]
+                    changes['removed'].append(key)
+            self.watermark = started
+            if full:
+                self.last_sync = started
+        return changes
+
+    def get(self, key):
+        """
+        Get the current position feature of one vehicle.
+
+        Args:
+            key (str): The vehicle key.
+
+        Returns:
+            dict: The vehicle position feature, or None if the vehicle is not tracked.
+        """
+        return self._vehicles.get(key)
+
+    def snapshot(self):
+        """
+        Get a point-in-time copy of the table.
+
+        The copy is shallow: the features themselves are shared, and replaced (never mutated)
+        by later polls.
+
+        Returns:
+            dict: The vehicle position features by key.
+        """
+        with self._lock:
+            return dict(self._vehicles)
+
+    def diff(self, snapshot):
+        """
+        Compare an earlier snapshot with the current table.
+
+        Args:
+            snapshot (dict): A result of snapshot().
+
+        Returns:
+            dict: The keys of the 'added', 'updated' and 'removed' vehicles since the snapshot.
+        """
+        with self._lock:
+            current = dict(self._vehicles)
+        return {
+            'added': [key for key in current if key not in snapshot],
+            'updated': [key for key, feature in current.items()
+                        if key in snapshot and snapshot[key] is not feature],
+            'removed': [key for key in snapshot if key not in current],
+        }
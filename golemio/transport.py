@@ -0,0 +1,273 @@
+import importlib.util
+import threading
+from collections import Counter
+import requests
+from requests.adapters import HTTPAdapter
+
+# pip install httpx[http2]
+# httpx loads slower than requests, so it is only imported by the first HttpxTransport
+HTTPX_AVAILABLE = importlib.util.find_spec('httpx') is not None
+httpx = None
+
+try:
+    # pip install brotli
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content encodings both transports can decode; brotli only when the brotli package is installed
+ACCEPT_ENCODING = 'br, gzip, deflate' if brotli is not None else 'gzip, deflate'
+
+
+class _Response(object):
+    """
+    The response of a transport: status_code, headers, content, iter_content and close, as in
+    requests.Response. The bytes received on the wire and after decoding are reported to the
+    transport once the body was read.
+    """
+
+    def __init__(self, transport, status_code, headers, http_version):
+        self.transport = transport
+        self.status_code = status_code
+        self.headers = headers
+        self.http_version = http_version
+        self._content = None
+        self._decoded = 0
+        self._accounted = False
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = self._read()
+            self._decoded = len(self._content)
+            self._account()
+        return self._content
+
+    def iter_content(self, chunk_size=65536):
+        """
+        Iterate over the decoded body in chunks, for responses sent with stream=True.
+
+        Args:
+            chunk_size (int): The number of bytes read at a time (optional, default is 65536).
+
+        Yields:
+            bytes: The chunks.
+        """
+        for chunk in self._iterChunks(chunk_size):
+            self._decoded += len(chunk)
+            yield chunk
+        self._account()
+
+    def _account(self):
+        if not self._accounted:
+            self._accounted = True
+            self.transport._account(self.http_version, self._wireSize(), self._decoded)
+
+    def close(self):
+        """
+        Release the connection of the response.
+        """
+        self._account()
+        self._close()
+
+
+class _RequestsResponse(_Response):
+
+    def __init__(self, transport, response):
+        version = getattr(response.raw, 'version', None)
+        super().__init__(transport, response.status_code, response.headers,
+                         {10: 'HTTP/1.0', 11: 'HTTP/1.1', 20: 'HTTP/2'}.get(version, 'HTTP/1.1'))
+        self._response = response
+
+    def _read(self):
+        return self._response.content
+
+    def _iterChunks(self, chunk_size):
+        return self._response.iter_content(chunk_size)
+
+    def _wireSize(self):
+        # urllib3 counts the bytes read from the socket before decoding
+        try:
+            return self._response.raw.tell()
+        except (AttributeError, OSError):
+            return self._decoded
+
+    def _close(self):
+        self._response.close()
+
+
+class _HttpxResponse(_Response):
+
+    def __init__(self, transport, response):
+        super().__init__(transport, response.status_code, response.headers, response.http_version)
+        self._response = response
+
+    def _read(self):
+        return self._response.read()
+
+    def _iterChunks(self, chunk_size):
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+
+    def _wireSize(self):
+        return self._response.num_bytes_downloaded
+
+    def _close(self):
+        self._response.close()
+
+
+class _Transport(object):
+    """
+    Base class of the transports sending the GET requests of a GolemioClient.
+
+    A transport has `headers` sent with every request (the API key is stored there) and get(url,
+    headers, stream). Connection errors are raised as requests.ConnectionError and requests.Timeout
+    whatever the HTTP library, so retries and error handling do not depend on the transport.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def _account(self, http_version, wire, decoded):
+        with self._lock:
+            self.requests += 1
+            self.bytes_received += wire
+            self.bytes_decoded += decoded
+            self.http_versions[http_version] += 1
+
+    def reset(self):
+        """
+        Reset the transfer statistics.
+        """
+        self.requests = 0
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+        self.http_versions = Counter()
+
+    def stats(self):
+        """
+        Get the transfer statistics.
+
+        Returns:
+            dict: requests, bytes received on the wire, bytes after decoding the content encoding,
+                bytes saved by compression, and the number of responses per HTTP version.
+        """
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'bytes_received': self.bytes_received,
+                'bytes_decoded': self.bytes_decoded,
+                'bytes_saved': self.bytes_decoded - self.bytes_received,
+                'http_versions': dict(self.http_versions),
+            }
+
+
+class RequestsTransport(_Transport):
+    """
+    HTTP/1.1 transport on a requests.Session with a pool of keep-alive connections; the default.
+    """
+
+    def __init__(self, pool_size=10):
+        """
+        Initialize a new instance of RequestsTransport.
+
+        Args:
+            pool_size (int): The number of keep-alive connections kept per host (optional, default is 10).
+        """
+        super().__init__()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+        self.headers = self.session.headers
+
+    def get(self, url, headers={}, stream=False):
+        """
+        Send a GET request.
+
+        Args:
+            url (str): The request URL.
+            headers (dict): Extra request headers (optional, default is an empty dictionary).
+            stream (bool): Flag indicating whether to defer downloading the body (optional, default is False).
+
+        Returns:
+            The response.
+        """
+        return _RequestsResponse(self, self.session.get(url, headers=headers, stream=stream))
+
+    def close(self):
+        """
+        Close the pooled connections.
+        """
+        self.session.close()
+
+
+class HttpxTransport(_Transport):
+    """
+    Transport on an httpx.Client speaking HTTP/2 where the server supports it.
+
+    Over HTTP/2, all concurrent requests to the API are multiplexed over a single TLS connection,
+    so a fan-out of many requests pays for one connection setup instead of one per request. HTTP/2
+    is negotiated with TLS (ALPN); plain http:// URLs use HTTP/1.1.
+    """
+
+    def __init__(self, http2=True, max_connections=10, timeout=30, verify=True):
+        """
+        Initialize a new instance of HttpxTransport.
+
+        Args:
+            http2 (bool): Flag indicating whether to offer HTTP/2 (optional, default is True).
+            max_connections (int): The maximum number of connections (optional, default is 10).
+            timeout (float): The timeout of connecting and of every read in seconds (optional, default is 30).
+            verify (bool): Flag indicating whether to verify TLS certificates (optional, default is True).
+
+        Raises:
+            ImportError: If httpx (with the h2 package for HTTP/2) is not installed.
+        """
+        global httpx
+        if not HTTPX_AVAILABLE:
+            raise ImportError('HttpxTransport requires httpx (pip install httpx[http2]).')
+        if httpx is None:
+            import httpx
+        super().__init__()
+        self.client = httpx.Client(http2=http2, timeout=timeout, verify=verify,
+                                   limits=httpx.Limits(max_connections=max_connections,
+                                                       max_keepalive_connections=max_connections),
+                                   headers={'Accept-Encoding': ACCEPT_ENCODING})
+        self.headers = self.client.headers
+
+    def get(self, url, headers={}, stream=False):
+        """
+        Send a GET request.
+
+        Args:
+            url (str): The request URL.
+            headers (dict): Extra request headers (optional, default is an empty dictionary).
+            stream (bool): Flag indicating whether to defer downloading the body (optional, default is False).
+
+        Returns:
+            The response.
+
+        Raises:
+            requests.ConnectionError: If the connection failed.
+            requests.Timeout: If the request timed out.
+        """
+        try:
+            response = self.client.send(self.client.build_request('GET', url, headers=headers), stream=stream)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(str(e)) from e
+        return _HttpxResponse(self, response)
+
+    def close(self):
+        """
+        Close the connections.
+        """
+        self.client.close()
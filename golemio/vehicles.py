@@ -0,0 +1,381 @@
+import threading
+import time
+
+try:
+    # pip install gtfs-realtime-bindings
+    from google.transit import gtfs_realtime_pb2
+except ImportError:
+    gtfs_realtime_pb2 = None
+
+# The fields a VehicleSnapshot is indexed by
+INDEXES = ('route_id', 'route_short_name', 'trip_id', 'vehicle_id', 'last_stop_id', 'next_stop_id')
+
+
+def _featureKeys(feature):
+    properties = feature.get('properties') or {}
+    trip = properties.get('trip') or {}
+    gtfs = trip.get('gtfs') or {}
+    position = properties.get('last_position') or {}
+    return (gtfs.get('route_id'), gtfs.get('route_short_name'), gtfs.get('trip_id'),
+            trip.get('vehicle_registration_number'), (position.get('last_stop') or {}).get('id'),
+            (position.get('next_stop') or {}).get('id'))
+
+
+def _recordKeys(record):
+    return (record.route_id, record.route_short_name, record.trip_id, record.vehicle_registration_number,
+            record.last_stop_id, record.next_stop_id)
+
+
+def _messageKeys(vehicle):
+    # GTFS Realtime only knows the stop the vehicle is at (STOPPED_AT) or heading to
+    stopped = vehicle.current_status == gtfs_realtime_pb2.VehiclePosition.STOPPED_AT
+    stop_id = vehicle.stop_id or None
+    return (vehicle.trip.route_id or None, None, vehicle.trip.trip_id or None, vehicle.vehicle.id or None,
+            stop_id if stopped else None, None if stopped else stop_id)
+
+
+def _keysOf(vehicle):
+    if isinstance(vehicle, dict):
+        return _featureKeys(vehicle)
+    if hasattr(vehicle, 'last_stop_id'):
+        return _recordKeys(vehicle)
+    return _messageKeys(vehicle)
+
+
+def vehicleKey(vehicle):
+    """
+    Default vehicle key: the GTFS trip ID, falling back to the vehicle ID (the registration number of a
+    feature or record) and then to the feature ID. VehiclePositionTracker uses it too, so its change
+    keys can be passed to VehicleSnapshot.patch().
+
+    Args:
+        vehicle: A vehicle position feature, VehiclePosition record or GTFS Realtime message.
+
+    Returns:
+        The key, or None if the vehicle carries no ID at all.
+    """
+    keys = _keysOf(vehicle)
+    key = keys[2] or keys[3]
+    if not key and isinstance(vehicle, dict):
+        key = vehicle.get('id')
+    return key or None
+
+
+class VehicleSnapshot(object):
+    """
+    Immutable set of vehicle positions with hash indexes for O(1) group lookups.
+
+    Vehicles are getAllVehiclePositions features, VehiclePosition records of a typed client, or
+    VehiclePosition messages of the GTFS Realtime feed (which carry no route_short_name and only
+    the stop the vehicle is at or heading to). A snapshot never changes once built: patch()
+    returns a new snapshot, so readers need no locks.
+
+    Vehicles are identified by `key`, the same function as the key of a VehiclePositionTracker
+    feeding patch(). Vehicles without a key are never merged with each other.
+    """
+
+    def __init__(self, vehicles, timestamp=None, key=vehicleKey):
+        """
+        Initialize a new instance of VehicleSnapshot.
+
+        Args:
+            vehicles (iterable): The vehicle positions.
+            timestamp (float): The POSIX time of the data (optional, default is the current time).
+            key (callable): Function returning the key of a vehicle (optional, default is vehicleKey).
+        """
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.key = key
+        self._vehicles = {}
+        self._keys = {}
+        groups = {name: {} for name in INDEXES}
+        for vehicle in vehicles:
+            keys = _keysOf(vehicle)
+            key = self._identity(vehicle)
+            if key in self._vehicles:
+                continue
+            self._vehicles[key] = vehicle
+            self._keys[key] = keys
+            for name, value in zip(INDEXES, keys):
+                if value is not None:
+                    groups[name].setdefault(value, []).append(vehicle)
+        self._indexes = {name: {value: tuple(members) for value, members in index.items()}
+                         for name, index in groups.items()}
+
+    def _identity(self, vehicle):
+        key = self.key(vehicle)
+        # A vehicle without a key gets one of its own rather than replacing another keyless vehicle
+        return object() if key is None else key
+
+    @classmethod
+    def fromResponse(cls, data, timestamp=None, key=vehicleKey):
+        """
+        Build a snapshot from a getAllVehiclePositions response.
+
+        Args:
+            data (dict or list): The FeatureCollection, or a list of features or VehiclePosition records.
+            timestamp (float): The POSIX time of the data (optional, default is the current time).
+            key (callable): Function returning the key of a vehicle (optional, default is vehicleKey).
+
+        Returns:
+            VehicleSnapshot: The snapshot.
+        """
+        vehicles = data.get('features', []) if isinstance(data, dict) else data
+        return cls(vehicles, timestamp, key)
+
+    @classmethod
+    def fromProtobuf(cls, data, key=vehicleKey):
+        """
+        Build a snapshot from a getVehiclePositionsProtobuf feed.
+
+        Args:
+            data (bytes): The feed.
+            key (callable): Function returning the key of a vehicle (optional, default is vehicleKey).
+
+        Returns:
+            VehicleSnapshot: The snapshot, timestamped with the feed header.
+
+        Raises:
+            ImportError: If gtfs-realtime-bindings is not installed.
+        """
+        if gtfs_realtime_pb2 is None:
+            raise ImportError('Decoding the feed requires gtfs-realtime-bindings (pip install gtfs-realtime-bindings).')
+        feed = gtfs_realtime_pb2.FeedMessage()
+        feed.ParseFromString(data)
+        return cls([entity.vehicle for entity in feed.entity if entity.HasField('vehicle')],
+                   feed.header.timestamp or None, key)
+
+    def __len__(self):
+        return len(self._vehicles)
+
+    def __iter__(self):
+        return iter(self._vehicles.values())
+
+    def lookup(self, index, value):
+        """
+        Get the vehicles with a value of an indexed field.
+
+        Args:
+            index (str): The field, one of INDEXES.
+            value: The value, e.g. a route ID.
+
+        Returns:
+            tuple: The vehicles, empty if there are none.
+        """
+        return self._indexes[index].get(value, ())
+
+    def groups(self, index):
+        """
+        Get all groups of an indexed field.
+
+        Args:
+            index (str): The field, one of INDEXES.
+
+        Returns:
+            dict: The vehicles by value; do not modify it.
+        """
+        return self._indexes[index]
+
+    def byRoute(self, route_id):
+        """
+        Get the vehicles of a route.
+
+        Args:
+            route_id (str): The GTFS route ID, e.g. 'L22'.
+
+        Returns:
+            tuple: The vehicles.
+        """
+        return self.lookup('route_id', route_id)
+
+    def byRouteShortName(self, route_short_name):
+        """
+        Get the vehicles of a route by its public name.
+
+        Args:
+            route_short_name (str): The route short name, e.g. '22'.
+
+        Returns:
+            tuple: The vehicles.
+        """
+        return self.lookup('route_short_name', route_short_name)
+
+    def byTrip(self, trip_id):
+        """
+        Get the vehicle serving a trip.
+
+        Args:
+            trip_id (str): The GTFS trip ID.
+
+        Returns:
+            The vehicle, or None.
+        """
+        vehicles = self.lookup('trip_id', trip_id)
+        return vehicles[0] if vehicles else None
+
+    def byVehicle(self, vehicle_id):
+        """
+        Get a vehicle by its ID: the registration number of a feature or record, the vehicle ID of a message.
+
+        Args:
+            vehicle_id (int or str): The vehicle ID.
+
+        Returns:
+            The vehicle, or None.
+        """
+        vehicles = self.lookup('vehicle_id', vehicle_id)
+        return vehicles[0] if vehicles else None
+
+    def byLastStop(self, stop_id):
+        """
+        Get the vehicles that last served a stop.
+
+        Args:
+            stop_id (str): The GTFS stop ID.
+
+        Returns:
+            tuple: The vehicles.
+        """
+        return self.lookup('last_stop_id', stop_id)
+
+    def byNextStop(self, stop_id):
+        """
+        Get the vehicles heading to a stop.
+
+        Args:
+            stop_id (str): The GTFS stop ID.
+
+        Returns:
+            tuple: The vehicles.
+        """
+        return self.lookup('next_stop_id', stop_id)
+
+    def patch(self, updated=(), removed=(), timestamp=None):
+        """
+        Build a new snapshot with some vehicles changed, reusing the untouched index groups.
+
+        Args:
+            updated (iterable): New or changed vehicles, matched by their key; vehicles without a key are added.
+            removed (iterable): The keys of the vehicles to drop, e.g. the 'removed' keys of
+                VehiclePositionTracker.poll().
+            timestamp (float): The POSIX time of the new data (optional, default is the current time).
+
+        Returns:
+            VehicleSnapshot: The new snapshot; this one is left unchanged.
+        """
+        snapshot = VehicleSnapshot.__new__(VehicleSnapshot)
+        snapshot.timestamp = time.time() if timestamp is None else timestamp
+        snapshot.key = self.key
+        snapshot._vehicles = dict(self._vehicles)
+        snapshot._keys = dict(self._keys)
+        # The replaced vehicle objects and the (index, value) of every group that loses or gains one
+        stale, touched, added = set(), set(), []
+        for key in removed:
+            if key in snapshot._vehicles:
+                stale.add(id(snapshot._vehicles.pop(key)))
+                touched.update(zip(INDEXES, snapshot._keys.pop(key)))
+        latest = {}
+        for vehicle in updated:
+            latest[self._identity(vehicle)] = (vehicle, _keysOf(vehicle))
+        for key, (vehicle, keys) in latest.items():
+            if key in snapshot._vehicles:
+                stale.add(id(snapshot._vehicles[key]))
+                touched.update(zip(INDEXES, snapshot._keys[key]))
+            snapshot._vehicles[key] = vehicle
+            snapshot._keys[key] = keys
+            added.append((vehicle, keys))
+        groups = {}
+        for name, value in touched:
+            if value is not None:
+                groups[(name, value)] = [vehicle for vehicle in self._indexes[name].get(value, ())
+                                         if id(vehicle) not in stale]
+        for vehicle, keys in added:
+            for name, value in zip(INDEXES, keys):
+                if value is not None:
+                    members = groups.get((name, value))
+                    if members is None:
+                        members = groups[(name, value)] = [existing for existing in self._indexes[name].get(value, ())
+                                                           if id(existing) not in stale]
+                    members.append(vehicle)
+        indexes = {name: dict(index) for name, index in self._indexes.items()}
+        for (name, value), members in groups.items():
+            if members:
+                indexes[name][value] = tuple(members)
+            else:
+                indexes[name].pop(value, None)
+        snapshot._indexes = indexes
+        return snapshot
+
+
+class LiveVehicles(object):
+    """
+    Holder of the current VehicleSnapshot, refreshed with one city-wide request.
+
+    refresh() builds the next snapshot and swaps it in with a single assignment, so concurrent
+    readers always see either the old or the new snapshot, never a partly updated one, and never
+    wait. The lookups of VehicleSnapshot are forwarded to the current snapshot.
+    """
+
+    def __init__(self, client, source='json', key=vehicleKey, **filters):
+        """
+        Initialize a new instance of LiveVehicles.
+
+        Args:
+            client (GolemioClient): The client used to download the vehicle positions.
+            source (str): 'json' for getAllVehiclePositions or 'protobuf' for getVehiclePositionsProtobuf
+                (optional, default is 'json').
+            key (callable): Function returning the key of a vehicle, the same as the key of a
+                VehiclePositionTracker feeding patch() (optional, default is vehicleKey).
+            **filters: Other parameters of getAllVehiclePositions, e.g. include_not_tracking.
+
+        Raises:
+            ValueError: If the source is unknown.
+        """
+        if source not in ('json', 'protobuf'):
+            raise ValueError(f'Unknown source {source!r}, expected json or protobuf.')
+        self.client = client
+        self.source = source
+        self.key = key
+        self.filters = filters
+        self.snapshot = VehicleSnapshot((), key=key)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name == 'snapshot':
+            raise AttributeError(name)
+        return getattr(self.snapshot, name)
+
+    def __len__(self):
+        return len(self.snapshot)
+
+    def refresh(self):
+        """
+        Download all vehicle positions and replace the snapshot.
+
+        Returns:
+            VehicleSnapshot: The new snapshot.
+        """
+        # Only one refresh builds at a time; readers keep using the previous snapshot meanwhile
+        with self._lock:
+            if self.source == 'protobuf':
+                snapshot = VehicleSnapshot.fromProtobuf(self.client.getVehiclePositionsProtobuf(), self.key)
+            else:
+                snapshot = VehicleSnapshot.fromResponse(self.client.getAllVehiclePositions(**self.filters),
+                                                        key=self.key)
+            self.snapshot = snapshot
+        return snapshot
+
+    def patch(self, updated=(), removed=(), timestamp=None):
+        """
+        Apply changed vehicles, e.g. from VehiclePositionTracker, and swap in the patched snapshot.
+
+        Args:
+            updated (iterable): New or changed vehicles.
+            removed (iterable): The keys of the vehicles to drop.
+            timestamp (float): The POSIX time of the new data (optional, default is the current time).
+
+        Returns:
+            VehicleSnapshot: The new snapshot.
+        """
+        with self._lock:
+            self.snapshot = self.snapshot.patch(updated, removed, timestamp)
+        return self.snapshot
@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubGolemioServer(object):
+    """
+    Minimal local stand-in for the Golemio API used by the offline tests.
+
+    Routes map an API path (without the version prefix) to either a payload or a callable
+    taking (path, query) and returning (status, body, headers). `latency` seconds are slept
+    before every response to emulate a remote server.
+    """
+
+    def __init__(self, routes=None, latency=0):
+        self.routes = dict(routes or {})
+        self.latency = latency
+        self.requests = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def address(self):
+        return '%s:%d' % self.httpd.server_address
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def attach(self, client):
+        """
+        Point a (sync or async) client at this server.
+        """
+        client.base_url = self.address
+        client.protocol = 'http'
+        return client
+
+    def _handle(self, handler):
+        url = urllib.parse.urlsplit(handler.path)
+        path = url.path.split('/', 2)[-1]
+        path = '/' + path
+        query = urllib.parse.parse_qs(url.query)
+        with self._lock:
+            self.requests.append((path, query, dict(handler.headers)))
+        if self.latency:
+            time.sleep(self.latency)
+        route = self.routes.get(path)
+        headers = {}
+        if route is None:
+            status, body = 404, b'{"error_message": "Not Found"}'
+        elif callable(route):
+            status, body, headers = route(path, query)
+        else:
+            status, body = 200, route
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+            headers.setdefault('Content-Type', 'application/json')
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+def paged(records, geojson=False):
+    """
+    Build a stub route serving `records` according to the limit/offset query parameters.
+    """
+    def route(path, query):
+        limit = int(query['limit'][0])
+        offset = int(query['offset'][0])
+        page = records[offset:offset + limit]
+        if geojson:
+            page = {'type': 'FeatureCollection', 'features': page}
+        return 200, json.dumps(page).encode(), {'Content-Type': 'application/json'}
+    return route
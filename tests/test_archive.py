@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import unittest
+from golemio.archive import ReplayClient, SnapshotArchive
+from golemio.errors import NotFoundError
+
+
+class SnapshotArchiveTests(unittest.TestCase):
+    """
+    Unit tests for the segmented snapshot archive.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'archive')
+        self.snapshots = [(1700000000 + 10 * i, f'snapshot {i} '.encode() * 200) for i in range(50)]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def fill(self, archive):
+        for timestamp, data in self.snapshots:
+            archive.append('vehicle_positions', data, timestamp)
+
+    def test_random_access_and_ranges(self):
+        """
+        Test lookups, range scans and segment rollover across reopening the archive.
+        """
+        with SnapshotArchive(self.path, segment_size=1024) as archive:
+            self.fill(archive)
+            self.assertEqual(archive.get('vehicle_positions', 1700000015), self.snapshots[1])
+            self.assertIsNone(archive.get('vehicle_positions', 1699999999))
+            self.assertEqual(list(archive.range('vehicle_positions', 1700000100, 1700000130)), self.snapshots[10:13])
+            with self.assertRaises(ValueError):
+                archive.append('vehicle_positions', b'late', 1700000000)
+            stats = archive.stats('vehicle_positions')
+            self.assertGreater(stats['segments'], 1)
+            self.assertLess(stats['compressed_bytes'], stats['bytes'] / 10)
+        with SnapshotArchive(self.path, codec='lzma') as archive:
+            self.assertEqual(archive.codec, 'zlib')
+            self.assertEqual(archive.feeds(), ['vehicle_positions'])
+            archive.append('vehicle_positions', b'next', 1700000500)
+            self.assertEqual(archive.count('vehicle_positions'), 51)
+            self.assertEqual(list(archive.range('vehicle_positions', 1700000491)), [(1700000500, b'next')])
+            self.assertEqual(archive.get('vehicle_positions', 1700000123), self.snapshots[12])
+
+    def test_recovery(self):
+        """
+        Test that an interrupted append is discarded when the archive is reopened.
+        """
+        with SnapshotArchive(self.path, codec='lzma') as archive:
+            self.fill(archive)
+        index = os.path.join(self.path, 'vehicle_positions', 'index.bin')
+        segment = os.path.join(self.path, 'vehicle_positions', '000000.seg')
+        with open(index, 'ab') as f:
+            f.write(b'\x00' * 7)
+        with open(segment, 'r+b') as f:
+            f.truncate(os.path.getsize(segment) - 1)
+        with SnapshotArchive(self.path) as archive:
+            self.assertEqual(archive.count('vehicle_positions'), 49)
+            archive.append('vehicle_positions', b'after', 1700001000)
+            self.assertEqual(list(archive.range('vehicle_positions', 1700000480)),
+                             [self.snapshots[48], (1700001000, b'after')])
+
+    def test_readonly(self):
+        """
+        Test that reads never create or repair files, and that a reader follows a live writer.
+        """
+        with self.assertRaises(FileNotFoundError):
+            SnapshotArchive(self.path, readonly=True)
+        self.assertFalse(os.path.exists(self.path))
+        with SnapshotArchive(self.path) as archive:
+            self.assertIsNone(archive.get('alerts', 1700000000))
+            self.assertEqual(list(archive.range('alerts')), [])
+            self.assertEqual(archive.count('alerts'), 0)
+            self.assertFalse(os.path.exists(os.path.join(self.path, 'alerts')))
+            self.fill(archive)
+        index = os.path.join(self.path, 'vehicle_positions', 'index.bin')
+        with open(index, 'ab') as f:
+            f.write(b'\x00' * 7)
+        size = os.path.getsize(index)
+        with SnapshotArchive(self.path) as writer, SnapshotArchive(self.path, readonly=True) as reader:
+            self.assertEqual(reader.count('vehicle_positions'), 50)
+            self.assertEqual(writer.get('vehicle_positions', 1700000015), self.snapshots[1])
+            self.assertEqual(os.path.getsize(index), size)
+            writer.append('vehicle_positions', b'live', 1700001000)
+            self.assertEqual(reader.get('vehicle_positions', 1700001000), (1700001000, b'live'))
+            self.assertEqual(reader.stats('vehicle_positions')['last'], 1700001000)
+            with self.assertRaises(ValueError):
+                reader.append('vehicle_positions', b'no', 1700002000)
+
+    def test_replay(self):
+        """
+        Test paced replay and serving snapshots through the client interface.
+        """
+        waits = []
+        with SnapshotArchive(self.path) as archive:
+            self.fill(archive)
+            replayed = list(archive.replay('vehicle_positions', 1700000000, 1700000030, speed=10, sleep=waits.append))
+            self.assertEqual(replayed, self.snapshots[:3])
+            # The fake sleep does not advance the clock, so each wait covers the whole recorded gap
+            self.assertEqual([round(wait) for wait in waits], [1, 2])
+            client = ReplayClient(archive, start=1700000205, speed=0)
+            self.assertEqual(client.getVehiclePositionsProtobuf(), self.snapshots[20][1])
+            with self.assertRaises(NotFoundError):
+                client.getTripUpdatesProtobuf()
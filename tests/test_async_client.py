@@ -0,0 +1,63 @@
+import asyncio
+import unittest
+from golemio.async_client import AsyncGolemioClient
+from golemio.errors import NotFoundError
+from stub import StubGolemioServer
+
+
+class AsyncGolemioClientTests(unittest.TestCase):
+    """
+    Unit tests for the AsyncGolemioClient class, run against a local stub server.
+    """
+
+    def setUp(self):
+        """
+        Start the stub server and create an AsyncGolemioClient pointing at it.
+        """
+        self.server = StubGolemioServer({
+            '/gtfs/routes': [{'route_id': 'L22'}],
+            '/gtfs/routes/L22': {'route_id': 'L22'},
+            '/vehiclepositions/gtfsrt/trip_updates.pb': b'\x0a\x00',
+        }).start()
+        self.client = self.server.attach(AsyncGolemioClient('key', max_concurrency=4))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def run_async(self, coro):
+        async def wrapper():
+            async with self.client:
+                return await coro()
+        return asyncio.run(wrapper())
+
+    def test_getGTFSRoutes(self):
+        """
+        Test that getters return awaitables resolving to the decoded JSON.
+        """
+        routes = self.run_async(lambda: self.client.getGTFSRoutes())
+        self.assertEqual(routes, [{'route_id': 'L22'}])
+        self.assertEqual(self.server.requests[0][2]['X-Access-Token'], 'key')
+
+    def test_protobuf(self):
+        """
+        Test that the protobuf getters return raw bytes.
+        """
+        data = self.run_async(lambda: self.client.getTripUpdatesProtobuf())
+        self.assertEqual(data, b'\x0a\x00')
+
+    def test_gather(self):
+        """
+        Test that many requests can be fanned out concurrently on one session.
+        """
+        async def fan_out():
+            return await asyncio.gather(*[self.client.getGTFSRoute('L22') for _ in range(20)])
+        results = self.run_async(fan_out)
+        self.assertEqual(len(results), 20)
+        self.assertEqual(len(self.server.requests), 20)
+
+    def test_not_found(self):
+        """
+        Test that a 404 is raised as NotFoundError.
+        """
+        with self.assertRaises(NotFoundError):
+            self.run_async(lambda: self.client.getGTFSRoute('missing'))
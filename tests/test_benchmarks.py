@@ -0,0 +1,51 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+import fixtures
+import importtime
+import run
+
+
+class BenchmarkTests(unittest.TestCase):
+    """
+    Smoke tests for the offline benchmark suite.
+    """
+
+    def test_run_and_compare(self):
+        """
+        Test a short run against generated fixtures and the regression check.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            fixtures.generate(directory, stops=100, vehicles=20, departures=5)
+            output = os.path.join(directory, 'results.json')
+            self.assertEqual(run.main(['stops', 'departureboards_cached', '--fixtures', directory, '--requests', '20',
+                                       '--concurrency', '4', '--output', output]), 0)
+            with open(output) as f:
+                results = json.load(f)
+            self.assertEqual(set(results['results']), {'stops', 'departureboards_cached'})
+            stops = results['results']['stops']
+            self.assertEqual((stops['ops'], stops['errors'], stops['upstream_requests']), (20, 0, 20))
+            self.assertLessEqual(stops['latency']['p50'], stops['latency']['max'])
+            self.assertLess(results['results']['departureboards_cached']['upstream_requests'], 20)
+            baseline = {'results': {'stops': dict(stops, throughput=stops['throughput'] * 2)}}
+            self.assertEqual([name for name, *_ in run.compare(results, baseline, 0.1)], ['stops'])
+
+    def test_import_time(self):
+        """
+        Test the cold start measurements, the eager import guard and the regression check.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'importtime.json')
+            self.assertEqual(importtime.main(['--runs', '2', '--output', output]), 0)
+            with open(output) as f:
+                results = json.load(f)
+        self.assertEqual(results['eager_modules'], [])
+        self.assertEqual(results['results']['import']['runs'], 2)
+        self.assertLess(results['results']['import']['median'], results['results']['first_call']['median'])
+        baseline = {'results': {'first_call': {'median': results['results']['first_call']['median'] / 2}}}
+        self.assertEqual([name for name, *_ in importtime.compare(results, baseline, 0.25)], ['first_call'])
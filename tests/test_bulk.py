@@ -0,0 +1,59 @@
+import asyncio
+import unittest
+from golemio.async_client import AsyncGolemioClient
+from golemio.client import GolemioClient
+from golemio.errors import NotFoundError
+from stub import StubGolemioServer
+
+
+class BulkFetchTests(unittest.TestCase):
+    """
+    Unit tests for the *ByIds bulk fetch methods.
+    """
+
+    def setUp(self):
+        routes = {f'/gtfs/trips/{i}': {'trip_id': str(i)} for i in range(30)}
+        routes['/gtfs/shapes/S1'] = [{'shape_pt_lat': 50.0, 'shape_pt_lon': 14.0}]
+        self.server = StubGolemioServer(routes).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_getGTFSTripsByIds(self):
+        """
+        Test that duplicates are fetched once, results keep the ID order and 404s are captured.
+        """
+        client = self.server.attach(GolemioClient(pool_size=4))
+        ids = [str(i) for i in range(30)] + ['missing', '3', '3']
+        result = client.getGTFSTripsByIds(ids)
+        self.assertEqual(list(result), [str(i) for i in range(30)])
+        self.assertEqual(result['7'], {'trip_id': '7'})
+        self.assertIsInstance(result.errors['missing'], NotFoundError)
+        self.assertEqual(len(self.server.requests), 31)
+
+    def test_iterGTFSShapesByIds(self):
+        """
+        Test the streaming variant.
+        """
+        client = self.server.attach(GolemioClient())
+        results = {shape_id: (shape, error) for shape_id, shape, error in client.iterGTFSShapesByIds(['S1', 'S2'])}
+        self.assertEqual(results['S1'][0], [{'shape_pt_lat': 50.0, 'shape_pt_lon': 14.0}])
+        self.assertIsInstance(results['S2'][1], NotFoundError)
+
+    def test_adapter_pool_size(self):
+        """
+        Test that the session adapters are sized explicitly.
+        """
+        client = GolemioClient(pool_size=32)
+        self.assertEqual(client.session.get_adapter('https://api.golemio.cz')._pool_maxsize, 32)
+
+    def test_async_getGTFSTripsByIds(self):
+        """
+        Test the async bulk fetch.
+        """
+        async def fetch():
+            async with self.server.attach(AsyncGolemioClient()) as client:
+                return await client.getGTFSTripsByIds(['1', '2', 'missing'], max_workers=2)
+        result = asyncio.run(fetch())
+        self.assertEqual(list(result), ['1', '2'])
+        self.assertEqual(list(result.errors), ['missing'])
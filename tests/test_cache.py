@@ -0,0 +1,101 @@
+import tempfile
+import time
+import unittest
+from golemio.cache import CacheEntry, DiskCache, MemoryCache, ResponseCache
+from golemio.client import GolemioClient
+from stub import StubGolemioServer
+
+
+class ResponseCacheTests(unittest.TestCase):
+    """
+    Unit tests for the response cache and its backends.
+    """
+
+    def setUp(self):
+        self.server = StubGolemioServer({
+            '/gtfs/routes': [{'route_id': 'L22'}],
+            '/gtfs/stops': self.conditional,
+            '/pid/infotexts': [],
+        }).start()
+        self.cache = ResponseCache()
+        self.client = self.server.attach(GolemioClient(cache=self.cache))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def conditional(self, path, query):
+        """
+        Stub route answering 304 to a matching If-None-Match header.
+        """
+        if self.server.requests[-1][2].get('If-None-Match') == '"v1"':
+            return 304, b'', {'ETag': '"v1"'}
+        return 200, b'{"features": []}', {'ETag': '"v1"', 'Content-Type': 'application/json'}
+
+    def test_hit(self):
+        """
+        Test that a fresh entry is served without contacting the server.
+        """
+        self.assertEqual(self.client.getGTFSRoutes(), [{'route_id': 'L22'}])
+        self.assertEqual(self.client.getGTFSRoutes(), [{'route_id': 'L22'}])
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_uncached_path(self):
+        """
+        Test that paths without a TTL always go to the server.
+        """
+        self.client.getInfoTexts()
+        self.client.getInfoTexts()
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_revalidation(self):
+        """
+        Test that a stale entry is revalidated with If-None-Match and reused on 304.
+        """
+        self.client.getGTFSAllStops()
+        for entry in self.cache.backend._entries.values():
+            entry.expires = 0
+        self.assertEqual(self.client.getGTFSAllStops(), {'features': []})
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.cache.stats()['revalidations'], 1)
+        self.assertTrue(next(iter(self.cache.backend._entries.values())).isFresh())
+
+    def test_ttl_rules(self):
+        """
+        Test the default per-endpoint-family TTLs.
+        """
+        self.assertEqual(self.cache.ttlFor('/gtfs/shapes/L991V2'), 24 * 60 * 60)
+        self.assertEqual(self.cache.ttlFor('/pid/departureboards'), 10)
+        self.assertEqual(self.cache.ttlFor('/vehiclepositions/gtfsrt/alerts.pb'), 0)
+        self.assertEqual(self.cache.ttlFor('/vehiclepositions'), 0)
+
+    def test_memory_lru(self):
+        """
+        Test that the memory backend evicts the least recently used entries by size.
+        """
+        backend = MemoryCache(max_bytes=10)
+        backend.set('a', CacheEntry('a', b'1234', time.time() + 60))
+        backend.set('b', CacheEntry('b', b'1234', time.time() + 60))
+        backend.get('a')
+        backend.set('c', CacheEntry('c', b'1234', time.time() + 60))
+        self.assertIsNone(backend.get('b'))
+        self.assertIsNotNone(backend.get('a'))
+        self.assertEqual(backend.size, 8)
+        self.assertEqual(backend.evictions, 1)
+
+    def test_disk_backend(self):
+        """
+        Test that the disk backend persists entries across instances.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            backend = DiskCache(directory)
+            backend.set('a', CacheEntry('a', b'body', time.time() + 60, etag='"x"'))
+            reopened = DiskCache(directory)
+            self.assertEqual(len(reopened), 1)
+            entry = reopened.get('a')
+            self.assertEqual(entry.body, b'body')
+            self.assertEqual(entry.validators(), {'If-None-Match': '"x"'})
+            reopened.clear()
+            self.assertIsNone(reopened.get('a'))
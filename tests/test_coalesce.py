@@ -0,0 +1,174 @@
+import threading
+import time
+import unittest
+from golemio.coalesce import DepartureBoardBatcher, SingleFlight
+
+
+class FakeClient(object):
+    """
+    Stand-in for GolemioClient recording departure board calls.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def getDepartureBoards(self, ids=None, asw_ids=None, limit=20, **kwargs):
+        self.calls.append({'ids': ids, 'asw_ids': asw_ids, 'limit': limit, **kwargs})
+        time.sleep(0.02)
+        stops = [{'stop_id': stop_id, 'asw_id': {'node': int(stop_id[1:]), 'stop': 1}} for stop_id in ids or []]
+        departures = [{'stop': {'id': stop_id}, 'trip': {'id': f'{stop_id}-{i}'}}
+                      for stop_id in ids or [] for i in range(3)]
+        return {'stops': stops, 'departures': departures, 'infotexts': []}
+
+
+class CoalesceTests(unittest.TestCase):
+    """
+    Unit tests for SingleFlight and DepartureBoardBatcher.
+    """
+
+    def run_threads(self, targets):
+        results = [None] * len(targets)
+
+        def run(i, target):
+            results[i] = target()
+        threads = [threading.Thread(target=run, args=(i, target)) for i, target in enumerate(targets)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_single_flight(self):
+        """
+        Test that identical concurrent calls share one execution.
+        """
+        flight = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.05)
+            return 'result'
+        results = self.run_threads([lambda: flight.do('key', slow)] * 10)
+        self.assertEqual(results, ['result'] * 10)
+        self.assertEqual(len(calls), 1)
+
+    def test_batching(self):
+        """
+        Test that requests for different stops within the window become one call split per caller.
+        """
+        client = FakeClient()
+        batcher = DepartureBoardBatcher(client, window=0.1)
+        stop_ids = ['U%d' % i for i in range(8)]
+        results = self.run_threads([lambda stop_id=stop_id: batcher.getDepartureBoards(ids=stop_id, limit=2)
+                                    for stop_id in stop_ids])
+        self.assertEqual(len(client.calls), 1)
+        self.assertEqual(sorted(client.calls[0]['ids']), stop_ids)
+        self.assertEqual(client.calls[0]['limit'], 16)
+        for stop_id, board in zip(stop_ids, results):
+            self.assertEqual([stop['stop_id'] for stop in board['stops']], [stop_id])
+            self.assertEqual(len(board['departures']), 2)
+            self.assertTrue(all(d['stop']['id'] == stop_id for d in board['departures']))
+        self.assertEqual(batcher.requests, 8)
+        self.assertEqual(batcher.upstream_calls, 1)
+
+    def test_asw_ids_split(self):
+        """
+        Test that ASW node IDs are matched against the stops of the merged board.
+        """
+        client = FakeClient()
+        batcher = DepartureBoardBatcher(client, window=0)
+        board = batcher._split(client.getDepartureBoards(ids=['U1', 'U2']), [], ['2'], 20)
+        self.assertEqual([stop['stop_id'] for stop in board['stops']], ['U2'])
+        self.assertEqual(len(board['departures']), 3)
+
+    def test_asw_delimiters(self):
+        """
+        Test that ASW IDs with the / delimiter or as ints are batched like node_platform IDs.
+        """
+        class AswClient(FakeClient):
+
+            def getDepartureBoards(self, ids=None, asw_ids=None, limit=20, **kwargs):
+                self.calls.append({'asw_ids': asw_ids, 'limit': limit})
+                time.sleep(0.02)
+                asw_ids = [asw_ids] if isinstance(asw_ids, (str, int)) else asw_ids
+                nodes = [str(asw_id).replace('/', '_').split('_') + ['1'] for asw_id in asw_ids]
+                stops = [{'stop_id': f'U{node[0]}Z{node[1]}P', 'asw_id': {'node': int(node[0]), 'stop': int(node[1])}}
+                         for node in nodes]
+                departures = [{'stop': {'id': stop['stop_id']}} for stop in stops]
+                return {'stops': stops, 'departures': departures, 'infotexts': []}
+
+        client = AswClient()
+        batcher = DepartureBoardBatcher(client, window=0.05)
+        board = batcher.getDepartureBoards(asw_ids='1040/2')
+        self.assertEqual(client.calls[-1]['asw_ids'], ['1040_2'])
+        self.assertEqual(board, client.getDepartureBoards(asw_ids='1040/2'))
+        self.assertEqual((len(board['stops']), len(board['departures'])), (1, 1))
+        results = self.run_threads([lambda: batcher.getDepartureBoards(asw_ids='1040/2'),
+                                    lambda: batcher.getDepartureBoards(asw_ids=1041)])
+        self.assertEqual(sorted(client.calls[-1]['asw_ids']), ['1040_2', '1041'])
+        self.assertEqual([[stop['stop_id'] for stop in board['stops']] for board in results],
+                         [['U1040Z2P'], ['U1041Z1P']])
+        self.assertEqual([len(board['departures']) for board in results], [1, 1])
+
+    def test_lone_request_unchanged(self):
+        """
+        Test that a request without company in its window gets the upstream board as it is.
+        """
+        client = FakeClient()
+        batcher = DepartureBoardBatcher(client, window=0)
+        response = {'stops': [], 'departures': [{'stop': {'id': 'U9'}}], 'infotexts': []}
+        client.getDepartureBoards = lambda **kwargs: response
+        self.assertIs(batcher.getDepartureBoards(ids='U1'), response)
+
+    def test_different_params_not_merged(self):
+        """
+        Test that requests with different parameters are not merged.
+        """
+        client = FakeClient()
+        batcher = DepartureBoardBatcher(client, window=0.05)
+        self.run_threads([lambda: batcher.getDepartureBoards(ids='U1', mode='departures'),
+                          lambda: batcher.getDepartureBoards(ids='U2', mode='arrivals')])
+        self.assertEqual(len(client.calls), 2)
+
+    def test_errors_propagate(self):
+        """
+        Test that an upstream error reaches every merged caller.
+        """
+        client = FakeClient()
+        client.getDepartureBoards = lambda **kwargs: 1 / 0
+        batcher = DepartureBoardBatcher(client, window=0.05)
+        errors = []
+
+        def call(stop_id):
+            try:
+                batcher.getDepartureBoards(ids=stop_id)
+            except ZeroDivisionError as e:
+                errors.append(e)
+        self.run_threads([lambda: call('U1'), lambda: call('U2')])
+        self.assertEqual(len(errors), 2)
+
+    def test_limit_cap(self):
+        """
+        Test that batches close at max_limit and that callers crowded out of a cut-off board refetch.
+        """
+        class BusyClient(FakeClient):
+
+            def getDepartureBoards(self, ids=None, asw_ids=None, limit=20, **kwargs):
+                self.calls.append({'ids': ids, 'limit': limit})
+                # U0 departs every minute, the other stops every ten minutes
+                departures = sorted(({'stop': {'id': stop_id}, 'minute': minute}
+                                     for stop_id in ids for minute in range(0, 120, 1 if stop_id == 'U0' else 10)),
+                                    key=lambda departure: departure['minute'])
+                return {'stops': [{'stop_id': stop_id} for stop_id in ids], 'departures': departures[:limit]}
+
+        client = BusyClient()
+        batcher = DepartureBoardBatcher(client, window=0.1, max_limit=40)
+        stop_ids = ['U%d' % i for i in range(4)]
+        results = self.run_threads([lambda stop_id=stop_id: batcher.getDepartureBoards(ids=stop_id, limit=10)
+                                    for stop_id in stop_ids])
+        merged = [call for call in client.calls if len(call['ids']) > 1]
+        self.assertTrue(merged)
+        self.assertTrue(all(call['limit'] == 10 * len(call['ids']) <= 40 for call in merged))
+        for stop_id, board in zip(stop_ids, results):
+            self.assertEqual(board, client.getDepartureBoards(ids=[stop_id], limit=10))
@@ -0,0 +1,86 @@
+import math
+import unittest
+from golemio import columnar
+from golemio.columnar import Interner, decodeTripUpdates, decodeVehiclePositions
+
+
+def vehicle_feed():
+    feed = columnar.gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = '2.0'
+    feed.header.timestamp = 1700000000
+    for i, (route, lat, lon) in enumerate([('L22', 50.08, 14.42), ('L9', 50.07, 14.40), ('L22', 50.20, 14.60)]):
+        entity = feed.entity.add(id=str(i))
+        entity.vehicle.trip.trip_id = f'{route}_{i}'
+        entity.vehicle.trip.route_id = route
+        entity.vehicle.vehicle.id = f'service-3-{i}'
+        entity.vehicle.position.latitude = lat
+        entity.vehicle.position.longitude = lon
+        entity.vehicle.position.bearing = 90
+        entity.vehicle.timestamp = 1700000000 - i
+    return feed.SerializeToString()
+
+
+def trip_update_feed():
+    feed = columnar.gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = '2.0'
+    entity = feed.entity.add(id='1')
+    entity.trip_update.trip.trip_id = 'L22_0'
+    entity.trip_update.trip.route_id = 'L22'
+    for sequence, delay in [(1, 60), (2, None)]:
+        stop_time = entity.trip_update.stop_time_update.add(stop_sequence=sequence, stop_id=f'U{sequence}Z1P')
+        if delay is not None:
+            stop_time.arrival.delay = delay
+    return feed.SerializeToString()
+
+
+@unittest.skipIf(columnar.np is None or columnar.gtfs_realtime_pb2 is None,
+                 'numpy and gtfs-realtime-bindings are required')
+class ColumnarTests(unittest.TestCase):
+    """
+    Unit tests for the columnar GTFS Realtime decoders.
+    """
+
+    def test_vehicle_positions(self):
+        """
+        Test that vehicle positions decode into typed columns with interned IDs.
+        """
+        vehicles = decodeVehiclePositions(vehicle_feed())
+        self.assertEqual(len(vehicles), 3)
+        self.assertEqual(vehicles.timestamp, 1700000000)
+        self.assertEqual(vehicles.lat.dtype, columnar.np.float32)
+        self.assertEqual(vehicles.strings('route_id'), ['L22', 'L9', 'L22'])
+        self.assertTrue(math.isnan(vehicles.speed[0]))
+        self.assertEqual(vehicles.bearing[0], 90)
+
+    def test_filters(self):
+        """
+        Test route and bounding box filtering.
+        """
+        vehicles = decodeVehiclePositions(vehicle_feed())
+        self.assertEqual(vehicles.byRoute('L22').strings('trip_id'), ['L22_0', 'L22_2'])
+        self.assertEqual(len(vehicles.byRoute('unknown')), 0)
+        inside = vehicles.inBoundingBox(50.0, 14.3, 50.1, 14.5)
+        self.assertEqual(inside.strings('vehicle_id'), ['service-3-0', 'service-3-1'])
+        self.assertEqual(len(inside.byRoute(['L9', 'L22'])), 2)
+
+    def test_shared_interner(self):
+        """
+        Test that a shared interner keeps codes stable across decodes.
+        """
+        interner = Interner()
+        first = decodeVehiclePositions(vehicle_feed(), interner)
+        second = decodeVehiclePositions(vehicle_feed(), interner)
+        self.assertEqual(list(first.trip_id), list(second.trip_id))
+        self.assertEqual(len(interner), 8)
+
+    def test_trip_updates(self):
+        """
+        Test that trip updates decode into one row per stop time update.
+        """
+        updates = decodeTripUpdates(trip_update_feed())
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(updates.strings('stop_id'), ['U1Z1P', 'U2Z1P'])
+        self.assertEqual(updates.arrival_delay[0], 60)
+        self.assertTrue(math.isnan(updates.arrival_delay[1]))
+        self.assertEqual(list(updates.stop_sequence), [1, 2])
+        self.assertEqual(updates.select(updates.stopMask('U2Z1P')).strings('trip_id'), ['L22_0'])
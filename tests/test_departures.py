@@ -0,0 +1,111 @@
+import unittest
+from golemio import columnar
+from golemio.client import GolemioClient
+from golemio.departures import RealtimeDepartures, serviceDayStart
+from golemio.timetable import TimetableIndex, parseTime
+from stub import StubGolemioServer, paged
+
+
+def trip_update_feed(updates, time='08:00:00', start_dates={}):
+    feed = columnar.gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = '2.0'
+    feed.header.timestamp = serviceDayStart('2024-05-01') + parseTime(time)
+    for trip_id, stop_times in updates.items():
+        entity = feed.entity.add(id=trip_id)
+        entity.trip_update.trip.trip_id = trip_id
+        if trip_id in start_dates:
+            entity.trip_update.trip.start_date = start_dates[trip_id]
+        for stop_time in stop_times:
+            update = entity.trip_update.stop_time_update.add(**{key: value for key, value in stop_time.items()
+                                                                if key in ('stop_id', 'stop_sequence')})
+            if 'delay' in stop_time:
+                update.departure.delay = stop_time['delay']
+            if 'time' in stop_time:
+                update.arrival.time = stop_time['time']
+    return feed.SerializeToString()
+
+
+@unittest.skipIf(columnar.np is None or columnar.gtfs_realtime_pb2 is None,
+                 'numpy and gtfs-realtime-bindings are required')
+class RealtimeDeparturesTests(unittest.TestCase):
+    """
+    Unit tests for realtime-adjusted departures.
+    """
+
+    def setUp(self):
+        # Trip A calls at S1, S2, S3 three minutes apart, trip B at S2 and S3
+        schedule = {'A': ['08:00:00', '08:03:00', '08:06:00'], 'B': [None, '08:04:00', '08:08:00']}
+        stop_times = {f'S{i + 1}': [] for i in range(3)}
+        for trip_id, times in schedule.items():
+            for i, time in enumerate(times):
+                if time:
+                    stop_times[f'S{i + 1}'].append({'trip_id': trip_id, 'stop_sequence': i + 1,
+                                                    'departure_time': time})
+        routes = {f'/gtfs/stoptimes/{stop_id}': paged(rows) for stop_id, rows in stop_times.items()}
+        routes['/gtfs/trips'] = paged([{'trip_id': 'A', 'route_id': 'L22'}, {'trip_id': 'B', 'route_id': 'L9'}])
+        self.feed = trip_update_feed({'A': [{'stop_sequence': 2, 'delay': 180}]})
+        routes['/vehiclepositions/gtfsrt/trip_updates.pb'] = self.feed
+        self.server = StubGolemioServer(routes).start()
+        self.timetable = TimetableIndex(self.server.attach(GolemioClient()), date='2024-05-01')
+        self.timetable.addStops(['S1', 'S2', 'S3'])
+        self.departures = RealtimeDepartures(self.timetable)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_delay_propagation(self):
+        """
+        Test that a delay applies from its stop onwards and reorders the boards.
+        """
+        requests = len(self.server.requests)
+        self.assertEqual(self.departures.update(), 2)
+        self.assertEqual(len(self.server.requests), requests + 1)
+        first = self.departures.nextDepartures('S1', '07:00:00', n=1)[0]
+        self.assertEqual((first.trip_id, first.delay, first.departure), ('A', None, parseTime('08:00:00')))
+        board = self.departures.nextDepartures('S2', '08:00:00')
+        self.assertEqual([(d.trip_id, d.delay, d.departure - d.scheduled) for d in board],
+                         [('B', None, 0), ('A', 180, 180)])
+        self.assertEqual([d.trip_id for d in self.departures.nextDepartures('S3', '08:07:00')], ['B', 'A'])
+        self.assertEqual(board[1].route_id, 'L22')
+        merged = self.departures.mergedDepartures(['S2', 'S3'], '08:05:00', n=2, until='08:08:30')
+        self.assertEqual([(d.stop_id, d.trip_id) for d in merged], [('S2', 'A'), ('S3', 'B')])
+        self.assertEqual(self.departures.nextDepartures('S404', 0), [])
+
+    def test_stop_id_and_absolute_time(self):
+        """
+        Test updates matched by stop ID and updates carrying only an absolute time.
+        """
+        arrival = serviceDayStart('2024-05-01') + parseTime('08:05:00')
+        self.departures.update(trip_update_feed({'B': [{'stop_id': 'S2', 'delay': 60},
+                                                       {'stop_id': 'S3', 'time': arrival + 300}]}))
+        board = self.departures.nextDeparturesMany(['S2', 'S3'], '08:00:00', n=5)
+        self.assertEqual([(d.trip_id, d.delay) for d in board['S2']], [('A', None), ('B', 60)])
+        self.assertEqual([(d.trip_id, d.delay) for d in board['S3']], [('A', None), ('B', 120)])
+        predictions = self.departures.predictions
+        self.assertEqual(len(predictions), 5)
+        self.assertEqual(int(predictions.byRoute('L9').arrival.max()), parseTime('08:10:00'))
+
+    def test_nightly_trip(self):
+        """
+        Test that an update of a trip running every night applies to one of its two runs only.
+        """
+        # N calls at B at 24:30:00 on both dates, and at S1 at 23:50:00, which only today's run keeps
+        row = {'trip_id': 'N', 'stop_sequence': 2, 'departure_time': '24:30:00'}
+        self.timetable.addStop('B', rows=[row], previous_rows=[row])
+        self.timetable.addStop('S1', rows=[{'trip_id': 'N', 'stop_sequence': 1, 'departure_time': '23:50:00'}],
+                               previous_rows=[])
+
+        def delays(feed):
+            self.departures.update(feed)
+            return [(d.stop_id, d.scheduled, d.delay) for d in self.departures.mergedDepartures(['B', 'S1'], 0)]
+        day_start = serviceDayStart('2024-05-01')
+        tonight = delays(trip_update_feed({'N': [{'stop_sequence': 2, 'time': day_start + 88200 + 120}]}))
+        self.assertEqual(tonight, [('B', 1800, None), ('S1', 85800, None), ('B', 88200, 120)])
+        # A delay reported just after midnight, at the stop the previous run has not indexed, is last night's
+        last_night = delays(trip_update_feed({'N': [{'stop_sequence': 1, 'delay': 60}]}, time='00:10:00'))
+        self.assertEqual(last_night, [('B', 1800, 60), ('S1', 85800, None), ('B', 88200, None)])
+        dated = delays(trip_update_feed({'N': [{'stop_sequence': 1, 'delay': 60}]}, time='00:10:00',
+                                        start_dates={'N': '20240501'}))
+        self.assertEqual(dated, [('B', 1800, None), ('S1', 85800, 60), ('B', 88200, 60)])
+        other = delays(trip_update_feed({'N': [{'stop_sequence': 2, 'delay': 60}]}, start_dates={'N': '20240502'}))
+        self.assertEqual([delay for _, _, delay in other], [None, None, None])
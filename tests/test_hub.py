@@ -0,0 +1,107 @@
+import asyncio
+import unittest
+from golemio import hub
+from golemio.async_client import AsyncGolemioClient
+from golemio.client import GolemioClient
+from golemio.hub import RealtimeHub
+from stub import StubGolemioServer
+
+
+def vehicle_feed(timestamp, routes=('L22', 'L9', 'L22')):
+    feed = hub.gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = '2.0'
+    feed.header.timestamp = timestamp
+    for i, route in enumerate(routes):
+        entity = feed.entity.add(id=str(i))
+        entity.vehicle.trip.trip_id = f'{route}_{i}'
+        entity.vehicle.trip.route_id = route
+        entity.vehicle.stop_id = f'U{i}Z1P'
+    return feed.SerializeToString()
+
+
+def alert_feed():
+    feed = hub.gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = '2.0'
+    feed.header.timestamp = 1
+    entity = feed.entity.add(id='a')
+    entity.alert.informed_entity.add(route_id='L9')
+    return feed.SerializeToString()
+
+
+@unittest.skipIf(hub.gtfs_realtime_pb2 is None, 'gtfs-realtime-bindings is required')
+class RealtimeHubTests(unittest.TestCase):
+    """
+    Unit tests for the realtime fan-out hub.
+    """
+
+    def setUp(self):
+        self.timestamp = 1700000000
+        self.server = StubGolemioServer({
+            '/vehiclepositions/gtfsrt/vehicle_positions.pb':
+                lambda path, query: (200, vehicle_feed(self.timestamp), {}),
+            '/vehiclepositions/gtfsrt/alerts.pb': alert_feed(),
+        }).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_fan_out(self):
+        """
+        Test that one download serves all subscribers and filters are applied.
+        """
+        async def run():
+            async with self.server.attach(AsyncGolemioClient()) as client:
+                realtime = RealtimeHub(client, interval=60)
+                everything = [realtime.subscribe('vehicle_positions') for _ in range(20)]
+                tram_22 = realtime.subscribe('vehicle_positions', routes='L22')
+                at_stop = realtime.subscribe('vehicle_positions', routes=['L22'], stops={'U2Z1P'})
+                alerts = realtime.subscribe('alerts', routes='L9')
+                self.assertTrue(await realtime.poll('vehicle_positions'))
+                self.assertFalse(await realtime.poll('vehicle_positions'))
+                await realtime.poll('alerts')
+                self.assertEqual(len(self.server.requests), 3)
+                self.assertEqual(len((await everything[7].get()).entities), 3)
+                self.assertEqual([entity.id for entity in (await tram_22.get()).entities], ['0', '2'])
+                self.assertEqual([entity.id for entity in (await at_stop.get()).entities], ['2'])
+                self.assertEqual(len((await alerts.get()).entities), 1)
+                late = realtime.subscribe('vehicle_positions', trips='L9_1')
+                self.assertEqual([entity.id for entity in (await late.get()).entities], ['1'])
+                await realtime.stop()
+                self.assertIsNone(await late.get())
+        asyncio.run(run())
+
+    def test_drop_oldest(self):
+        """
+        Test that a slow subscriber keeps only the newest updates.
+        """
+        async def run():
+            async with self.server.attach(AsyncGolemioClient()) as client:
+                realtime = RealtimeHub(client)
+                slow = realtime.subscribe('vehicle_positions', maxsize=2)
+                for _ in range(5):
+                    self.timestamp += 1
+                    await realtime.poll('vehicle_positions')
+                self.assertEqual(slow.dropped, 3)
+                self.assertEqual([(await slow.get()).timestamp for _ in range(2)],
+                                 [self.timestamp - 1, self.timestamp])
+        asyncio.run(run())
+
+    def test_polling_with_callbacks(self):
+        """
+        Test background polling with a sync client and callback subscribers.
+        """
+        async def run():
+            received = []
+            async with RealtimeHub(self.server.attach(GolemioClient()), interval=0.01) as realtime:
+                realtime.subscribe('vehicle_positions', callback=received.append)
+                realtime.subscribe('vehicle_positions', callback=received.append)
+                while len(received) < 2:
+                    await asyncio.sleep(0.01)
+                    self.timestamp += 1
+                stats = realtime.stats()
+            self.assertEqual(stats['subscribers']['vehicle_positions'], 2)
+            self.assertEqual(stats['subscribers']['trip_updates'], 0)
+            self.assertEqual(stats['errors'], 0)
+            self.assertEqual({path for path, _, _ in self.server.requests},
+                             {'/vehiclepositions/gtfsrt/vehicle_positions.pb'})
+        asyncio.run(run())
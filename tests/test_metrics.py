@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+import urllib.request
+from golemio.async_client import AsyncGolemioClient
+from golemio.cache import ResponseCache
+from golemio.client import GolemioClient
+from golemio.errors import NotFoundError
+from golemio.metrics import Metrics, endpointFor
+from stub import StubGolemioServer
+
+
+class MetricsTests(unittest.TestCase):
+    """
+    Unit tests for the per-endpoint metrics and request hooks.
+    """
+
+    def setUp(self):
+        self.server = StubGolemioServer({
+            '/gtfs/routes': [{'route_id': 'L22'}],
+            '/gtfs/trips/1': {'trip_id': '1'},
+            '/gtfs/trips/2': {'trip_id': '2'},
+        }).start()
+        self.metrics = Metrics()
+        self.client = self.server.attach(GolemioClient(metrics=self.metrics))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_endpoint_templates(self):
+        """
+        Test that entity paths are grouped under one endpoint template.
+        """
+        self.assertEqual(endpointFor('/gtfs/trips/123'), '/gtfs/trips/{id}')
+        self.assertEqual(endpointFor('/gtfs/stoptimes/U1'), '/gtfs/stoptimes/{id}')
+        self.assertEqual(endpointFor('/gtfs/trips'), '/gtfs/trips')
+
+    def test_requests(self):
+        """
+        Test request counts by status, bytes, latency and decode time.
+        """
+        self.client.getGTFSTrip('1')
+        self.client.getGTFSTrip('2')
+        with self.assertRaises(NotFoundError):
+            self.client.getGTFSTrip('3')
+        trips = self.metrics.snapshot()['/gtfs/trips/{id}']
+        self.assertEqual(trips['requests'], 3)
+        self.assertEqual(trips['statuses'], {200: 2, 404: 1})
+        self.assertEqual(trips['errors'], {'NotFoundError': 1})
+        self.assertEqual(trips['bytes'], 2 * len(b'{"trip_id": "1"}') + len(b'{"error_message": "Not Found"}'))
+        self.assertEqual(trips['latency']['count'], 3)
+        self.assertEqual(trips['decode_time']['count'], 2)
+        self.assertEqual(trips['latency']['buckets'][-1], (float('inf'), 3))
+
+    def test_cache_hit_rate(self):
+        """
+        Test that cache hits are counted without a response.
+        """
+        client = self.server.attach(GolemioClient(cache=ResponseCache(), metrics=self.metrics))
+        for _ in range(4):
+            client.getGTFSRoutes()
+        routes = self.metrics.snapshot()['/gtfs/routes']
+        self.assertEqual(routes['cache'], {'miss': 1, 'hit': 3})
+        self.assertEqual(routes['cache_hit_rate'], 0.75)
+        self.assertEqual(routes['statuses'], {200: 1})
+
+    def test_hooks(self):
+        """
+        Test that pre- and post-request hooks see every call.
+        """
+        calls = []
+        self.metrics.addPreRequestHook(lambda endpoint, url: calls.append(('pre', endpoint)))
+        self.metrics.addPostRequestHook(lambda record: calls.append(('post', record['endpoint'], record['status'])))
+        self.client.getGTFSRoutes()
+        self.assertEqual(calls, [('pre', '/gtfs/routes'), ('post', '/gtfs/routes', 200)])
+
+    def test_async(self):
+        """
+        Test that the async client records into the same metrics.
+        """
+        async def fetch():
+            async with self.server.attach(AsyncGolemioClient(metrics=self.metrics)) as client:
+                await asyncio.gather(client.getGTFSTrip('1'), client.getGTFSTrip('2'))
+        asyncio.run(fetch())
+        self.assertEqual(self.metrics.snapshot()['/gtfs/trips/{id}']['statuses'], {200: 2})
+
+    def test_prometheus(self):
+        """
+        Test the Prometheus exposition text and the scrape endpoint.
+        """
+        self.client.getGTFSRoutes()
+        text = self.metrics.prometheus()
+        self.assertIn('golemio_requests_total{endpoint="/gtfs/routes",status="200"} 1', text)
+        self.assertIn('golemio_request_duration_seconds_bucket{endpoint="/gtfs/routes",le="+Inf"} 1', text)
+        server = self.metrics.servePrometheus(port=0)
+        try:
+            url = 'http://127.0.0.1:%d/metrics' % server.server_address[1]
+            with urllib.request.urlopen(url) as response:
+                self.assertIn('golemio_response_bytes_total', response.read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
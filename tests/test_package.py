@@ -0,0 +1,45 @@
+import importlib
+import inspect
+import subprocess
+import sys
+import unittest
+import golemio
+
+
+class LazyPackageTests(unittest.TestCase):
+    """
+    Unit tests for the lazily imported package attributes.
+    """
+
+    def test_attributes(self):
+        """
+        Test that every public name resolves to the object of its submodule, and none is missing.
+        """
+        for name, module_name in golemio._ATTRIBUTES.items():
+            module = importlib.import_module('golemio.' + module_name)
+            self.assertIs(getattr(golemio, name), getattr(module, name))
+            self.assertIn(name, dir(golemio))
+        for module_name in golemio._MODULES:
+            module = getattr(golemio, module_name)
+            self.assertIs(module, sys.modules['golemio.' + module_name])
+            for name, value in vars(module).items():
+                if not name.startswith('_') and (inspect.isclass(value) or inspect.isfunction(value)) and \
+                        value.__module__ == module.__name__:
+                    self.assertIn(name, golemio._ATTRIBUTES, f'{module.__name__}.{name} is not exported')
+        with self.assertRaises(AttributeError):
+            golemio.GolemioKlient
+        namespace = {}
+        exec('from golemio import *', namespace)
+        self.assertIs(namespace['GolemioClient'], golemio.GolemioClient)
+
+    def test_cold_import(self):
+        """
+        Test that importing the package loads no submodule or dependency until a name is used.
+        """
+        code = ('import sys, golemio\n'
+                'print(sorted(name for name in sys.modules if name.startswith("golemio.")))\n'
+                'print("requests" in sys.modules)\n'
+                'golemio.GolemioClient\n'
+                'print("requests" in sys.modules, "golemio.columnar" in sys.modules, "aiohttp" in sys.modules)\n')
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.split('\n')[:3], ['[]', 'False', 'True False False'])
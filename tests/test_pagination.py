@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+from golemio.async_client import AsyncGolemioClient
+from golemio.client import GolemioClient
+from stub import StubGolemioServer, paged
+
+
+class PaginationTests(unittest.TestCase):
+    """
+    Unit tests for the iter* auto-paginating generators.
+    """
+
+    def setUp(self):
+        self.trips = [{'trip_id': str(i)} for i in range(25)]
+        self.stops = [{'properties': {'stop_id': str(i)}} for i in range(10)]
+        self.server = StubGolemioServer({
+            '/gtfs/trips': paged(self.trips),
+            '/gtfs/stops': paged(self.stops, geojson=True),
+        }).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_iterGTFSTrips(self):
+        """
+        Test that all records are yielded in order and iteration stops on the short page.
+        """
+        client = self.server.attach(GolemioClient())
+        trips = list(client.iterGTFSTrips(stop_id='U1', page_size=10))
+        self.assertEqual(trips, self.trips)
+        self.assertEqual([query['offset'] for _, query, _ in self.server.requests], [['0'], ['10'], ['20']])
+        self.assertEqual(self.server.requests[0][1]['stopId'], ['U1'])
+
+    def test_iterGTFSAllStops_geojson(self):
+        """
+        Test that GeoJSON pages yield their features; an exactly full last page costs one empty request.
+        """
+        client = self.server.attach(GolemioClient())
+        stops = list(client.iterGTFSAllStops(page_size=5))
+        self.assertEqual(stops, self.stops)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_early_exit(self):
+        """
+        Test that abandoning the generator does not fetch further pages.
+        """
+        client = self.server.attach(GolemioClient())
+        iterator = client.iterGTFSTrips(page_size=10)
+        self.assertEqual(next(iterator), self.trips[0])
+        iterator.close()
+        self.assertLessEqual(len(self.server.requests), 2)
+
+    def test_async_iterGTFSTrips(self):
+        """
+        Test the async generator variant of AsyncGolemioClient.
+        """
+        async def collect():
+            async with self.server.attach(AsyncGolemioClient()) as client:
+                return [trip async for trip in client.iterGTFSTrips(page_size=10)]
+        self.assertEqual(asyncio.run(collect()), self.trips)
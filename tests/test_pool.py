@@ -0,0 +1,108 @@
+import threading
+import time
+import unittest
+from collections import Counter
+from golemio.errors import GolemioClientError, RateLimitedError, UnauthorizedError
+from golemio.pool import GolemioClientPool
+from golemio.transport import RequestsTransport
+from stub import StubGolemioServer
+
+
+class GolemioClientPoolTests(unittest.TestCase):
+    """
+    Unit tests for the multi-key client pool.
+    """
+
+    def setUp(self):
+        self.statuses = []
+        self.server = StubGolemioServer({
+            '/gtfs/routes': self.route,
+            '/pid/infotexts': lambda path, query: (401, b'', {}),
+        }).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def route(self, path, query):
+        if self.statuses:
+            return self.statuses.pop(0), b'', {'Retry-After': '60'}
+        return 200, [{'route_id': 'L22'}], {}
+
+    def keys(self):
+        return Counter(headers['X-Access-Token'] for _, _, headers in self.server.requests)
+
+    def test_balancing(self):
+        """
+        Test that concurrent requests are spread over all keys.
+        """
+        pool = self.server.attach(GolemioClientPool(['key-a', 'key-b', 'key-c'], rate=1000))
+        threads = [threading.Thread(target=pool.getGTFSRoutes) for _ in range(30)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        keys = self.keys()
+        self.assertEqual(set(keys), {'key-a', 'key-b', 'key-c'})
+        self.assertLessEqual(max(keys.values()) - min(keys.values()), 4)
+        stats = pool.stats()
+        self.assertEqual(sum(key['requests'] for key in stats), 30)
+        self.assertTrue(all(0 < key['utilization'] for key in stats))
+        pool.close()
+
+    def test_benching(self):
+        """
+        Test that a throttled key is benched and its request moves to another key.
+        """
+        pool = self.server.attach(GolemioClientPool(['key-a', 'key-b']))
+        self.statuses = [429]
+        for _ in range(4):
+            self.assertEqual(pool.getGTFSRoutes(), [{'route_id': 'L22'}])
+        keys = self.keys()
+        benched = [key for key in pool.stats() if key['benched']]
+        self.assertEqual(len(benched), 1)
+        self.assertEqual(benched[0]['throttled'], 1)
+        self.assertGreater(benched[0]['benched'], 50)
+        self.assertEqual(sorted(keys.values()), [1, 4])
+        # Once every key is benched, the error reaches the caller
+        self.statuses = [429, 429]
+        with self.assertRaises(RateLimitedError):
+            pool.getGTFSRoutes()
+
+    def test_unauthorized(self):
+        """
+        Test that a rejected key is benched and the error raised once all keys were tried.
+        """
+        pool = self.server.attach(GolemioClientPool(['key-a', 'key-b'], unauthorized_time=5))
+        with self.assertRaises(UnauthorizedError):
+            pool.getInfoTexts()
+        self.assertEqual(self.keys(), {'key-a': 1, 'key-b': 1})
+        self.assertTrue(all(4 < key['benched'] <= 5 for key in pool.stats()))
+        with self.assertRaises(TypeError):
+            pool.updateApiKey('key-c')
+        pool.addKey('key-c')
+        self.assertEqual(pool.getGTFSRoutes(), [{'route_id': 'L22'}])
+        self.assertEqual(self.keys()['key-c'], 1)
+
+    def test_all_benched_and_removal(self):
+        """
+        Test waiting for a benched key, closing removed keys and using an empty pool.
+        """
+        closed = []
+
+        class Transport(RequestsTransport):
+            def close(self):
+                closed.append(self)
+                super().close()
+        self.server.routes['/gtfs/shapes/S'] = lambda path, query: (self.statuses.pop(0) if self.statuses else 200,
+                                                                     [], {})
+        pool = self.server.attach(GolemioClientPool(['key-a'], bench_time=0.2, transport=Transport))
+        self.statuses = [429]
+        with self.assertRaises(RateLimitedError):
+            pool.getGTFSShape('S')
+        started = time.monotonic()
+        self.assertEqual(pool.getGTFSShape('S'), [])
+        self.assertGreaterEqual(time.monotonic() - started, 0.15)
+        pool.removeKey('key-a')
+        self.assertTrue(closed)
+        with self.assertRaises(GolemioClientError):
+            pool.getGTFSRoutes()
@@ -0,0 +1,108 @@
+import asyncio
+import time
+import unittest
+from golemio.async_client import AsyncGolemioClient
+from golemio.client import GolemioClient
+from golemio.errors import RateLimitedError, ServerError
+from golemio.ratelimit import RetryPolicy, TokenBucket, parseRetryAfter
+from stub import StubGolemioServer
+
+
+class RateLimitTests(unittest.TestCase):
+    """
+    Unit tests for the token bucket, the retry policy and the new error types.
+    """
+
+    def setUp(self):
+        self.failures = []
+        self.server = StubGolemioServer({
+            '/gtfs/routes': self.flaky,
+            '/pid/infotexts': lambda path, query: (503, b'', {}),
+            '/gtfs/trips': lambda path, query: (429, b'', {'Retry-After': '7'}),
+        }).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def flaky(self, path, query):
+        """
+        Stub route failing with the queued status codes before succeeding.
+        """
+        if self.failures:
+            return self.failures.pop(0), b'', {'Retry-After': '0'}
+        return 200, [{'route_id': 'L22'}], {}
+
+    def test_errors(self):
+        """
+        Test that 429 and 5xx raise RateLimitedError and ServerError without a retry policy.
+        """
+        client = self.server.attach(GolemioClient())
+        with self.assertRaises(ServerError) as context:
+            client.getInfoTexts()
+        self.assertEqual(context.exception.status_code, 503)
+        with self.assertRaises(RateLimitedError) as context:
+            client.getGTFSTrips()
+        self.assertEqual(context.exception.retry_after, 7)
+
+    def test_retry(self):
+        """
+        Test that retryable responses are retried until they succeed.
+        """
+        self.failures = [429, 502]
+        client = self.server.attach(GolemioClient(retry=RetryPolicy(backoff=0.01)))
+        self.assertEqual(client.getGTFSRoutes(), [{'route_id': 'L22'}])
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_retry_exhausted(self):
+        """
+        Test that the last error is raised once the retries are used up.
+        """
+        client = self.server.attach(GolemioClient(retry=RetryPolicy(max_retries=2, backoff=0.01)))
+        with self.assertRaises(ServerError):
+            client.getInfoTexts()
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_async_retry(self):
+        """
+        Test retries and a shared rate limiter in the async client.
+        """
+        self.failures = [500]
+
+        async def fetch():
+            async with self.server.attach(AsyncGolemioClient(retry=RetryPolicy(backoff=0.01),
+                                                             rate_limiter=TokenBucket(1000))) as client:
+                return await client.getGTFSRoutes()
+        self.assertEqual(asyncio.run(fetch()), [{'route_id': 'L22'}])
+
+    def test_token_bucket_rate(self):
+        """
+        Test that the bucket allows a burst and then spaces requests at the configured rate.
+        """
+        bucket = TokenBucket(rate=100, capacity=5)
+        delays = [bucket.reserve() for _ in range(10)]
+        self.assertEqual(delays[:5], [0.0] * 5)
+        self.assertAlmostEqual(delays[9], 0.05, delta=0.005)
+        started = time.monotonic()
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+
+    def test_token_bucket_pause(self):
+        """
+        Test that pause() holds back the next reservation.
+        """
+        bucket = TokenBucket(rate=100, capacity=5)
+        bucket.pause(1)
+        self.assertAlmostEqual(bucket.reserve(), 1, delta=0.01)
+
+    def test_retry_policy(self):
+        """
+        Test backoff bounds and Retry-After parsing.
+        """
+        policy = RetryPolicy(backoff=1, max_backoff=4)
+        self.assertTrue(all(0 <= policy.delay(10) <= 4 for _ in range(100)))
+        self.assertEqual(policy.delay(0, retry_after=12), 12)
+        self.assertFalse(policy.shouldRetry(404, 0))
+        self.assertFalse(policy.shouldRetry(503, 3))
+        self.assertEqual(parseRetryAfter('3'), 3)
+        self.assertEqual(parseRetryAfter('Wed, 21 Oct 2015 07:28:00 GMT'), 0)
+        self.assertIsNone(parseRetryAfter('soon'))
@@ -0,0 +1,95 @@
+import asyncio
+import pickle
+import unittest
+from golemio.async_client import AsyncGolemioClient
+from golemio.client import GolemioClient
+from golemio.records import Stop, StopTime, Trip, VehiclePosition, toRecords
+from stub import StubGolemioServer, paged
+
+
+def stop_feature(i):
+    return {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [14.4 + i / 1000, 50.1]},
+            'properties': {'stop_id': f'U{i}Z1P', 'stop_name': 'Anděl', 'zone_id': 'P',
+                           'asw_id': {'node': i, 'stop': 1}, 'wheelchair_boarding': 1}}
+
+
+def vehicle_feature(i):
+    return {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [14.42, 50.08]},
+            'properties': {
+                'last_position': {'bearing': 90, 'delay': {'actual': 60, 'last_stop_arrival': 30, 'at_stop': 5},
+                                  'last_stop': {'id': 'U1Z1P', 'sequence': 3}, 'tracking': True},
+                'trip': {'gtfs': {'trip_id': f'22_{i}', 'route_id': 'L22', 'route_short_name': '22'},
+                         'vehicle_type': {'id': 0, 'description_en': 'tram', 'code': 'T3'}}, 'source': 'vymi'}}
+
+
+class RecordTests(unittest.TestCase):
+    """
+    Unit tests for the compact records and the typed client mode.
+    """
+
+    def setUp(self):
+        self.stops = [stop_feature(i) for i in range(3)]
+        self.server = StubGolemioServer({
+            '/gtfs/stops': paged(self.stops, geojson=True),
+            '/gtfs/trips': paged([{'trip_id': '1', 'route_id': 'L22', 'service_id': '1111100-1'}]),
+            '/gtfs/stoptimes/U1Z1P': [{'trip_id': '1', 'stop_id': 'U1Z1P', 'arrival_time': '25:01:00',
+                                       'stop_sequence': 4, 'stop': {'stop_name': 'Anděl'}}],
+            '/vehiclepositions': {'type': 'FeatureCollection', 'features': [vehicle_feature(i) for i in range(2)]},
+        }).start()
+        self.client = self.server.attach(GolemioClient(typed=True))
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_stop(self):
+        """
+        Test that a stop feature is flattened with interned IDs and no extra members.
+        """
+        first, second = toRecords(Stop, {'features': [stop_feature(1), stop_feature(2)]})
+        self.assertEqual((first.stop_id, first.lat, first.lon, first.asw_node), ('U1Z1P', 50.1, 14.401, 1))
+        self.assertIs(first.zone_id, second.zone_id)
+        self.assertIsNone(first._extra)
+        self.assertEqual(first.asDict()['stop_name'], 'Anděl')
+        self.assertFalse(hasattr(first, '__dict__'))
+
+    def test_vehicle_position_extra(self):
+        """
+        Test that unmapped nested members are kept and decoded once, leaving the input untouched.
+        """
+        feature = vehicle_feature(7)
+        vehicle = VehiclePosition.fromJson(feature)
+        self.assertEqual(feature, vehicle_feature(7))
+        self.assertEqual((vehicle.trip_id, vehicle.delay, vehicle.last_stop_id, vehicle.vehicle_type_id),
+                         ('22_7', 60, 'U1Z1P', 0))
+        self.assertEqual((vehicle.delay_last_stop_arrival, vehicle.vehicle_type_description_en), (30, 'tram'))
+        self.assertEqual(vehicle.extra, {'last_position': {'delay': {'at_stop': 5}},
+                                         'trip': {'vehicle_type': {'code': 'T3'}}, 'source': 'vymi'})
+        self.assertIs(vehicle.extra, vehicle.extra)
+        self.assertEqual(pickle.loads(pickle.dumps(vehicle)), vehicle)
+        vehicles = toRecords(VehiclePosition, {'features': [vehicle_feature(1), {'properties': {'trip': None}}]})
+        self.assertEqual((vehicles[0].extra['source'], vehicles[1].extra, vehicles[1].lat), ('vymi', {'trip': None}, None))
+
+    def test_typed_client(self):
+        """
+        Test that a typed client returns records from the getters, iterators and streams.
+        """
+        self.assertEqual([stop.stop_id for stop in self.client.getGTFSAllStops()], ['U0Z1P', 'U1Z1P', 'U2Z1P'])
+        self.assertEqual(list(self.client.iterGTFSAllStops(page_size=2)), self.client.getGTFSAllStops())
+        self.assertIsInstance(next(self.client.getGTFSAllStops(stream=True)), Stop)
+        trip, = self.client.getGTFSTrips()
+        self.assertIsInstance(trip, Trip)
+        self.assertEqual(trip.service_id, '1111100-1')
+        stop_time, = self.client.getGTFSStopTimes('U1Z1P')
+        self.assertIsInstance(stop_time, StopTime)
+        self.assertEqual((stop_time.arrival_time, stop_time.extra), ('25:01:00', {'stop': {'stop_name': 'Anděl'}}))
+        self.assertEqual([vehicle.trip_id for vehicle in self.client.getAllVehiclePositions()], ['22_0', '22_1'])
+        self.assertEqual(self.server.attach(GolemioClient()).getGTFSAllStops()['features'], self.stops)
+
+    def test_async_typed_client(self):
+        """
+        Test the typed mode of the async client.
+        """
+        async def fetch():
+            async with self.server.attach(AsyncGolemioClient(typed=True)) as client:
+                return await client.getAllVehiclePositions()
+        self.assertEqual([vehicle.route_id for vehicle in asyncio.run(fetch())], ['L22', 'L22'])
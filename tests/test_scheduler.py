@@ -0,0 +1,119 @@
+import asyncio
+import unittest
+from golemio import scheduler
+from golemio.async_client import AsyncGolemioClient, aiohttp
+from golemio.client import GolemioClient
+from golemio.records import dumpJson
+from golemio.scheduler import ChangeScheduler, headerTimestamp
+from stub import StubGolemioServer
+
+
+def alert_feed(timestamp, text):
+    feed = scheduler.gtfs_realtime_pb2.FeedMessage()
+    feed.header.gtfs_realtime_version = '2.0'
+    feed.header.timestamp = timestamp
+    entity = feed.entity.add(id='a')
+    entity.alert.header_text.translation.add(text=text)
+    return feed.SerializeToString()
+
+
+class ChangeSchedulerTests(unittest.TestCase):
+    """
+    Unit tests for the change-detecting polling scheduler.
+    """
+
+    def setUp(self):
+        self.texts = [{'id': 1, 'text': 'Výluka'}]
+        self.alert = (1700000000, 'A')
+        self.server = StubGolemioServer({
+            '/pid/infotexts': lambda path, query: (200, self.texts, {}),
+            '/vehiclepositions/gtfsrt/alerts.pb': lambda path, query: (200, alert_feed(*self.alert), {}),
+        }).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_hash_detection_and_backoff(self):
+        """
+        Test that callbacks only fire on changes and the interval backs off while nothing changes.
+        """
+        async def run():
+            changes = []
+            polls = ChangeScheduler(self.server.attach(GolemioClient()), backoff=2)
+            polls.add('infotexts', lambda name, value: changes.append(value), min_interval=1, max_interval=5)
+            self.assertTrue(await polls.poll('infotexts'))
+            for _ in range(3):
+                self.assertFalse(await polls.poll('infotexts'))
+            self.assertEqual(polls.stats()['infotexts']['interval'], 5)
+            self.texts = [{'id': 2, 'text': 'Odklon'}]
+            self.assertTrue(await polls.poll('infotexts'))
+            self.assertEqual(changes, [[{'id': 1, 'text': 'Výluka'}], self.texts])
+            self.assertEqual(polls.latest('infotexts'), self.texts)
+            stats = polls.stats()['infotexts']
+            self.assertEqual((stats['polls'], stats['changes'], stats['errors']), (5, 2, 0))
+            # Changes seen back to back bring the interval down to its minimum
+            self.assertEqual(stats['interval'], 1)
+        asyncio.run(run())
+
+    @unittest.skipIf(scheduler.gtfs_realtime_pb2 is None, 'gtfs-realtime-bindings is required')
+    def test_timestamp_detection(self):
+        """
+        Test change detection on the feed header timestamp.
+        """
+        self.assertEqual(headerTimestamp(alert_feed(1700000123, 'A')), 1700000123)
+
+        async def run():
+            changes = []
+
+            async def record(name, message):
+                changes.append(message.entity[0].alert.header_text.translation[0].text)
+
+            async with self.server.attach(AsyncGolemioClient()) as client:
+                polls = ChangeScheduler(client)
+                polls.add('alerts', record, detect='timestamp')
+                await polls.poll('alerts')
+                # Same header timestamp: treated as unchanged even though the payload differs
+                self.alert = (1700000000, 'B')
+                self.assertFalse(await polls.poll('alerts'))
+                self.alert = (1700000060, 'C')
+                self.assertTrue(await polls.poll('alerts'))
+            self.assertEqual(changes, ['A', 'C'])
+        if aiohttp is not None:
+            asyncio.run(run())
+
+    def test_background_polling(self):
+        """
+        Test polling in the background and invalid endpoints.
+        """
+        async def run():
+            changes = []
+            async with ChangeScheduler(self.server.attach(GolemioClient())) as polls:
+                polls.add('infotexts', lambda name, value: changes.append(name), min_interval=0.01, max_interval=0.02)
+                while len(self.server.requests) < 3:
+                    await asyncio.sleep(0.01)
+                self.texts = []
+                while len(changes) < 2:
+                    await asyncio.sleep(0.01)
+            self.assertEqual(changes, ['infotexts', 'infotexts'])
+            with self.assertRaises(ValueError):
+                polls.add('departureboards', print)
+            with self.assertRaises(ValueError):
+                polls.add('infotexts', print, detect='timestamp')
+        asyncio.run(run())
+
+    def test_custom_getter(self):
+        """
+        Test endpoints scheduled by client method name and by function.
+        """
+        async def run():
+            changes = []
+            client = self.server.attach(GolemioClient())
+            polls = ChangeScheduler(client)
+            polls.add('texts', lambda name, value: changes.append(name), getter='getInfoTexts', format='json')
+            polls.add('first', lambda name, value: changes.append(value), getter=lambda: client.getInfoTexts()[0])
+            self.assertTrue(await polls.poll('texts'))
+            self.assertTrue(await polls.poll('first'))
+            self.assertFalse(await polls.poll('first'))
+            self.assertEqual(changes, ['texts', self.texts[0]])
+            self.assertEqual(polls.stats()['first']['bytes'], 2 * len(dumpJson(self.texts[0])))
+        asyncio.run(run())
@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+from golemio import shapes
+from golemio.shapes import ShapeStore
+
+
+def shape_features(points):
+    return {'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+         'properties': {'shape_pt_sequence': i + 1}} for i, (lat, lon) in enumerate(points)]}
+
+
+class FakeClient(object):
+
+    def getGTFSShape(self, shape_id):
+        if shape_id == 'missing':
+            raise shapes.NotFoundError('Not Found')
+        return [{'shape_pt_lat': 50.0, 'shape_pt_lon': 14.0, 'shape_pt_sequence': 1},
+                {'shape_pt_lat': 50.01, 'shape_pt_lon': 14.0, 'shape_pt_sequence': 2}]
+
+
+@unittest.skipIf(shapes.np is None, 'numpy is required')
+class ShapeStoreTests(unittest.TestCase):
+    """
+    Unit tests for the ShapeStore and its vectorized projection.
+    """
+
+    def setUp(self):
+        self.store = ShapeStore()
+        # An L-shaped line: 0.01 degree north, then 0.01 degree east
+        self.store.add('L', shape_features([(50.0, 14.0), (50.01, 14.0), (50.01, 14.01)]))
+        self.store.add('I', [{'shape_pt_lat': 50.0, 'shape_pt_lon': 14.1, 'shape_pt_sequence': 2},
+                             {'shape_pt_lat': 50.0, 'shape_pt_lon': 14.0, 'shape_pt_sequence': 1}])
+
+    def test_cumulative_distance(self):
+        """
+        Test that points are ordered by sequence and distances accumulate.
+        """
+        lat, lon, dist = self.store.get('I')
+        self.assertEqual(list(lon), [14.0, 14.1])
+        self.assertAlmostEqual(self.store.length('L'), 1111.95 + 715.0, delta=5)
+
+    def test_project(self):
+        """
+        Test projecting vehicles of several shapes in one call.
+        """
+        along, cross = self.store.project(['L', 'L', 'I', 'unknown'], [50.005, 50.0105, 50.0, 50.0],
+                                          [14.0001, 14.005, 14.05, 14.0])
+        self.assertAlmostEqual(along[0], 556.0, delta=2)
+        self.assertAlmostEqual(cross[0], 7.15, delta=0.2)
+        self.assertAlmostEqual(along[1], 1112.0 + 357.5, delta=3)
+        self.assertAlmostEqual(cross[1], 55.6, delta=0.5)
+        self.assertAlmostEqual(along[2], 3574, delta=10)
+        self.assertTrue(shapes.np.isnan(along[3]))
+
+    def test_save_and_mmap(self):
+        """
+        Test that a saved store reopens memory-mapped with the same results.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            self.store.save(directory)
+            reopened = ShapeStore.open(directory)
+            self.assertEqual(reopened.shape_ids, ['L', 'I'])
+            self.assertIsInstance(reopened._lat, shapes.np.memmap)
+            self.assertEqual(list(reopened.project(['L'], [50.005], [14.0])[0]),
+                             list(self.store.project(['L'], [50.005], [14.0])[0]))
+            reopened.add('J', shape_features([(50.0, 14.0), (50.0, 14.01)]))
+            self.assertEqual(len(reopened), 3)
+            self.assertAlmostEqual(reopened.length('L'), self.store.length('L'))
+
+    def test_load(self):
+        """
+        Test fetching missing shapes through a client.
+        """
+        self.assertEqual(self.store.load(FakeClient(), ['X', 'X', 'L', 'missing']), ['missing'])
+        self.assertIn('X', self.store)
+        self.assertAlmostEqual(self.store.length('X'), 1112, delta=2)
@@ -0,0 +1,100 @@
+import random
+import unittest
+from golemio.spatial import StopIndex, haversine
+
+
+def stop(stop_id, lat, lon):
+    return {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+            'properties': {'stop_id': stop_id}}
+
+
+class StopIndexTests(unittest.TestCase):
+    """
+    Unit tests for the StopIndex grid index, checked against a linear haversine scan.
+    """
+
+    def setUp(self):
+        rng = random.Random(42)
+        self.stops = [stop(str(i), 50.0 + rng.random() * 0.2, 14.3 + rng.random() * 0.3) for i in range(2000)]
+        self.index = StopIndex({'type': 'FeatureCollection', 'features': self.stops}, cell_size=200)
+        self.points = [(50.0 + rng.random() * 0.2, 14.3 + rng.random() * 0.3) for _ in range(20)]
+
+    def ids(self, results):
+        return [feature['properties']['stop_id'] for feature, _ in results]
+
+    def scan(self, lat, lon):
+        return sorted(self.stops, key=lambda s: haversine(lat, lon, s['geometry']['coordinates'][1],
+                                                           s['geometry']['coordinates'][0]))
+
+    def test_nearest(self):
+        """
+        Test nearest() against a linear scan.
+        """
+        for lat, lon in self.points:
+            expected = [s['properties']['stop_id'] for s in self.scan(lat, lon)[:5]]
+            self.assertEqual(self.ids(self.index.nearest(lat, lon, 5)), expected)
+
+    def test_within(self):
+        """
+        Test within() against a linear scan, including the reported distances.
+        """
+        for lat, lon in self.points:
+            expected = {s['properties']['stop_id'] for s in self.stops
+                        if haversine(lat, lon, s['geometry']['coordinates'][1], s['geometry']['coordinates'][0]) <= 300}
+            results = self.index.within(lat, lon, 300)
+            self.assertEqual(set(self.ids(results)), expected)
+            for feature, distance in results:
+                lon2, lat2 = feature['geometry']['coordinates']
+                self.assertAlmostEqual(distance, haversine(lat, lon, lat2, lon2))
+
+    def test_bounding_box(self):
+        """
+        Test inBoundingBox() against a linear scan.
+        """
+        found = self.index.inBoundingBox(50.05, 14.35, 50.08, 14.40)
+        expected = [s for s in self.stops if 50.05 <= s['geometry']['coordinates'][1] <= 50.08
+                    and 14.35 <= s['geometry']['coordinates'][0] <= 14.40]
+        self.assertEqual(found, expected)
+
+    def test_batch(self):
+        """
+        Test the per-point query wrappers.
+        """
+        lats, lons = zip(*self.points)
+        self.assertEqual(len(self.index.nearestMany(lats, lons, 2)), len(self.points))
+        self.assertEqual(self.index.withinMany(lats, lons, 300)[3], self.index.within(lats[3], lons[3], 300))
+
+    def test_lazy_rebuild(self):
+        """
+        Test that the loader is only called when the data version changes.
+        """
+        calls = []
+        version = [1]
+
+        def loader():
+            calls.append(1)
+            return self.stops[:10]
+        index = StopIndex(loader=loader, version=lambda: version[0])
+        self.assertEqual(calls, [])
+        self.assertEqual(len(index), 10)
+        index.nearest(50.1, 14.4)
+        self.assertEqual(len(calls), 1)
+        version[0] = 2
+        index.nearest(50.1, 14.4)
+        self.assertEqual(len(calls), 2)
+        index.update([stop('X', 50.1, 14.4)])
+        self.assertEqual(self.ids(index.nearest(50.1, 14.4)), ['X'])
+
+    def test_far_away(self):
+        """
+        Test queries far outside the data against a linear scan.
+        """
+        for lat, lon in ((0.0, 0.0), (49.19, 16.61), (48.21, 16.37), (50.1, 14.2)):
+            expected = [s['properties']['stop_id'] for s in self.scan(lat, lon)[:3]]
+            self.assertEqual(self.ids(self.index.nearest(lat, lon, 3)), expected)
+        self.assertEqual(self.index.within(0.0, 0.0, 1000), [])
+        expected = [s['properties']['stop_id'] for s in self.scan(50.1, 14.2)
+                    if haversine(50.1, 14.2, s['geometry']['coordinates'][1], s['geometry']['coordinates'][0]) <= 3000]
+        self.assertEqual(self.ids(self.index.within(50.1, 14.2, 3000)), expected)
+        self.assertEqual(len(self.index.within(49.19, 16.61, 200000)), len(self.stops))
+        self.assertEqual(StopIndex([]).nearest(50.1, 14.4), [])
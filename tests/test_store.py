@@ -0,0 +1,122 @@
+import unittest
+from golemio.client import GolemioClient
+from golemio.spatial import StopIndex
+from golemio.store import GTFSStore
+from stub import StubGolemioServer, paged
+
+
+class GTFSStoreTests(unittest.TestCase):
+    """
+    Unit tests for the SQLite-backed GTFSStore.
+    """
+
+    def setUp(self):
+        self.routes = [{'route_id': 'L22', 'route_short_name': '22'}]
+        self.services = [{'service_id': '1111100-1', 'start_date': '20240101'}]
+        self.stops = [{'properties': {'stop_id': 'U1Z1P', 'stop_name': 'Anděl'}}]
+        self.trips = [{'trip_id': '22_1', 'route_id': 'L22', 'shape_id': 'L22V1'},
+                      {'trip_id': '22_2', 'route_id': 'L22', 'shape_id': 'L22V1'}]
+        self.server = StubGolemioServer({
+            '/gtfs/routes': lambda path, query: (200, self.routes, {}),
+            '/gtfs/services': paged(self.services),
+            '/gtfs/stops': paged(self.stops, geojson=True),
+            '/gtfs/trips': paged(self.trips),
+            '/gtfs/shapes/L22V1': [{'shape_pt_lat': 50.0, 'shape_pt_lon': 14.4}],
+            '/gtfs/trips/22_9': {'trip_id': '22_9'},
+        }).start()
+        self.client = self.server.attach(GolemioClient())
+        self.store = GTFSStore(self.client, page_size=10)
+
+    def tearDown(self):
+        self.store.close()
+        self.server.stop()
+
+    def paths(self):
+        return [path for path, _, _ in self.server.requests]
+
+    def test_refresh_and_lookup(self):
+        """
+        Test that mirrored records are answered locally with the client getter signatures.
+        """
+        result = self.store.refresh()
+        self.assertEqual(result['trips']['inserted'], 2)
+        self.assertEqual(result['shapes']['inserted'], 1)
+        count = len(self.server.requests)
+        self.assertEqual(self.store.getGTFSRoute('L22'), self.routes[0])
+        self.assertEqual(self.store.getGTFSStop('U1Z1P'), self.stops[0])
+        self.assertEqual(self.store.getGTFSTrip('22_1'), self.trips[0])
+        self.assertEqual(self.store.getGTFSShape('L22V1'), [{'shape_pt_lat': 50.0, 'shape_pt_lon': 14.4}])
+        self.assertEqual(self.store.getGTFSRoutes(), self.routes)
+        self.assertEqual(len(self.server.requests), count)
+
+    def test_incremental_refresh(self):
+        """
+        Test that an unchanged timetable skips trips and shapes and only changed rows are written.
+        """
+        self.store.refresh()
+        self.routes[0] = {'route_id': 'L22', 'route_short_name': '22X'}
+        self.server.requests.clear()
+        result = self.store.refresh()
+        self.assertEqual(result['routes'], {'inserted': 0, 'updated': 1, 'deleted': 0})
+        self.assertEqual(result['stops'], {'inserted': 0, 'updated': 0, 'deleted': 0})
+        self.assertNotIn('/gtfs/trips', self.paths())
+        self.assertNotIn('/gtfs/shapes/L22V1', self.paths())
+        self.assertEqual(self.store.getGTFSRoute('L22')['route_short_name'], '22X')
+
+    def test_new_services_relist_trips(self):
+        """
+        Test that changed services trigger a trip refresh that drops removed trips.
+        """
+        self.store.refresh()
+        self.services.append({'service_id': '0000011-1', 'start_date': '20240101'})
+        del self.trips[1]
+        result = self.store.refresh()
+        self.assertEqual(result['services']['inserted'], 1)
+        self.assertEqual(result['trips']['deleted'], 1)
+
+    def test_fallback_to_client(self):
+        """
+        Test that a record missing locally is fetched through the client and then kept.
+        """
+        self.assertEqual(self.store.getGTFSTrip('22_9'), {'trip_id': '22_9'})
+        self.assertEqual(self.store.getGTFSTrip('22_9'), {'trip_id': '22_9'})
+        self.assertEqual(self.paths().count('/gtfs/trips/22_9'), 1)
+        self.assertIs(self.store.getInfoTexts.__self__, self.client)
+
+    def test_lookup_many(self):
+        """
+        Test bulk lookups by ID served locally, with only the missing IDs fetched through the client.
+        """
+        self.store.refresh()
+        self.server.requests.clear()
+        trips = self.store.getGTFSTripsByIds(['22_2', '22_9', '22_1', '22_404'])
+        self.assertEqual(list(trips), ['22_2', '22_9', '22_1'])
+        self.assertEqual(set(trips.errors), {'22_404'})
+        self.assertEqual(sorted(self.paths()), ['/gtfs/trips/22_404', '/gtfs/trips/22_9'])
+        self.server.requests.clear()
+        self.assertEqual(len(self.store.getGTFSTripsByIds(['22_9', '22_1'])), 2)
+        self.assertEqual(dict(self.store.getGTFSShapesByIds(['L22V1'])), {'L22V1': [{'shape_pt_lat': 50.0,
+                                                                                      'shape_pt_lon': 14.4}]})
+        self.assertEqual(self.server.requests, [])
+
+    def test_local_listings(self):
+        """
+        Test that the list and iter endpoints are answered from the store after a refresh.
+        """
+        self.stops.append({'geometry': {'type': 'Point', 'coordinates': [14.40, 50.07]},
+                           'properties': {'stop_id': 'U2Z1P', 'stop_name': 'Smíchovské nádraží'}})
+        self.stops[0]['geometry'] = {'type': 'Point', 'coordinates': [14.40, 50.07]}
+        self.store.refresh()
+        self.server.requests.clear()
+        self.assertEqual(self.store.getGTFSAllStops(), {'type': 'FeatureCollection', 'features': self.stops})
+        self.assertEqual(self.store.getGTFSAllStops(stop_ids=['U2Z1P'])['features'], self.stops[1:])
+        self.assertEqual(list(self.store.iterGTFSAllStops(page_size=1, offset=1)), self.stops[1:])
+        self.assertEqual(self.store.getGTFSTrips(limit=1, offset=1), self.trips[1:])
+        self.assertEqual(list(self.store.iterGTFSTrips(page_size=1)), self.trips)
+        self.assertEqual(list(self.store.iterGTFSServices()), self.services)
+        index = StopIndex.fromClient(self.store)
+        self.assertEqual(len(index.within(50.07, 14.40, 100)), 2)
+        self.assertEqual(self.server.requests, [])
+        # Filters that need the server still go through the client
+        self.store.getGTFSTrips(stop_id='U1Z1P')
+        self.assertEqual(self.paths(), ['/gtfs/trips'])
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import unittest
+from golemio.async_client import AsyncGolemioClient
+from golemio.client import GolemioClient
+from golemio.errors import UnauthorizedError
+from golemio.metrics import Metrics
+from golemio.streaming import JsonRecordDecoder, iterJsonRecords
+from stub import StubGolemioServer
+
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class StreamingTests(unittest.TestCase):
+    """
+    Unit tests for the incremental JSON decoder and the stream=True client methods.
+    """
+
+    def setUp(self):
+        self.stops = {'type': 'FeatureCollection', 'meta': {'note': 'skipped ]}'},
+                      'features': [{'properties': {'stop_id': f'U{i}Z1P', 'stop_name': 'Můstek "A"'}}
+                                   for i in range(2000)]}
+        self.stop_times = [{'trip_id': str(i), 'arrival_time': '25:01:00'} for i in range(50)]
+        self.server = StubGolemioServer({
+            '/gtfs/stops': self.stops,
+            '/gtfs/stoptimes/U1Z1P': self.stop_times,
+            '/vehiclepositions': lambda path, query: (401, b'', {}),
+        }).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_decoder_chunk_boundaries(self):
+        """
+        Test that records split at any byte, including inside multi-byte characters, decode correctly.
+        """
+        body = json.dumps(self.stops, ensure_ascii=False, indent=2).encode()
+        for size in (1, 5, 4096, len(body)):
+            self.assertEqual(list(iterJsonRecords(chunked(body, size))), self.stops['features'])
+        self.assertEqual(list(iterJsonRecords([b'[1, 2', b'0, 3]'])), [1, 20, 3])
+        self.assertEqual(list(iterJsonRecords([b'{"error": "x"}'])), [])
+
+    def test_decoder_buffer(self):
+        """
+        Test that the decoder only buffers the incomplete record.
+        """
+        decoder = JsonRecordDecoder()
+        body = json.dumps(self.stops).encode()
+        for chunk in chunked(body, 1024):
+            decoder.feed(chunk)
+            self.assertLess(len(decoder._buffer), 1024 + 200)
+        decoder.close()
+        self.assertEqual(decoder.records, 2000)
+
+    def test_truncated(self):
+        """
+        Test that a body ending inside a record is an error.
+        """
+        with self.assertRaises(ValueError):
+            list(iterJsonRecords([b'[{"a": 1}, {"a"']))
+
+    def test_stream(self):
+        """
+        Test that streamed methods yield the same records as the buffered ones.
+        """
+        metrics = Metrics()
+        client = self.server.attach(GolemioClient(metrics=metrics))
+        stops = client.getGTFSAllStops(stream=True)
+        self.assertEqual(next(stops), self.stops['features'][0])
+        self.assertEqual(list(stops), self.stops['features'][1:])
+        self.assertEqual(list(client.getGTFSStopTimes('U1Z1P', stream=True)), self.stop_times)
+        with self.assertRaises(UnauthorizedError):
+            list(client.getAllVehiclePositions(stream=True))
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['/gtfs/stops']['bytes'], len(json.dumps(self.stops).encode()))
+        self.assertEqual(snapshot['/gtfs/stops']['decode_time']['count'], 1)
+        self.assertEqual(snapshot['/vehiclepositions']['errors'], {'UnauthorizedError': 1})
+
+    def test_async_stream(self):
+        """
+        Test streaming with the async client.
+        """
+        async def fetch():
+            async with self.server.attach(AsyncGolemioClient()) as client:
+                return [stop async for stop in client.getGTFSAllStops(stream=True)]
+        self.assertEqual(asyncio.run(fetch()), self.stops['features'])
@@ -0,0 +1,100 @@
+import unittest
+from golemio.client import GolemioClient
+from golemio.timetable import TimetableIndex, formatTime, parseTime
+from stub import StubGolemioServer, paged
+
+
+class TimetableIndexTests(unittest.TestCase):
+    """
+    Unit tests for the offline timetable index.
+    """
+
+    def setUp(self):
+        times = ['25:10:00', '08:00:00', '23:59:30', '08:00:00', '12:30:00', '24:00:00']
+        self.stop_times = [{'trip_id': f'T{i}', 'stop_id': 'U1Z1P', 'stop_sequence': i + 1,
+                            'arrival_time': time, 'departure_time': time} for i, time in enumerate(times)]
+        # The previous service date: only its departures after midnight are merged
+        self.previous_stop_times = [{'trip_id': 'T7', 'stop_sequence': 3, 'departure_time': '24:20:00'},
+                                    {'trip_id': 'T8', 'stop_sequence': 3, 'departure_time': '23:50:00'}]
+
+        def stop_times(path, query):
+            rows = self.previous_stop_times if query['date'] == ['2024-04-30'] else self.stop_times
+            return paged(rows)(path, query)
+        self.server = StubGolemioServer({
+            '/gtfs/stoptimes/U1Z1P': stop_times,
+            '/gtfs/stoptimes/U2Z1P': paged([{'trip_id': 'T9', 'stop_sequence': 1, 'departure_time': '08:05:00'}]),
+            '/gtfs/trips': paged([{'trip_id': 'T0', 'route_id': 'L22'}, {'trip_id': 'T7', 'route_id': 'L97'},
+                                  {'trip_id': 'T9', 'route_id': 'L9'}]),
+        }).start()
+        self.index = TimetableIndex(self.server.attach(GolemioClient()), date='2024-05-01', page_size=4)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_times(self):
+        """
+        Test parsing and formatting of GTFS times past midnight.
+        """
+        self.assertEqual(parseTime('25:10:00'), 90600)
+        self.assertEqual(parseTime('8:05:00'), 29100)
+        self.assertEqual(formatTime(90600), '25:10:00')
+
+    def test_next_departures(self):
+        """
+        Test binary search queries, including departures after midnight.
+        """
+        self.assertEqual(self.index.addStop('U1Z1P'), 7)
+        self.assertEqual(self.server.requests[0][1]['date'], ['2024-05-01'])
+        self.assertEqual([d.trip_id for d in self.index.nextDepartures('U1Z1P', '08:00:00', n=3)], ['T1', 'T3', 'T4'])
+        self.assertEqual([formatTime(d.time) for d in self.index.nextDepartures('U1Z1P', '24:00:00')],
+                         ['24:00:00', '25:10:00'])
+        self.assertEqual(self.index.nextDepartures('U1Z1P', 12 * 3600, n=10, until='24:00:00')[-1].trip_id, 'T2')
+        first = self.index.nextDepartures('U1Z1P', '25:00:00')[0]
+        self.assertEqual((first.trip_id, first.route_id, first.stop_sequence), ('T0', 'L22', 1))
+        self.assertEqual(self.index.nextDepartures('U3Z1P', 0), [])
+
+    def test_overnight(self):
+        """
+        Test that the previous service date's departures after midnight appear at their calendar time.
+        """
+        self.index.addStop('U1Z1P')
+        self.assertEqual(self.index.previousDate(), '2024-04-30')
+        first = self.index.nextDepartures('U1Z1P', '00:00:00')[0]
+        self.assertEqual((first.trip_id, formatTime(first.time), first.route_id), ('T7', '00:20:00', 'L97'))
+        self.assertNotIn('T8', [d.trip_id for d in self.index.nextDepartures('U1Z1P', 0, n=10)])
+        index = TimetableIndex(self.index.client, date='2024-05-01', overnight=False)
+        self.assertEqual(index.addStop('U1Z1P'), 6)
+
+    def test_nightly_trip(self):
+        """
+        Test that a trip running on both service dates is kept as two runs told apart by their day offset.
+        """
+        row = {'trip_id': 'N', 'stop_sequence': 2, 'departure_time': '24:30:00'}
+        self.assertEqual(self.index.addStop('B', rows=[row], previous_rows=[row]), 2)
+        departures = self.index.nextDepartures('B', 0)
+        self.assertEqual([(d.trip_id, d.stop_sequence, formatTime(d.time), d.day_offset) for d in departures],
+                         [('N', 2, '00:30:00', -86400), ('N', 2, '24:30:00', 0)])
+        self.assertEqual(list(self.index.arrays('B')[4]), [-86400, 0])
+
+    def test_routes_listing(self):
+        """
+        Test that routes come from one trip listing per date rather than a request per trip.
+        """
+        self.index.addStops(['U1Z1P', 'U2Z1P'])
+        trips = [query['date'][0] for path, query, _ in self.server.requests if path.startswith('/gtfs/trips')]
+        self.assertEqual(trips, ['2024-05-01', '2024-04-30'])
+        self.assertEqual(self.index.nextDepartures('U2Z1P', 0)[0].route_id, 'L9')
+
+    def test_batch(self):
+        """
+        Test incremental loading and batched queries across stops.
+        """
+        self.assertEqual(set(self.index.addStops(['U1Z1P', 'U2Z1P', 'U404'])), {'U404'})
+        self.assertEqual(sorted(self.index.stopIds()), ['U1Z1P', 'U2Z1P'])
+        requests = len(self.server.requests)
+        self.assertEqual(self.index.addStops(['U1Z1P']), {})
+        self.assertEqual(len(self.server.requests), requests)
+        result = self.index.nextDeparturesMany(['U1Z1P', 'U2Z1P'], '08:01:00', n=1)
+        self.assertEqual({stop_id: d[0].trip_id for stop_id, d in result.items()}, {'U1Z1P': 'T4', 'U2Z1P': 'T9'})
+        merged = self.index.mergedDepartures(['U1Z1P', 'U2Z1P'], '08:00:00', n=3)
+        self.assertEqual([(d.stop_id, d.trip_id) for d in merged], [('U1Z1P', 'T1'), ('U1Z1P', 'T3'), ('U2Z1P', 'T9')])
@@ -0,0 +1,70 @@
+import unittest
+from golemio.client import GolemioClient
+from golemio.tracker import VehiclePositionTracker
+from stub import StubGolemioServer
+
+
+def feature(trip_id, lon=14.4, lat=50.0):
+    return {'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+            'properties': {'trip': {'gtfs': {'trip_id': trip_id}}}}
+
+
+class VehiclePositionTrackerTests(unittest.TestCase):
+    """
+    Unit tests for the incremental VehiclePositionTracker.
+    """
+
+    def setUp(self):
+        self.full = [feature('A'), feature('B')]
+        self.delta = []
+        self.server = StubGolemioServer({'/vehiclepositions': self.positions}).start()
+        self.client = self.server.attach(GolemioClient())
+
+    def tearDown(self):
+        self.server.stop()
+
+    def positions(self, path, query):
+        features = self.delta if 'updatedSince' in query else self.full
+        return 200, {'type': 'FeatureCollection', 'features': features}, {}
+
+    def test_full_then_delta(self):
+        """
+        Test that only the first poll is a full load and later polls apply deltas.
+        """
+        tracker = VehiclePositionTracker(self.client)
+        self.assertEqual(tracker.poll(), {'added': ['A', 'B'], 'updated': [], 'removed': []})
+        self.delta = [feature('B', lon=14.5), feature('C')]
+        self.assertEqual(tracker.poll(), {'added': ['C'], 'updated': ['B'], 'removed': []})
+        self.assertIn('updatedSince', self.server.requests[-1][1])
+        self.assertEqual(len(tracker), 3)
+        self.assertEqual(tracker.get('B')['geometry']['coordinates'], [14.5, 50.0])
+
+    def test_ageing(self):
+        """
+        Test that vehicles no longer reported are dropped after max_age.
+        """
+        tracker = VehiclePositionTracker(self.client, max_age=0)
+        tracker.poll()
+        self.delta = [feature('A')]
+        self.assertEqual(tracker.poll()['removed'], ['B'])
+
+    def test_resync(self):
+        """
+        Test that a full reload drops vehicles missing from it.
+        """
+        tracker = VehiclePositionTracker(self.client)
+        tracker.poll()
+        self.full = [feature('A')]
+        self.assertEqual(tracker.poll(full=True)['removed'], ['B'])
+
+    def test_snapshot_diff(self):
+        """
+        Test the snapshot and diff APIs.
+        """
+        tracker = VehiclePositionTracker(self.client)
+        tracker.poll()
+        snapshot = tracker.snapshot()
+        self.delta = [feature('A', lat=50.1), feature('D')]
+        tracker.poll()
+        self.assertEqual(tracker.diff(snapshot), {'added': ['D'], 'updated': ['A'], 'removed': []})
+        self.assertEqual(sorted(snapshot), ['A', 'B'])
@@ -0,0 +1,89 @@
+import gzip
+import json
+import socket
+import threading
+import unittest
+import requests
+from golemio import transport
+from golemio.client import GolemioClient
+from golemio.ratelimit import RetryPolicy
+from golemio.transport import HttpxTransport, RequestsTransport
+from stub import StubGolemioServer
+
+ROUTES = [{'route_id': f'L{i}', 'route_short_name': str(i), 'route_long_name': 'Sídliště Homolka - Palmovka'}
+          for i in range(500)]
+
+
+def compressed(path, query):
+    if transport.brotli is not None:
+        return 200, transport.brotli.compress(json.dumps(ROUTES).encode()), {'Content-Encoding': 'br'}
+    return 200, gzip.compress(json.dumps(ROUTES).encode()), {'Content-Encoding': 'gzip'}
+
+
+class TransportTests(unittest.TestCase):
+    """
+    Unit tests for the pluggable HTTP transports.
+    """
+
+    def setUp(self):
+        self.server = StubGolemioServer({
+            '/gtfs/routes': compressed,
+            '/gtfs/stops': {'type': 'FeatureCollection', 'features': [{'properties': {'stop_id': 'U1Z1P'}}]},
+        }).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def transports(self):
+        yield RequestsTransport()
+        if transport.HTTPX_AVAILABLE:
+            yield HttpxTransport()
+
+    def test_compression(self):
+        """
+        Test that every transport negotiates the content encoding and reports the bytes saved.
+        """
+        for instance in self.transports():
+            with self.subTest(transport=type(instance).__name__):
+                client = self.server.attach(GolemioClient(api_key='key', transport=instance))
+                self.assertEqual(client.getGTFSRoutes(), ROUTES)
+                headers = self.server.requests[-1][2]
+                self.assertEqual(headers['X-Access-Token'], 'key')
+                self.assertIn('gzip', headers['Accept-Encoding'])
+                if transport.brotli is not None:
+                    self.assertIn('br', headers['Accept-Encoding'])
+                stats = instance.stats()
+                self.assertEqual(stats['requests'], 1)
+                self.assertEqual(stats['bytes_decoded'], len(json.dumps(ROUTES).encode()))
+                self.assertGreater(stats['bytes_saved'], stats['bytes_received'])
+                self.assertEqual(stats['http_versions'], {'HTTP/1.1': 1})
+                self.assertEqual(len(list(client.getGTFSAllStops(stream=True))), 1)
+                self.assertEqual(instance.stats()['requests'], 2)
+                client.close()
+
+    @unittest.skipIf(not transport.HTTPX_AVAILABLE, 'httpx is required')
+    def test_httpx_client(self):
+        """
+        Test concurrent requests and connection errors through the httpx transport.
+        """
+        instance = HttpxTransport(max_connections=4)
+        client = self.server.attach(GolemioClient(transport=instance))
+        self.assertIsNone(client.session)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(client.getGTFSRoutes()))
+                   for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [ROUTES] * 16)
+        self.assertEqual(instance.stats()['requests'], 16)
+        # A closed port surfaces as the same requests exception as with the default transport
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            address = '127.0.0.1:%d' % s.getsockname()[1]
+        client.base_url = address
+        client.retry = RetryPolicy(max_retries=1, backoff=0)
+        with self.assertRaises(requests.ConnectionError):
+            client.getGTFSRoutes()
+        client.close()
@@ -0,0 +1,146 @@
+import threading
+import unittest
+from golemio import vehicles
+from golemio.client import GolemioClient
+from golemio.tracker import VehiclePositionTracker
+from golemio.vehicles import LiveVehicles, VehicleSnapshot
+from stub import StubGolemioServer
+
+
+def vehicle(registration, route, trip, last_stop, next_stop):
+    return {
+        'type': 'Feature',
+        'geometry': {'type': 'Point', 'coordinates': [14.4, 50.1]},
+        'properties': {
+            'trip': {'gtfs': {'route_id': f'L{route}', 'route_short_name': route, 'trip_id': trip},
+                     'vehicle_registration_number': registration},
+            'last_position': {'last_stop': {'id': last_stop}, 'next_stop': {'id': next_stop}},
+        },
+    }
+
+
+class VehicleSnapshotTests(unittest.TestCase):
+    """
+    Unit tests for the indexed vehicle position snapshots.
+    """
+
+    def setUp(self):
+        self.features = [
+            vehicle(1, '22', '22_1', 'U1Z1P', 'U2Z1P'),
+            vehicle(2, '22', '22_2', 'U2Z1P', 'U3Z1P'),
+            vehicle(3, '9', '9_1', 'U1Z1P', 'U2Z1P'),
+        ]
+        self.server = StubGolemioServer({
+            '/vehiclepositions': lambda path, query: (200, {'type': 'FeatureCollection', 'features': self.features},
+                                                      {}),
+        }).start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_lookups(self):
+        """
+        Test the group lookups of every index.
+        """
+        snapshot = VehicleSnapshot.fromResponse({'features': self.features}, timestamp=1)
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual(snapshot.byRouteShortName('22'), tuple(self.features[:2]))
+        self.assertEqual(snapshot.byRoute('L9'), (self.features[2],))
+        self.assertIs(snapshot.byTrip('22_2'), self.features[1])
+        self.assertIs(snapshot.byVehicle(3), self.features[2])
+        self.assertEqual(len(snapshot.byLastStop('U1Z1P')), 2)
+        self.assertEqual(snapshot.byNextStop('U3Z1P'), (self.features[1],))
+        self.assertEqual(snapshot.byRoute('L404'), ())
+        self.assertEqual(sorted(snapshot.groups('route_short_name')), ['22', '9'])
+
+    def test_patch(self):
+        """
+        Test that patching builds a new snapshot and leaves the old one untouched.
+        """
+        old = VehicleSnapshot(self.features)
+        moved = vehicle(2, '22', '22_2', 'U3Z1P', 'U4Z1P')
+        new = old.patch(updated=[moved, vehicle(4, '9', '9_2', 'U5Z1P', 'U6Z1P')], removed=['22_1'])
+        self.assertEqual(len(old), 3)
+        self.assertEqual(len(old.byNextStop('U3Z1P')), 1)
+        self.assertEqual(len(new), 3)
+        self.assertEqual(new.byRouteShortName('22'), (moved,))
+        self.assertEqual(new.byNextStop('U3Z1P'), ())
+        self.assertEqual(new.byLastStop('U1Z1P'), (self.features[2],))
+        self.assertEqual(len(new.byRoute('L9')), 2)
+        self.assertIsNone(new.byVehicle(1))
+        self.assertNotIn('U2Z1P', new.groups('last_stop_id'))
+        # Groups that did not change are shared between the snapshots
+        self.assertIs(new.lookup('trip_id', '9_1'), old.lookup('trip_id', '9_1'))
+
+    def test_keyless(self):
+        """
+        Test that vehicles without a trip or vehicle ID are kept apart rather than merged.
+        """
+        first, second = vehicle(None, '22', None, 'U1Z1P', 'U2Z1P'), vehicle(None, '22', None, 'U2Z1P', 'U3Z1P')
+        snapshot = VehicleSnapshot([first, second])
+        self.assertEqual(len(snapshot), 2)
+        patched = snapshot.patch(updated=[vehicle(None, '22', None, 'U3Z1P', 'U4Z1P')], removed=[None])
+        self.assertEqual(len(patched), 3)
+        self.assertEqual(len(patched.byRouteShortName('22')), 3)
+
+    def test_tracker_patch(self):
+        """
+        Test that the changes of a VehiclePositionTracker poll patch a LiveVehicles snapshot in sync.
+        """
+        client = self.server.attach(GolemioClient())
+        tracker = VehiclePositionTracker(client)
+        live = LiveVehicles(client)
+        changes = tracker.poll()
+        live.patch(updated=[tracker.get(key) for key in changes['added']], removed=changes['removed'])
+        self.assertEqual(len(live), 3)
+        moved = vehicle(2, '22', '22_2', 'U3Z1P', 'U4Z1P')
+        self.features = [moved, vehicle(4, '9', '9_2', 'U5Z1P', 'U6Z1P')]
+        changes = tracker.poll(full=True)
+        self.assertEqual(sorted(changes['removed']), ['22_1', '9_1'])
+        live.patch(updated=[tracker.get(key) for key in changes['added'] + changes['updated']],
+                   removed=changes['removed'])
+        self.assertEqual(len(live), 2)
+        self.assertEqual(sorted(map(id, live.snapshot)), sorted(map(id, tracker.snapshot().values())))
+        self.assertIsNone(live.byTrip('22_1'))
+        self.assertEqual(live.byNextStop('U4Z1P'), (moved,))
+
+    def test_live_refresh(self):
+        """
+        Test that refresh swaps the snapshot with one request while readers keep working.
+        """
+        live = LiveVehicles(self.server.attach(GolemioClient()))
+        self.assertEqual(live.byRoute('L22'), ())
+        live.refresh()
+        self.assertEqual(len(live.byRouteShortName('22')), 2)
+        before = live.snapshot
+        self.features = self.features[:1]
+        results = []
+        reader = threading.Thread(target=lambda: results.extend(len(live.byRouteShortName('22')) for _ in range(1000)))
+        reader.start()
+        live.refresh()
+        reader.join()
+        self.assertTrue(set(results) <= {1, 2})
+        self.assertEqual(len(live.byRouteShortName('22')), 1)
+        self.assertEqual(len(before.byRouteShortName('22')), 2)
+        self.assertEqual(len(self.server.requests), 2)
+
+    @unittest.skipIf(vehicles.gtfs_realtime_pb2 is None, 'gtfs-realtime-bindings is required')
+    def test_protobuf(self):
+        """
+        Test building a snapshot from the GTFS Realtime feed.
+        """
+        feed = vehicles.gtfs_realtime_pb2.FeedMessage()
+        feed.header.gtfs_realtime_version = '2.0'
+        feed.header.timestamp = 1700000000
+        for i, status in enumerate(('STOPPED_AT', 'IN_TRANSIT_TO')):
+            entity = feed.entity.add(id=str(i))
+            entity.vehicle.trip.trip_id = f'22_{i}'
+            entity.vehicle.trip.route_id = 'L22'
+            entity.vehicle.vehicle.id = f'service-0-{i}'
+            entity.vehicle.stop_id = 'U1Z1P'
+            entity.vehicle.current_status = getattr(vehicles.gtfs_realtime_pb2.VehiclePosition, status)
+        snapshot = VehicleSnapshot.fromProtobuf(feed.SerializeToString())
+        self.assertEqual(snapshot.timestamp, 1700000000)
+        self.assertEqual(len(snapshot.byRoute('L22')), 2)
+        self.assertEqual(snapshot.byLastStop('U1Z1P')[0].trip.trip_id, '22_0')
+        self.assertEqual(snapshot.byNextStop('U1Z1P')[0].vehicle.id, 'service-0-1')